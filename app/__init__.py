@@ -3,9 +3,12 @@
 __all__ = [
     'pyside_app',
     'branding',
+    'config_service',
     'login',
     'utils',
     'threads',
+    'models',
+    'startup_metrics',
     'theme',
     'pdf_generator',
 ]
@@ -8,37 +8,13 @@ This module contains all branding elements, making them easy to customize:
 - Report display times
 - ID prefix and formatting
 """
-import os
-import yaml
-
-# Add parent directory to path to find config.yaml
+# Values below are read once at import. Code that should follow config.yaml
+# edits without a restart reads app.config_service.get_config() instead.
+from app.config_service import get_config
 from app.utils import get_config_path
 CONFIG_PATH = get_config_path()
 
-# Default Config
-config = {
-    "APP_NAME": "PekoCMS",
-    "CLINIC_NAME": "PekoCMS",
-    "CLINIC_NAME_FORMAL": "PekoCMS",
-    "CLINIC_ADDRESS": "Pekoland",
-    "CLINIC_CONTACT": "+1 (234)-567-8901",
-    "FOOTER_TEXT": "Made by Otus9051 | Powered by PekoCMS",
-    "LOGO_SVG": "logo.svg",
-    "LOGO_PNG": "logo_print.png",
-    "REPORT_DELIVERY_TIMES": "Reports will be given from 12:00 PM to 2:00 PM and 5:00 PM to 8:00 PM.",
-    "PATIENT_ID_PREFIX": "PEK",
-    "UI_SCALE": 1.0,
-}
-
-# Load config.yaml if it exists
-if os.path.exists(CONFIG_PATH):
-    try:
-        with open(CONFIG_PATH, 'r', encoding='utf-8') as f:
-            user_config = yaml.safe_load(f)
-            if user_config:
-                config.update(user_config)
-    except Exception as e:
-        print(f"Warning: Could not load config.yaml: {e}")
+config = get_config().all()
 
 # ============================================================================
 # APPLICATION BRANDING
@@ -178,8 +154,7 @@ REPORT_TABLE_HEADERS = [
     "Patient ID",
     "Status",
     "VID",
-    "Created At",
-    "Action"
+    "Created At"
 ]
 
 # Datasheet export headers
@@ -0,0 +1,188 @@
+"""Cached, hot-reloadable access to config.yaml for PekoCMS.
+
+The file is parsed once and cached. `reload_if_changed()` compares the
+file's mtime and size with the last read and re-parses only on a change;
+the main window polls it on a timer. Subscribers receive a dict of the
+keys whose values changed, whether the change came from `set()` or from
+the file being edited or restored.
+
+Writes made with `set()` are applied to the cache immediately. The file
+itself is written after a short debounce, atomically through a temporary
+file and `os.replace`, so a burst of changes (e.g. dragging the scale
+slider) costs one write. Pending writes are flushed at exit.
+"""
+import os
+import atexit
+import threading
+from typing import Any, Callable, Dict, List, Optional
+
+from app.utils import get_config_path
+
+WRITE_DEBOUNCE_SECONDS = 0.5
+POLL_INTERVAL_MS = 2000         # how often the UI checks config.yaml for outside edits
+
+# Defaults for keys missing from config.yaml
+DEFAULT_CONFIG = {
+    "APP_NAME": "PekoCMS",
+    "CLINIC_NAME": "PekoCMS",
+    "CLINIC_NAME_FORMAL": "PekoCMS",
+    "CLINIC_ADDRESS": "Pekoland",
+    "CLINIC_CONTACT": "+1 (234)-567-8901",
+    "FOOTER_TEXT": "Made by Otus9051 | Powered by PekoCMS",
+    "LOGO_SVG": "logo.svg",
+    "LOGO_PNG": "logo_print.png",
+    "REPORT_DELIVERY_TIMES": "Reports will be given from 12:00 PM to 2:00 PM and 5:00 PM to 8:00 PM.",
+    "PATIENT_ID_PREFIX": "PEK",
+    "UI_SCALE": 1.0,
+}
+
+ConfigListener = Callable[[Dict[str, Any]], None]
+
+
+def _yaml_loader():
+    import yaml
+    # The libyaml-backed loader is much faster when PyYAML ships with it
+    return yaml, getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+
+
+class ConfigService:
+    def __init__(self, path: Optional[str] = None, debounce: float = WRITE_DEBOUNCE_SECONDS):
+        self.path = path or get_config_path()
+        self.debounce = debounce
+        self._lock = threading.RLock()
+        self._file_data: Dict[str, Any] = {}   # exactly what config.yaml holds (written back as-is)
+        self._values: Dict[str, Any] = dict(DEFAULT_CONFIG)
+        self._stamp = None
+        self._listeners: List[ConfigListener] = []
+        self._write_timer: Optional[threading.Timer] = None
+        self._dirty = False
+        self._load()
+
+    # --- Reading ---
+
+    def _file_stamp(self):
+        try:
+            st = os.stat(self.path)
+            return (st.st_mtime_ns, st.st_size)
+        except OSError:
+            return None
+
+    def _load(self) -> Dict[str, Any]:
+        """Re-parses the file and returns the keys whose values changed."""
+        stamp = self._file_stamp()
+        data = {}
+        if stamp is not None:
+            try:
+                yaml, loader = _yaml_loader()
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    data = yaml.load(f, Loader=loader) or {}
+            except Exception as e:
+                print(f"Warning: Could not load config.yaml: {e}")
+                return {}
+        with self._lock:
+            values = dict(DEFAULT_CONFIG)
+            values.update(data)
+            changed = {k: v for k, v in values.items() if self._values.get(k) != v}
+            self._file_data = data
+            self._values = values
+            self._stamp = stamp
+        return changed
+
+    def get(self, key: str, default: Any = None) -> Any:
+        with self._lock:
+            return self._values.get(key, default)
+
+    def __getitem__(self, key: str) -> Any:
+        with self._lock:
+            return self._values[key]
+
+    def all(self) -> Dict[str, Any]:
+        with self._lock:
+            return dict(self._values)
+
+    def reload_if_changed(self) -> bool:
+        """Re-reads config.yaml if it changed on disk and notifies subscribers."""
+        with self._lock:
+            if self._dirty or self._file_stamp() == self._stamp:
+                return False
+        changed = self._load()
+        if changed:
+            self._notify(changed)
+        return bool(changed)
+
+    # --- Subscribers ---
+
+    def subscribe(self, callback: ConfigListener) -> None:
+        with self._lock:
+            self._listeners.append(callback)
+
+    def unsubscribe(self, callback: ConfigListener) -> None:
+        with self._lock:
+            if callback in self._listeners:
+                self._listeners.remove(callback)
+
+    def _notify(self, changed: Dict[str, Any]) -> None:
+        with self._lock:
+            listeners = list(self._listeners)
+        for callback in listeners:
+            try:
+                callback(changed)
+            except Exception as e:
+                print(f"Config listener error: {e}")
+
+    # --- Writing ---
+
+    def set(self, key: str, value: Any) -> None:
+        self.update({key: value})
+
+    def update(self, values: Dict[str, Any]) -> None:
+        """Applies values immediately and schedules a debounced write."""
+        with self._lock:
+            changed = {k: v for k, v in values.items() if self._values.get(k) != v}
+            if not changed:
+                return
+            self._file_data.update(changed)
+            self._values.update(changed)
+            self._dirty = True
+            if self._write_timer is not None:
+                self._write_timer.cancel()
+            self._write_timer = threading.Timer(self.debounce, self.flush)
+            self._write_timer.daemon = True
+            self._write_timer.start()
+        self._notify(changed)
+
+    def flush(self) -> None:
+        """Writes pending changes now (atomically)."""
+        with self._lock:
+            if self._write_timer is not None:
+                self._write_timer.cancel()
+                self._write_timer = None
+            if not self._dirty:
+                return
+            data = dict(self._file_data)
+            tmp_path = self.path + '.tmp'
+            try:
+                yaml, _ = _yaml_loader()
+                with open(tmp_path, 'w', encoding='utf-8') as f:
+                    yaml.dump(data, f, default_flow_style=False, allow_unicode=True)
+                os.replace(tmp_path, self.path)
+                self._stamp = self._file_stamp()
+                self._dirty = False
+            except Exception as e:
+                print(f"Warning: Could not save config.yaml: {e}")
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+
+
+_SERVICE: Optional[ConfigService] = None
+_service_lock = threading.Lock()
+
+
+def get_config() -> ConfigService:
+    """Returns the shared config service, loading config.yaml on first use."""
+    global _SERVICE
+    with _service_lock:
+        if _SERVICE is None:
+            _SERVICE = ConfigService()
+            atexit.register(_SERVICE.flush)
+        return _SERVICE
@@ -8,10 +8,9 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from db import auth_db
 from app.utils import get_asset_path
-from app.branding import (
-    LOGIN_WINDOW_TITLE, LOGIN_WINDOW_HEADING, LOGO_SVG,
-    BUTTON_SIGN_IN, BUTTON_SHUTDOWN
-)
+from app.branding import BUTTON_SIGN_IN, BUTTON_SHUTDOWN
+from app.config_service import get_config
+from app.threads import LoginThread
 
 
 class LoginWindow(QtWidgets.QMainWindow):
@@ -20,7 +19,8 @@ class LoginWindow(QtWidgets.QMainWindow):
     
     def __init__(self):
         super().__init__()
-        self.setWindowTitle(LOGIN_WINDOW_TITLE)
+        config = get_config()
+        self.setWindowTitle(f"{config['APP_NAME']} - Login")
         self.setGeometry(100, 100, 500, 300)
         
         w = QtWidgets.QWidget()
@@ -32,15 +32,13 @@ class LoginWindow(QtWidgets.QMainWindow):
         box.setFixedWidth(400)
         box_layout = QtWidgets.QVBoxLayout(box)
         
-        logo = QtWidgets.QLabel()
-        pix = QtGui.QPixmap(get_asset_path(LOGO_SVG))
-        if not pix.isNull():
-            logo.setPixmap(pix.scaledToHeight(64, QtCore.Qt.SmoothTransformation))
-        logo.setAlignment(QtCore.Qt.AlignCenter)
+        self.logo = QtWidgets.QLabel()
+        self._render_logo(config['LOGO_SVG'])
+        self.logo.setAlignment(QtCore.Qt.AlignCenter)
         
-        title = QtWidgets.QLabel(LOGIN_WINDOW_HEADING)
-        title.setAlignment(QtCore.Qt.AlignCenter)
-        title.setStyleSheet('font-size:18px; font-weight:600;')
+        self.title = QtWidgets.QLabel(f"{config['APP_NAME']} Login")
+        self.title.setAlignment(QtCore.Qt.AlignCenter)
+        self.title.setStyleSheet('font-size:18px; font-weight:600;')
         
         form = QtWidgets.QFormLayout()
         self.username = QtWidgets.QLineEdit()
@@ -52,43 +50,78 @@ class LoginWindow(QtWidgets.QMainWindow):
         # Buttons layout - Sign In and Shutdown
         btn_layout = QtWidgets.QHBoxLayout()
         
-        btn = QtWidgets.QPushButton(BUTTON_SIGN_IN)
-        btn.setStyleSheet('font-size: 12px; padding: 8px 24px; background-color: #0078D4; color: white; font-weight: bold;')
-        btn.clicked.connect(self.do_login)
-        btn_layout.addWidget(btn)
+        self.sign_in_btn = QtWidgets.QPushButton(BUTTON_SIGN_IN)
+        self.sign_in_btn.setStyleSheet('font-size: 12px; padding: 8px 24px; background-color: #0078D4; color: white; font-weight: bold;')
+        self.sign_in_btn.clicked.connect(self.do_login)
+        btn_layout.addWidget(self.sign_in_btn)
+        self.login_thread = None
         
         shutdown_btn = QtWidgets.QPushButton(BUTTON_SHUTDOWN)
         shutdown_btn.setStyleSheet('font-size: 12px; padding: 8px 24px; background-color: #D32F2F; color: white; font-weight: bold;')
         shutdown_btn.clicked.connect(self.shutdown_app)
         btn_layout.addWidget(shutdown_btn)
         
-        box_layout.addWidget(logo)
-        box_layout.addWidget(title)
+        box_layout.addWidget(self.logo)
+        box_layout.addWidget(self.title)
         box_layout.addLayout(form)
         box_layout.addLayout(btn_layout)
         
         
         # Footer
-        from branding import FOOTER_TEXT
-        footer = QtWidgets.QLabel(FOOTER_TEXT)
-        footer.setAlignment(QtCore.Qt.AlignCenter)
-        footer.setStyleSheet('color: gray; font-size: 10px; margin-top: 20px;')
+        self.footer = QtWidgets.QLabel(config['FOOTER_TEXT'])
+        self.footer.setAlignment(QtCore.Qt.AlignCenter)
+        self.footer.setStyleSheet('color: gray; font-size: 10px; margin-top: 20px;')
         
         layout.addStretch()
         layout.addWidget(box, 0, QtCore.Qt.AlignHCenter)
-        layout.addWidget(footer, 0, QtCore.Qt.AlignHCenter)
+        layout.addWidget(self.footer, 0, QtCore.Qt.AlignHCenter)
         layout.addStretch()
         self.setCentralWidget(w)
+        
+        config.subscribe(self._on_config_changed)
+    
+    def _render_logo(self, logo_file):
+        pix = QtGui.QPixmap(get_asset_path(logo_file))
+        if not pix.isNull():
+            self.logo.setPixmap(pix.scaledToHeight(64, QtCore.Qt.SmoothTransformation))
+    
+    def _on_config_changed(self, changed):
+        """Keep the branding current while the login screen is open"""
+        if 'APP_NAME' in changed:
+            self.setWindowTitle(f"{changed['APP_NAME']} - Login")
+            self.title.setText(f"{changed['APP_NAME']} Login")
+        if 'LOGO_SVG' in changed:
+            self._render_logo(changed['LOGO_SVG'])
+        if 'FOOTER_TEXT' in changed:
+            self.footer.setText(changed['FOOTER_TEXT'])
     
     def do_login(self):
-        """Handle login with username and password"""
-        user = auth_db.get_user_by_username(self.username.text())
-        if user and auth_db.check_password(user['password'], self.password.text()):
+        """Handle login with username and password (verified in a worker thread)"""
+        if self.login_thread and self.login_thread.isRunning():
+            return
+        self.sign_in_btn.setEnabled(False)
+        self.sign_in_btn.setText('Signing in...')
+        self.login_thread = LoginThread(self.username.text(), self.password.text(), parent=self)
+        self.login_thread.login_finished.connect(self._on_login_finished)
+        self.login_thread.error_occurred.connect(self._on_login_error)
+        self.login_thread.start()
+    
+    def _reset_sign_in_button(self):
+        self.sign_in_btn.setEnabled(True)
+        self.sign_in_btn.setText(BUTTON_SIGN_IN)
+    
+    def _on_login_finished(self, user):
+        self._reset_sign_in_button()
+        if user:
             auth_db.log_event(user['id'], 'login')
             self.logged_in.emit(user)
         else:
             QtWidgets.QMessageBox.warning(self, 'Error', 'Invalid credentials')
     
+    def _on_login_error(self, message):
+        self._reset_sign_in_button()
+        QtWidgets.QMessageBox.warning(self, 'Error', message)
+    
     def shutdown_app(self):
         """Shutdown the application"""
         QtWidgets.QApplication.quit()
@@ -0,0 +1,119 @@
+"""Qt item models for PekoCMS tables backed by paged database queries"""
+import sys
+import os
+from PySide6 import QtCore, QtGui
+
+# Add parent directory to path for db imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from db import report_tracker_db
+
+
+class ReportsTableModel(QtCore.QAbstractTableModel):
+    """Report tracker rows, fetched a page at a time as the view scrolls.
+
+    Filtering happens in SQL (see report_tracker_db.search_reports); the view
+    only ever holds the pages it has shown. `update_reports` and
+    `remove_report` patch loaded rows in place, so single edits do not
+    reload the table.
+    """
+    COLUMNS = ('invoiceId', 'patientName', 'patientId', 'status', 'vid', 'created_at')
+
+    def __init__(self, headers, page_size=report_tracker_db.REPORT_PAGE_SIZE, parent=None):
+        super().__init__(parent)
+        self.headers = list(headers)
+        self.page_size = page_size
+        self._rows = []
+        self._cursor = None
+        self._exhausted = True
+        self._filters = {'query': '', 'status': None, 'date_range': None}
+
+    # --- Loading ---
+
+    def set_filters(self, query='', status=None, date_range=None, first_page=None):
+        """Replace the contents with the first page matching the filters.
+
+        `first_page` may hold an already fetched first page (e.g. prefetched
+        at startup) for the default filters.
+        """
+        self._filters = {'query': query, 'status': status, 'date_range': date_range}
+        rows = first_page if first_page is not None else self._fetch(None)
+        self.beginResetModel()
+        self._rows = list(rows)
+        self._cursor = self._rows[-1]['cursor'] if self._rows else None
+        self._exhausted = len(self._rows) < self.page_size
+        self.endResetModel()
+
+    def reload(self):
+        self.set_filters(**self._filters)
+
+    def _fetch(self, cursor):
+        return report_tracker_db.search_reports(limit=self.page_size, cursor=cursor, **self._filters)
+
+    def canFetchMore(self, parent=QtCore.QModelIndex()):
+        return not parent.isValid() and not self._exhausted
+
+    def fetchMore(self, parent=QtCore.QModelIndex()):
+        if parent.isValid() or self._exhausted:
+            return
+        page = self._fetch(self._cursor)
+        self._exhausted = len(page) < self.page_size
+        if not page:
+            return
+        start = len(self._rows)
+        self.beginInsertRows(QtCore.QModelIndex(), start, start + len(page) - 1)
+        self._rows.extend(page)
+        self._cursor = page[-1]['cursor']
+        self.endInsertRows()
+
+    # --- Qt model interface ---
+
+    def rowCount(self, parent=QtCore.QModelIndex()):
+        return 0 if parent.isValid() else len(self._rows)
+
+    def columnCount(self, parent=QtCore.QModelIndex()):
+        return 0 if parent.isValid() else len(self.COLUMNS)
+
+    def data(self, index, role=QtCore.Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        row = self._rows[index.row()]
+        key = self.COLUMNS[index.column()]
+        if role == QtCore.Qt.DisplayRole:
+            return str(row.get(key) or '')
+        if role == QtCore.Qt.ForegroundRole and key == 'status' and row.get('status', '').upper() != 'DELIVERED':
+            return QtGui.QBrush(QtGui.QColor('#D13438'))
+        if role == QtCore.Qt.UserRole:
+            return row
+        return None
+
+    def headerData(self, section, orientation, role=QtCore.Qt.DisplayRole):
+        if role == QtCore.Qt.DisplayRole and orientation == QtCore.Qt.Horizontal and section < len(self.headers):
+            return self.headers[section]
+        return super().headerData(section, orientation, role)
+
+    # --- Row access and in-place updates ---
+
+    def report_at(self, row):
+        return self._rows[row]
+
+    def _row_of(self, invoice_id):
+        for i, row in enumerate(self._rows):
+            if row['invoiceId'] == invoice_id:
+                return i
+        return -1
+
+    def update_reports(self, invoice_ids, changes):
+        """Apply `changes` to the loaded rows of these invoices without reloading."""
+        wanted = set(invoice_ids)
+        for i, row in enumerate(self._rows):
+            if row['invoiceId'] in wanted:
+                row.update(changes)
+                self.dataChanged.emit(self.index(i, 0), self.index(i, len(self.COLUMNS) - 1))
+
+    def remove_report(self, invoice_id):
+        i = self._row_of(invoice_id)
+        if i >= 0:
+            self.beginRemoveRows(QtCore.QModelIndex(), i, i)
+            del self._rows[i]
+            self.endRemoveRows()
@@ -8,7 +8,9 @@ from fpdf import FPDF
 
 # Add app directory to path for branding import
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
-from branding import CLINIC_NAME, CLINIC_NAME_FORMAL, LOGO_PNG, REPORT_DELIVERY_TIMES, PATIENT_ID_LABEL
+from branding import PATIENT_ID_LABEL
+# Clinic details and logo are read per invoice so config.yaml edits apply immediately
+from app.config_service import get_config
 
 # --- Pydantic Data Models for Validation ---
 
@@ -68,7 +70,7 @@ class InvoicePDF(FPDF):
         try:
             # Get base path
             from app.utils import get_asset_path
-            png_path = get_asset_path(LOGO_PNG)
+            png_path = get_asset_path(get_config()['LOGO_PNG'])
             
             if os.path.exists(png_path):
                 self.image(png_path, x=logo_x, y=logo_y, w=logo_w)
@@ -78,17 +80,17 @@ class InvoicePDF(FPDF):
             else:
                 self.set_y(logo_y)
                 self.set_font('Helvetica', 'B', 16)
-                self.cell(0, 10, CLINIC_NAME, 0, 1, 'C')
+                self.cell(0, 10, get_config()['CLINIC_NAME'], 0, 1, 'C')
                 
         except Exception as e:
             print(f"Error processing logo: {e}")
             self.set_y(logo_y)
             self.set_font('Helvetica', 'B', 16)
-            self.cell(0, 10, CLINIC_NAME, 0, 1, 'C')
+            self.cell(0, 10, get_config()['CLINIC_NAME'], 0, 1, 'C')
 
         # --- Clinic Name and Details (CENTERED) ---
         self.set_font('Helvetica', 'B', 16)
-        self.cell(0, 7, CLINIC_NAME_FORMAL, 0, 1, 'C')
+        self.cell(0, 7, get_config()['CLINIC_NAME_FORMAL'], 0, 1, 'C')
         
         self.set_font('Helvetica', '', 10)
         self.multi_cell(0, 5, self.invoice.address, 0, 'C')
@@ -106,7 +108,7 @@ class InvoicePDF(FPDF):
     def footer(self):
         self.set_y(-20) 
         self.set_font('Helvetica', 'I', 8)
-        self.cell(0, 5, REPORT_DELIVERY_TIMES, 0, 1, 'C')
+        self.cell(0, 5, get_config()['REPORT_DELIVERY_TIMES'], 0, 1, 'C')
         self.set_y(-15)
         self.cell(0, 5, 'This is a computer-generated invoice.', 0, 1, 'C')
         self.cell(0, 5, f'Page {self.page_no()}/{{nb}}', 0, 0, 'C')
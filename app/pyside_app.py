@@ -1,4 +1,4 @@
-import sys, os, json, webbrowser, datetime
+import sys, os, json, time, webbrowser, datetime
 from typing import List, Dict, Any
 from PySide6 import QtWidgets, QtCore, QtGui, QtSvg
 
@@ -7,7 +7,7 @@ from PySide6 import QtWidgets, QtCore, QtGui, QtSvg
 PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 sys.path.insert(0, PROJECT_ROOT)
 
-from db import auth_db, patient_cms_db, datasheet_db, report_tracker_db, invoice_service, data_fetcher, catalogue_db, special_tests_db, polyclinic_db
+from db import auth_db, patient_cms_db, datasheet_db, report_tracker_db, invoice_service, data_fetcher, catalogue_db, special_tests_db, polyclinic_db, availability_service, migrations, backup_service, backup_store, audit_log, search_service, cache
 from app import theme
 # Import refactored modules
 from app.login import LoginWindow
@@ -15,24 +15,31 @@ from app.threads import (
     CatalogueLoaderThread, 
     InvoiceCatalogueLoaderThread, 
     SpecialTestsLoaderThread, 
-    FullCatalogueLoaderThread
+    FullCatalogueLoaderThread,
+    PolyclinicExportThread,
+    SyncStatusBridge,
+    StartupPrefetchThread,
+    BackupThread,
+    AutoBackupThread,
+    ArchiveThread
 )
+from app.startup_metrics import PhaseTimer
+from app.models import ReportsTableModel
 from app.updater import check_for_updates_gui
 from app.branding import (
     APP_NAME, LOGIN_WINDOW_TITLE, LOGIN_WINDOW_HEADING,
-    CLINIC_NAME, CLINIC_ADDRESS, CLINIC_CONTACT,
+    CLINIC_NAME,
     WINDOW_TITLE_PATHOLOGY, WINDOW_TITLE_POLYCLINIC, WINDOW_TITLE_ADMIN,
     LOGO_SVG, LOGO_PNG, ASSETS_DIRECTORY, PATIENT_ID_COLUMN_NAME,
     QUEUE_TABLE_HEADERS, REPORT_TABLE_HEADERS, PATIENT_TABLE_HEADERS,
     MODE_PATHOLOGY, MODE_POLYCLINIC, MODE_ADMIN,
     BUTTON_SIGN_IN, BUTTON_SHUTDOWN, BUTTON_REFRESH, BUTTON_EXPORT,
     DEFAULT_CSV_FILENAME, DEFAULT_XLSX_FILENAME,
-    INVOICE_FOLDER_NAME, INVOICE_SUBDIRECTORY, PATIENT_ID_LABEL, CLINIC_NAME_PREFIX,
-    FOOTER_TEXT, UI_SCALE
+    INVOICE_FOLDER_NAME, INVOICE_SUBDIRECTORY, PATIENT_ID_LABEL, CLINIC_NAME_PREFIX
 )
+from app.config_service import get_config, POLL_INTERVAL_MS as CONFIG_POLL_INTERVAL_MS
 
-from app.utils import get_asset_path, get_invoice_storage_dir, get_config_path
-import yaml
+from app.utils import get_asset_path, get_invoice_storage_dir
 
 # Handle PyInstaller frozen app paths
 if getattr(sys, 'frozen', False):
@@ -40,7 +47,10 @@ if getattr(sys, 'frozen', False):
 else:
     BASE_PATH = PROJECT_ROOT
 
-INVOICE_STORAGE_DIR = get_invoice_storage_dir()
+# Rapid report delivery: per-scan feedback target, and how often scans are written as one batch
+SCAN_LATENCY_TARGET_MS = 50
+SCAN_FLUSH_INTERVAL_MS = 1000
+
 
 
 def render_svg(svg_path, height):
@@ -74,7 +84,6 @@ def render_svg(svg_path, height):
 
 
 
-INVOICE_STORAGE_DIR = get_invoice_storage_dir()
 
 
 class FirstTimeSetupDialog(QtWidgets.QDialog):
@@ -194,10 +203,72 @@ class FirstTimeSetupDialog(QtWidgets.QDialog):
         if zip_path:
             from app.restore_utils import restore_system_from_backup
             success = restore_system_from_backup(zip_path, self)
-            if success:
-                # Close app to allow restart
-                QtWidgets.QApplication.quit()
-                sys.exit(0)
+            if success and auth_db.check_if_any_user_exists():
+                # Restored users can log in straight away
+                self.accept()
+
+
+class QuickSearchDialog(QtWidgets.QDialog):
+    """Ctrl+K search across tests, special tests, patients and doctors.
+
+    Searches on every keystroke (see search_service.search); Up/Down move
+    through the hits and Enter opens the selected one.
+    """
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle('Quick Search')
+        self.resize(560, 420)
+        self.selected_hit = None
+
+        layout = QtWidgets.QVBoxLayout(self)
+        self.search_input = QtWidgets.QLineEdit()
+        self.search_input.setPlaceholderText('Search tests, patients, doctors... (name, ID, phone, code)')
+        self.search_input.setStyleSheet('font-size: 14px; padding: 6px;')
+        self.search_input.textChanged.connect(self.run_search)
+        self.search_input.returnPressed.connect(self.open_selected)
+        layout.addWidget(self.search_input)
+
+        self.results_list = QtWidgets.QListWidget()
+        self.results_list.itemActivated.connect(lambda _item: self.open_selected())
+        layout.addWidget(self.results_list)
+
+        self.status_label = QtWidgets.QLabel('Type at least 2 characters')
+        self.status_label.setStyleSheet('color: gray; font-size: 10px;')
+        layout.addWidget(self.status_label)
+
+    def run_search(self, text):
+        started = time.perf_counter()
+        hits = search_service.search(text)
+        elapsed_ms = (time.perf_counter() - started) * 1000
+
+        self.results_list.clear()
+        for hit in hits:
+            item = QtWidgets.QListWidgetItem(
+                f"[{search_service.KIND_LABELS[hit.kind]}]  {hit.title}    —  {hit.subtitle}")
+            item.setData(QtCore.Qt.UserRole, hit)
+            self.results_list.addItem(item)
+        if hits:
+            self.results_list.setCurrentRow(0)
+        if len(text.strip()) < search_service.MIN_QUERY_LENGTH:
+            self.status_label.setText('Type at least 2 characters')
+        else:
+            self.status_label.setText(f'{len(hits)} results in {elapsed_ms:.0f} ms')
+
+    def keyPressEvent(self, event):
+        # Up/Down move through the results while typing continues in the box
+        if event.key() in (QtCore.Qt.Key_Down, QtCore.Qt.Key_Up) and self.results_list.count():
+            step = 1 if event.key() == QtCore.Qt.Key_Down else -1
+            row = max(0, min(self.results_list.count() - 1, self.results_list.currentRow() + step))
+            self.results_list.setCurrentRow(row)
+            return
+        super().keyPressEvent(event)
+
+    def open_selected(self):
+        item = self.results_list.currentItem()
+        if item is None:
+            return
+        self.selected_hit = item.data(QtCore.Qt.UserRole)
+        self.accept()
 
 
 class MainWindow(QtWidgets.QMainWindow):
@@ -219,12 +290,12 @@ class MainWindow(QtWidgets.QMainWindow):
     
     def __init__(self, user):
         super().__init__()
-        # Initialize databases
-        catalogue_db.init_db()
-        polyclinic_db.init_db()
+        # Databases are initialized once in main(); time time-to-first-interaction from here
+        self.startup_timer = PhaseTimer('main_window')
         
         self.user = user
-        self.setWindowTitle(APP_NAME)
+        config = get_config()
+        self.setWindowTitle(config['APP_NAME'])
         self.resize(1200, 800)
         self.is_shutting_down = False
         self.current_mode = 'pathology'  # Start in pathology mode
@@ -252,16 +323,14 @@ class MainWindow(QtWidgets.QMainWindow):
         header_layout.setContentsMargins(10, 8, 10, 8)
         
         # Logo
-        logo = QtWidgets.QLabel()
-        pix = render_svg(get_asset_path(LOGO_SVG), 40) # Crisp render at 40px
-        if pix:
-            logo.setPixmap(pix)
-        header_layout.addWidget(logo)
+        self.header_logo = QtWidgets.QLabel()
+        self._render_header_logo(config['LOGO_SVG'])
+        header_layout.addWidget(self.header_logo)
         
         # Clinic name
-        clinic_name = QtWidgets.QLabel(APP_NAME)
-        clinic_name.setStyleSheet('font-size: 22px; font-weight: bold; margin-left: 10px;')
-        header_layout.addWidget(clinic_name)
+        self.header_title = QtWidgets.QLabel(config['APP_NAME'])
+        self.header_title.setStyleSheet('font-size: 22px; font-weight: bold; margin-left: 10px;')
+        header_layout.addWidget(self.header_title)
         
         # Mode toggle buttons
         header_layout.addSpacing(20)
@@ -284,7 +353,7 @@ class MainWindow(QtWidgets.QMainWindow):
         self.scale_slider = QtWidgets.QSlider(QtCore.Qt.Horizontal)
         self.scale_slider.setMinimum(50)  # 50%
         self.scale_slider.setMaximum(150)  # 150%
-        self.scale_slider.setValue(int(UI_SCALE * 100))  # Load from config
+        self.scale_slider.setValue(int(config['UI_SCALE'] * 100))  # Load from config
         self.scale_slider.setTickPosition(QtWidgets.QSlider.TicksBelow)
         self.scale_slider.setTickInterval(25)
         self.scale_slider.setMaximumWidth(120)
@@ -292,7 +361,7 @@ class MainWindow(QtWidgets.QMainWindow):
         self.scale_slider.valueChanged.connect(self.on_scale_changed)
         header_layout.addWidget(self.scale_slider)
         
-        self.scale_value_label = QtWidgets.QLabel(f'{int(UI_SCALE * 100)}%')
+        self.scale_value_label = QtWidgets.QLabel(f"{int(config['UI_SCALE'] * 100)}%")
         self.scale_value_label.setStyleSheet('font-size: 11px; font-weight: bold; min-width: 40px;')
         header_layout.addWidget(self.scale_value_label)
         
@@ -304,6 +373,16 @@ class MainWindow(QtWidgets.QMainWindow):
         self.compact_check.toggled.connect(self.on_compact_toggled)
         header_layout.addWidget(self.compact_check)
         
+        # Global quick search (Ctrl+K)
+        header_layout.addSpacing(10)
+        search_btn = QtWidgets.QPushButton('Search (Ctrl+K)')
+        search_btn.setStyleSheet('font-size: 11px; padding: 4px 8px;')
+        search_btn.clicked.connect(self.open_quick_search)
+        header_layout.addWidget(search_btn)
+        self.quick_search_shortcut = QtGui.QShortcut(QtGui.QKeySequence('Ctrl+K'), self)
+        self.quick_search_shortcut.setContext(QtCore.Qt.ApplicationShortcut)
+        self.quick_search_shortcut.activated.connect(self.open_quick_search)
+        
         # User info and logout button
         header_layout.addStretch()
         user_label = QtWidgets.QLabel(f"User: {user.get('username', 'Unknown')}")
@@ -367,7 +446,22 @@ class MainWindow(QtWidgets.QMainWindow):
         
         self.mode_stack.addWidget(polyclinic_widget)
         
-        self.mode_stack.addWidget(polyclinic_widget)
+        # Only the invoice generator is built up front; every other tab is
+        # built the first time it is shown
+        self._lazy_tabs = {}
+        self._register_lazy_tab(self.cms_tab, self.init_cms_tab)
+        self._register_lazy_tab(self.datasheet_tab, self.init_datasheet_tab)
+        self._register_lazy_tab(self.reports_tab, self.init_reports_tab)
+        if user.get('role') == 'admin':
+            self._register_lazy_tab(self.admin_tab, self.init_admin_tab)
+        self._register_lazy_tab(self.poly_booking_tab, self.init_poly_booking_tab)
+        self._register_lazy_tab(self.poly_doctor_tab, self.init_poly_doctor_tab)
+        self._register_lazy_tab(self.poly_queue_tab, self.init_poly_queue_tab)
+        self._register_lazy_tab(self.poly_cms_tab, self.init_poly_cms_tab)
+        self.pathology_tabs.currentChanged.connect(
+            lambda i: self._ensure_tab_built(self.pathology_tabs.widget(i)))
+        self.polyclinic_tabs.currentChanged.connect(
+            lambda i: self._ensure_tab_built(self.polyclinic_tabs.widget(i)))
         
         main_layout.addWidget(self.mode_stack)
         
@@ -376,7 +470,7 @@ class MainWindow(QtWidgets.QMainWindow):
         # Apply initial scale from config
         # Smart Auto-Scale: If we are in compact mode (small screen) and user hasn't customized scale (still 1.0),
         # automatically drop to 0.85 which is the sweet spot for 768p
-        current_s = UI_SCALE
+        current_s = config['UI_SCALE']
         if self.compact_mode and current_s == 1.0:
             print("Auto-scaling to 0.85 for 768p screen")
             current_s = 0.85
@@ -385,30 +479,39 @@ class MainWindow(QtWidgets.QMainWindow):
             
         self.apply_ui_scale(current_s)
         self.scale_slider.setValue(int(current_s * 100)) # Sync slider
+        self.startup_timer.mark('layout')
         
-        # Initialize pathology tabs
+        # Initialize the invoice tab (the rest are lazy, see above)
         self.init_invoice_tab()
-        self.init_cms_tab()
-        self.init_datasheet_tab()
-        self.init_reports_tab()
-        if user.get('role') == 'admin':
-            self.init_admin_tab()
-        
-        # Initialize polyclinic tabs
-        self.init_poly_booking_tab()
-        self.init_poly_doctor_tab()
-        self.init_poly_queue_tab()
-        self.init_poly_cms_tab()
+        self.startup_timer.mark('invoice_tab')
         
         # Add footer
-        footer = QtWidgets.QLabel(FOOTER_TEXT)
-        footer.setAlignment(QtCore.Qt.AlignCenter)
-        footer.setStyleSheet('color: gray; font-size: 10px; padding: 4px;')
-        main_layout.addWidget(footer)
+        self.footer_label = QtWidgets.QLabel(config['FOOTER_TEXT'])
+        self.footer_label.setAlignment(QtCore.Qt.AlignCenter)
+        self.footer_label.setStyleSheet('color: gray; font-size: 10px; padding: 4px;')
+        main_layout.addWidget(self.footer_label)
+        
+        # Branding and scale edits (here, in config.yaml or from a restore) apply live
+        config.subscribe(self._on_config_changed)
         
         # Refresh database on login
         self.refresh_database()
 
+        # Follow background catalogue syncs; hold them off while an invoice is being built
+        self.sync_bridge = SyncStatusBridge(parent=self)
+        self.sync_bridge.status_changed.connect(self._on_sync_status_changed)
+        data_fetcher.get_scheduler().set_busy_check(self._is_busy_for_sync)
+        
+        # Incremental backups: first one shortly after startup, then on a timer.
+        # Old rows are archived right after each one, once they are safely backed up.
+        self.auto_backup_thread = None
+        self.archive_thread = None
+        self.auto_backup_timer = QtCore.QTimer(self)
+        self.auto_backup_timer.setInterval(backup_store.AUTO_BACKUP_INTERVAL_SECONDS * 1000)
+        self.auto_backup_timer.timeout.connect(self._run_auto_backup)
+        QtCore.QTimer.singleShot(backup_store.AUTO_BACKUP_INITIAL_DELAY_SECONDS * 1000, self._run_auto_backup)
+        self.auto_backup_timer.start()
+
         # Check for updates
         QtCore.QTimer.singleShot(1000, lambda: check_for_updates_gui(self))
 
@@ -416,8 +519,20 @@ class MainWindow(QtWidgets.QMainWindow):
         self.pathology_tabs.currentChanged.connect(self.on_tab_changed)
         self.polyclinic_tabs.currentChanged.connect(self.on_tab_changed)
 
-        # Preload Special Tests
-        self.preload_special_tests()
+        # Initial data queries run concurrently; results seed tabs not yet built
+        self._prefetched = {}
+        self._prefetch_invalidated = set()
+        self.prefetch_thread = StartupPrefetchThread({
+            'special_tests': special_tests_db.get_index,
+            'invoice_records': lambda: datasheet_db.get_all_invoice_records(full=True),
+            'reports': report_tracker_db.search_reports,
+        }, parent=self)
+        self.prefetch_thread.data_ready.connect(self._on_startup_prefetched)
+        self.prefetch_thread.start()
+        
+        self.startup_timer.mark('window_ready')
+        # Fires on the first event-loop pass after the window is shown
+        QtCore.QTimer.singleShot(0, self._on_first_interaction)
     
     def on_scale_changed(self, value):
         """Handle scale slider changes"""
@@ -615,31 +730,91 @@ class MainWindow(QtWidgets.QMainWindow):
             traceback.print_exc()
     
     def save_scale_to_config(self, scale):
-        """Save the current scale to config.yaml"""
-        try:
-            config_path = get_config_path()
-            
-            # Load existing config
-            config = {}
-            if os.path.exists(config_path):
-                with open(config_path, 'r', encoding='utf-8') as f:
-                    config = yaml.safe_load(f) or {}
-            
-            # Update scale
-            config['UI_SCALE'] = scale
-            
-            # Save back to file
-            with open(config_path, 'w', encoding='utf-8') as f:
-                yaml.dump(config, f, default_flow_style=False, allow_unicode=True)
-        except Exception as e:
-            print(f"Warning: Could not save UI scale to config: {e}")
+        """Save the current scale to config.yaml (debounced, so dragging the slider writes once)"""
+        get_config().set('UI_SCALE', scale)
+    
+    def _render_header_logo(self, logo_file):
+        pix = render_svg(get_asset_path(logo_file), 40) # Crisp render at 40px
+        if pix:
+            self.header_logo.setPixmap(pix)
+    
+    def _on_config_changed(self, changed):
+        """Apply branding and scale changes from the config service"""
+        if 'APP_NAME' in changed:
+            self.setWindowTitle(changed['APP_NAME'])
+            self.header_title.setText(changed['APP_NAME'])
+        if 'LOGO_SVG' in changed:
+            self._render_header_logo(changed['LOGO_SVG'])
+        if 'FOOTER_TEXT' in changed:
+            self.footer_label.setText(changed['FOOTER_TEXT'])
+        if 'UI_SCALE' in changed:
+            value = int(float(changed['UI_SCALE']) * 100)
+            if value != self.scale_slider.value():
+                # Update without writing the value straight back to config.yaml
+                self.scale_slider.blockSignals(True)
+                self.scale_slider.setValue(value)
+                self.scale_slider.blockSignals(False)
+                self.scale_value_label.setText(f'{value}%')
+                self.apply_ui_scale(value / 100.0)
 
+    # Tab page -> (builder, placeholder) for tabs that have not been built yet
+    def _register_lazy_tab(self, page, builder):
+        placeholder = QtWidgets.QLabel('Loading...', page)
+        placeholder.setStyleSheet('color: gray; padding: 12px;')
+        self._lazy_tabs[page] = (builder, placeholder)
+    
+    def _tab_built(self, page):
+        return page not in self._lazy_tabs
+    
+    def _ensure_tab_built(self, page):
+        """Build a lazily registered tab the first time it is shown"""
+        entry = self._lazy_tabs.pop(page, None)
+        if entry is None:
+            return
+        builder, placeholder = entry
+        placeholder.hide()
+        placeholder.deleteLater()
+        builder()
+    
+    def _on_first_interaction(self):
+        self.startup_timer.mark('first_interaction')
+        if self.prefetch_thread.isRunning():
+            self._save_startup_timings_on_prefetch = True
+        else:
+            self.startup_timer.save()
+    
+    # Prefetch key -> tab page whose first build consumes it
+    def _prefetch_page(self, key):
+        return {'invoice_records': self.datasheet_tab, 'reports': self.reports_tab}.get(key)
+    
+    def _on_startup_prefetched(self, results, timings):
+        """Keep prefetched data only for tabs that are still unbuilt and unchanged"""
+        # The special tests index is shared module state; loading it was the point
+        results.pop('special_tests', None)
+        for key, value in results.items():
+            page = self._prefetch_page(key)
+            if key not in self._prefetch_invalidated and page is not None and not self._tab_built(page):
+                self._prefetched[key] = value
+        self.startup_timer.add('prefetch_ms', timings)
+        if getattr(self, '_save_startup_timings_on_prefetch', False):
+            self.startup_timer.save()
+        self.prefetch_thread.quit()
+    
+    def _take_prefetched(self, key):
+        """Return (once) data prefetched at startup, or None"""
+        return self._prefetched.pop(key, None)
+    
+    def _invalidate_prefetched(self, key):
+        """Data changed before its tab was built; the prefetched copy is stale"""
+        self._prefetched.pop(key, None)
+        self._prefetch_invalidated.add(key)
+    
     def preload_special_tests(self):
-        """Load special tests into memory on startup"""
+        """Load the special tests index into memory on startup"""
         try:
             print("Preloading Special Tests...")
-            self.special_tests_cache = special_tests_db.get_all_special_tests()
-            print(f"Loaded {len(self.special_tests_cache)} special tests into memory.")
+            index = special_tests_db.get_index()
+            print(f"Loaded {len(index)} special tests into memory.")
         except Exception as e:
             print(f"Error preloading special tests: {e}")
 
@@ -649,6 +824,36 @@ class MainWindow(QtWidgets.QMainWindow):
         QtWidgets.QApplication.processEvents()
         # self.adjustSize() - Disabled per user request
     
+    def open_quick_search(self):
+        """Ctrl+K: search everything and jump to the chosen hit"""
+        dialog = QuickSearchDialog(self)
+        if dialog.exec() == QtWidgets.QDialog.Accepted and dialog.selected_hit is not None:
+            self.open_search_hit(dialog.selected_hit)
+    
+    def open_search_hit(self, hit):
+        """Tests and patients go to the invoice generator; doctors to polyclinic booking"""
+        if hit.kind in ('test', 'special_test', 'patient'):
+            self.switch_mode('pathology')
+            self.pathology_tabs.setCurrentWidget(self.invoice_tab)
+            if hit.kind == 'test':
+                self.add_test_to_selection(hit.key)
+            elif hit.kind == 'special_test':
+                self.add_special_test_to_selection(hit.key)
+            else:
+                self.inv_patient_id.setText(hit.key)
+                self.inv_lookup_patient()
+        elif hit.kind == 'doctor':
+            self.switch_mode('polyclinic')
+            self.polyclinic_tabs.setCurrentWidget(self.poly_booking_tab)
+            self._ensure_tab_built(self.poly_booking_tab)
+            self._poly_load_doctors_once()
+            self.poly_doctor_search.setText(hit.title)
+            for row in range(self.poly_doctor_list.count()):
+                item = self.poly_doctor_list.item(row)
+                if item.data(QtCore.Qt.UserRole).get('doctor_id') == hit.key:
+                    self.poly_doctor_list.setCurrentItem(item)
+                    break
+    
     def switch_mode(self, mode: str):
         """Switch between Pathology and Polyclinic modes"""
         self.current_mode = mode
@@ -660,6 +865,7 @@ class MainWindow(QtWidgets.QMainWindow):
             self.mode_stack.setCurrentIndex(1)
             self.pathology_btn.setStyleSheet('font-size: 12px; font-weight: bold; padding: 6px 16px; background-color: #A9A9A9; color: white; border-radius: 4px;')
             self.polyclinic_btn.setStyleSheet('font-size: 12px; font-weight: bold; padding: 6px 16px; background-color: #0078D4; color: white; border-radius: 4px;')
+            self._ensure_tab_built(self.polyclinic_tabs.currentWidget())
     
     def closeEvent(self, event):
         """Handle window close properly"""
@@ -673,6 +879,10 @@ class MainWindow(QtWidgets.QMainWindow):
     
     def do_logout(self):
         """Emit logout signal to switch to login screen"""
+        self.sync_bridge.detach()
+        data_fetcher.get_scheduler().set_busy_check(None)
+        get_config().unsubscribe(self._on_config_changed)
+        self._flush_scanned_deliveries()
         self.logout_signal.emit()
         self.hide()
     
@@ -687,6 +897,8 @@ class MainWindow(QtWidgets.QMainWindow):
         )
         if reply == QtWidgets.QMessageBox.Yes:
             self.is_shutting_down = True
+            self._flush_scanned_deliveries()
+            get_config().flush()
             QtWidgets.QApplication.quit()
     
     def refresh_database(self):
@@ -697,8 +909,6 @@ class MainWindow(QtWidgets.QMainWindow):
         self.catalogue_thread.finished.connect(self._on_catalogue_loaded)
         self.catalogue_thread.start()
         
-        # Load doctor list for polyclinic
-        self._poly_load_doctors_once()
     
     def _on_catalogue_loaded(self):
         """Called when catalogue loading is complete"""
@@ -724,6 +934,58 @@ class MainWindow(QtWidgets.QMainWindow):
             # Widget might be deleted during shutdown or scaling update
             pass
     
+    def _run_auto_backup(self):
+        """Start a scheduled incremental backup unless one is running or the user is billing"""
+        if self.auto_backup_thread is not None and self.auto_backup_thread.isRunning():
+            return
+        if self._is_busy_for_sync():
+            return
+        self.auto_backup_thread = AutoBackupThread(parent=self)
+        self.auto_backup_thread.backup_finished.connect(self._on_auto_backup_finished)
+        self.auto_backup_thread.error_occurred.connect(lambda msg: print(msg))
+        self.auto_backup_thread.start()
+    
+    def _on_auto_backup_finished(self, snapshot):
+        print(f"Automatic backup {snapshot['id']}: {snapshot['new_chunks']} new chunk(s), "
+              f"{snapshot['new_bytes']} bytes written, {snapshot['reused_files']} unchanged file(s), "
+              f"{snapshot['pruned']['removed_snapshots']} old snapshot(s) pruned")
+        self._run_archiver()
+    
+    def _run_archiver(self):
+        """Move old rows out of the hot tables in the background"""
+        if self.archive_thread is not None and self.archive_thread.isRunning():
+            return
+        self.archive_thread = ArchiveThread(parent=self)
+        self.archive_thread.archive_finished.connect(self._on_archive_finished)
+        self.archive_thread.error_occurred.connect(lambda msg: print(msg))
+        self.archive_thread.start()
+    
+    def _on_archive_finished(self, moved):
+        if any(moved.values()):
+            print("Archived rows: " + ", ".join(f"{name} {count}" for name, count in moved.items()))
+            self._invalidate_prefetched('invoice_records')
+            self._invalidate_prefetched('reports')
+    
+    def _is_busy_for_sync(self):
+        """Called from the sync scheduler thread; only reads plain Python state"""
+        if self.inv_selected_tests:
+            return True
+        export_thread = getattr(self, 'poly_export_thread', None)
+        return bool(export_thread and export_thread.isRunning())
+    
+    def _on_sync_status_changed(self, status):
+        """Show catalogue sync state changes in the status bar"""
+        if status.state == getattr(self, '_last_sync_state', None):
+            return
+        self._last_sync_state = status.state
+        if status.state == data_fetcher.SyncState.RUNNING:
+            self.statusBar().showMessage("Syncing catalogue...")
+        elif status.state in (data_fetcher.SyncState.SUCCESS, data_fetcher.SyncState.FAILED,
+                              data_fetcher.SyncState.UNAVAILABLE):
+            self.statusBar().showMessage(status.message, 10000)
+            if status.state == data_fetcher.SyncState.SUCCESS:
+                self._update_catalogue_status(f"Ready - {status.row_count} tests cached")
+    
     def refresh_invoice_catalogue(self):
         
         # Load in background using QThread
@@ -1044,6 +1306,7 @@ class MainWindow(QtWidgets.QMainWindow):
         self.inv_lookup_btn.setMaximumWidth(65)
         self.inv_lookup_btn.setStyleSheet('font-size: 10px;')
         self.inv_lookup_btn.clicked.connect(self.inv_lookup_patient)
+        self.inv_patient_completer = self._attach_patient_completer(self.inv_patient_id, self.inv_lookup_patient)
         lookup_layout.addWidget(self.inv_patient_id)
         lookup_layout.addWidget(self.inv_lookup_btn)
         patient_layout.addLayout(lookup_layout)
@@ -1229,10 +1492,10 @@ class MainWindow(QtWidgets.QMainWindow):
         self.filter_inv_catalogue()
     
     def load_special_tests(self):
-        """Load special/custom tests from database"""
-        self.special_tests_data = special_tests_db.get_all_special_tests()
+        """Load special/custom tests into the in-memory index and list them"""
+        special_tests_db.get_index()
         self.special_tests_loaded = True
-        self.filter_special_tests()
+        self.search_special_tests()
     
     def search_invoice_catalogue(self):
         """Query SQLite catalogue on-demand and display results"""
@@ -1247,8 +1510,15 @@ class MainWindow(QtWidgets.QMainWindow):
         try:
             self.cat_status.setText('Searching...')
             
-            # Query standard tests from SQLite
-            results = catalogue_db.search_tests(q)
+            # Query standard tests from SQLite; when few names contain the text,
+            # add close matches (misspellings, aliases) from the trigram index
+            results = catalogue_db.search_test_rows(q)
+            similar = 0
+            if len(results) < catalogue_db.FUZZY_LIMIT:
+                found = {t.testCode for t in results}
+                extra = [t for t in catalogue_db.fuzzy_search_test_rows(q) if t.testCode not in found]
+                similar = len(extra)
+                results = results + extra
             
             # Display results with batch rendering
             self.cat_table.setUpdatesEnabled(False)
@@ -1260,27 +1530,27 @@ class MainWindow(QtWidgets.QMainWindow):
                 
                 # Create items with selectable but non-editable flags
                 flags = QtCore.Qt.ItemIsSelectable | QtCore.Qt.ItemIsEnabled
-                code_item = QtWidgets.QTableWidgetItem(t.get('testCode', ''))
+                code_item = QtWidgets.QTableWidgetItem(t.testCode or '')
                 code_item.setFlags(flags)
-                name_item = QtWidgets.QTableWidgetItem(t.get('testName', ''))
+                name_item = QtWidgets.QTableWidgetItem(t.testName or '')
                 name_item.setFlags(flags)
                 
                 # Fasting indicator
-                is_fasting = t.get('FastingRequired', '').lower() == 'yes'
+                is_fasting = t.is_fasting
                 fasting_item = QtWidgets.QTableWidgetItem('Yes' if is_fasting else 'No')
                 fasting_item.setFlags(flags)
                 if is_fasting:
                     fasting_item.setBackground(QtGui.QColor(255, 100, 100))  # Red background
                     fasting_item.setForeground(QtGui.QColor(255, 255, 255))  # White text
                 
-                fees_item = QtWidgets.QTableWidgetItem(f"₹{t.get('testFees', 0):.2f}")
+                fees_item = QtWidgets.QTableWidgetItem(f"₹{t.testFees:.2f}")
                 fees_item.setFlags(flags)
                 
                 # Add button
                 add_btn = QtWidgets.QPushButton('Add')
                 add_btn.setMaximumWidth(70)
                 add_btn.setStyleSheet('font-size: 11px; padding: 4px;')
-                add_btn.clicked.connect(lambda checked, code=t.get('testCode'): self.add_test_to_selection(code))
+                add_btn.clicked.connect(lambda checked, code=t.testCode: self.add_test_to_selection(code))
                 
                 self.cat_table.setItem(row_count, 0, code_item)
                 self.cat_table.setItem(row_count, 1, name_item)
@@ -1297,17 +1567,20 @@ class MainWindow(QtWidgets.QMainWindow):
             # Query special tests
             self.search_special_tests()
             
-            self.cat_status.setText(f'Found {row_count} standard tests')
+            if similar:
+                self.cat_status.setText(f'Found {row_count - similar} standard tests (+{similar} similar)')
+            else:
+                self.cat_status.setText(f'Found {row_count} standard tests')
         except Exception as e:
             self.cat_status.setText(f'Search error: {str(e)}')
     
     def search_special_tests(self):
-        """Query special tests from database on-demand"""
+        """List special tests matching the search box from the in-memory index"""
         q = self.cat_search.text().lower().strip()
         
         try:
-            # Query special tests from SQLite (always show all if no query)
-            results = special_tests_db.search_special_tests(q) if q else special_tests_db.get_all_special_tests()
+            # Word-prefix lookup; all tests when there is no query
+            results = special_tests_db.get_index().search(q)
             
             # Display results with batch rendering
             self.special_table.setUpdatesEnabled(False)
@@ -1349,7 +1622,7 @@ class MainWindow(QtWidgets.QMainWindow):
     
     def add_special_test_to_selection(self, test_id: int):
         """Add a special test to the selected tests"""
-        test_data = special_tests_db.get_special_test(test_id)
+        test_data = special_tests_db.get_index().get(test_id)
         if not test_data:
             return
         
@@ -1368,18 +1641,18 @@ class MainWindow(QtWidgets.QMainWindow):
     
     def add_test_to_selection(self, test_code: str):
         """Add a standard test from catalogue to the selected tests"""
-        # Query the test from database to get full details
-        test_data = catalogue_db.get_test(test_code)
+        # Only code, name and fees are needed; skip parsing the raw record
+        test_row = catalogue_db.get_test_row(test_code)
         
-        if not test_data:
+        if not test_row:
             return
         
         if test_code not in self.inv_selected_tests:
             self.inv_selected_tests[test_code] = {
                 'testCode': test_code,
-                'testName': test_data.get('testName', ''),
-                'testFees': test_data.get('testFees', 0),
-                'testDescription': test_data.get('testDescription', ''),
+                'testName': test_row.testName or '',
+                'testFees': test_row.testFees,
+                'testDescription': '',
                 'isSpecial': False
             }
             self.update_selected_tests_display()
@@ -1462,17 +1735,41 @@ class MainWindow(QtWidgets.QMainWindow):
             self.filter_inv_catalogue()  # Update highlighting
             self.inv_recalc()
     
+    def _attach_patient_completer(self, line_edit, on_chosen):
+        """Drop-down of patients matching a partly typed ID or phone; choosing one runs `on_chosen`"""
+        completer = QtWidgets.QCompleter(QtGui.QStandardItemModel(line_edit), line_edit)
+        # The list is already filtered by suggest_patients; the chosen row fills in its patient ID
+        completer.setCompletionMode(QtWidgets.QCompleter.UnfilteredPopupCompletion)
+        completer.setCompletionRole(QtCore.Qt.UserRole)
+        line_edit.setCompleter(completer)
+        line_edit.textEdited.connect(lambda text: self._show_patient_suggestions(completer, text, minimum=1))
+        completer.activated.connect(lambda patient_id: (line_edit.setText(patient_id), on_chosen()))
+        return completer
+    
+    def _show_patient_suggestions(self, completer, text, minimum):
+        """Fills the completer for `text` and pops it up if at least `minimum` patients match"""
+        model = completer.model()
+        model.clear()
+        if len(text.strip()) < 2:
+            return False
+        for p in patient_cms_db.suggest_patients(text):
+            item = QtGui.QStandardItem(f"{p['patientId']}  ·  {p['name']}  ·  {p['phone']}")
+            item.setData(p['patientId'], QtCore.Qt.UserRole)
+            model.appendRow(item)
+        if model.rowCount() < minimum:
+            return False
+        completer.complete()
+        return True
+    
     def inv_lookup_patient(self):
         q = self.inv_patient_id.text()
         if not q: return
-        p = patient_cms_db.get_patient(q)
-        if not p:
-            p = patient_cms_db.get_patient_by_phone(q)
+        p = patient_cms_db.lookup_patient(q)
         if p:
             self.inv_current_patient = p
             self.inv_patient_info.setText(f"Name: {p['name']}\nID: {p['patientId']}\nPhone: {p['phone']}\nAge/Sex: {p.get('age', 'N/A')}/{p.get('sex', 'N/A')}")
             self.inv_gen_btn.setEnabled(len(self.inv_selected_tests) > 0)
-        else:
+        elif not self._show_patient_suggestions(self.inv_patient_completer, q, minimum=2):
             QtWidgets.QMessageBox.warning(self, 'Error', 'Patient not found')
     
     def inv_home_toggled(self):
@@ -1521,7 +1818,8 @@ class MainWindow(QtWidgets.QMainWindow):
                 'final_total': rounded
             }
             
-            res = invoice_service.create_and_save_invoice(data, self.user.get('id'), CLINIC_ADDRESS, CLINIC_CONTACT, INVOICE_STORAGE_DIR)
+            config = get_config()
+            res = invoice_service.create_and_save_invoice(data, self.user.get('id'), config['CLINIC_ADDRESS'], config['CLINIC_CONTACT'], get_invoice_storage_dir())
             QtWidgets.QMessageBox.information(self, 'Success', f'Invoice {res["invoice_number"]} created')
             webbrowser.open(f"file://{res['filepath']}")
             
@@ -1688,37 +1986,36 @@ class MainWindow(QtWidgets.QMainWindow):
         def cms_filter_patients():
             q = cms_search.text().lower()
             cms_table.setRowCount(0)
-            all_patients = patient_cms_db.get_all_patients()
+            all_patients = patient_cms_db.search_patients(q)
             for p in all_patients:
-                if q in (p.get('name', '') + p.get('patientId', '') + p.get('phone', '')).lower():
-                    r = cms_table.rowCount()
-                    cms_table.insertRow(r)
-                    cms_table.setItem(r, 0, QtWidgets.QTableWidgetItem(p.get('patientId', '')))
-                    cms_table.setItem(r, 1, QtWidgets.QTableWidgetItem(p.get('name', '')))
-                    cms_table.setItem(r, 2, QtWidgets.QTableWidgetItem(p.get('phone', '')))
-                    cms_table.setItem(r, 3, QtWidgets.QTableWidgetItem(str(p.get('age', ''))))
-                    cms_table.setItem(r, 4, QtWidgets.QTableWidgetItem(p.get('email', '')))
-                    cms_table.setItem(r, 5, QtWidgets.QTableWidgetItem(p.get('address', '')))
-                    
-                    # Action column
-                    action_widget = QtWidgets.QWidget()
-                    action_layout = QtWidgets.QHBoxLayout(action_widget)
-                    action_layout.setContentsMargins(2, 2, 2, 2)
-                    
-                    # Edit button (Admin only)
-                    if self.user.get('role') == 'admin':
-                        edit_btn = QtWidgets.QPushButton('Edit')
-                        edit_btn.setStyleSheet('background-color: #0078D4; color: white; padding: 4px;')
-                        edit_btn.clicked.connect(lambda _, pat=p: cms_edit_patient(pat))
-                        action_layout.addWidget(edit_btn)
-                        
-                        del_btn = QtWidgets.QPushButton('Delete')
-                        del_btn.setStyleSheet('background-color: #D32F2F; color: white; padding: 4px; margin-left: 2px;')
-                        del_btn.clicked.connect(lambda _, pid=p.get('patientId'): cms_delete_patient(pid))
-                        action_layout.addWidget(del_btn)
+                r = cms_table.rowCount()
+                cms_table.insertRow(r)
+                cms_table.setItem(r, 0, QtWidgets.QTableWidgetItem(p.get('patientId', '')))
+                cms_table.setItem(r, 1, QtWidgets.QTableWidgetItem(p.get('name', '')))
+                cms_table.setItem(r, 2, QtWidgets.QTableWidgetItem(p.get('phone', '')))
+                cms_table.setItem(r, 3, QtWidgets.QTableWidgetItem(str(p.get('age', ''))))
+                cms_table.setItem(r, 4, QtWidgets.QTableWidgetItem(p.get('email', '')))
+                cms_table.setItem(r, 5, QtWidgets.QTableWidgetItem(p.get('address', '')))
+                
+                # Action column
+                action_widget = QtWidgets.QWidget()
+                action_layout = QtWidgets.QHBoxLayout(action_widget)
+                action_layout.setContentsMargins(2, 2, 2, 2)
+                
+                # Edit button (Admin only)
+                if self.user.get('role') == 'admin':
+                    edit_btn = QtWidgets.QPushButton('Edit')
+                    edit_btn.setStyleSheet('background-color: #0078D4; color: white; padding: 4px;')
+                    edit_btn.clicked.connect(lambda _, pat=p: cms_edit_patient(pat))
+                    action_layout.addWidget(edit_btn)
                     
-                    action_layout.addStretch()
-                    cms_table.setCellWidget(r, 6, action_widget)
+                    del_btn = QtWidgets.QPushButton('Delete')
+                    del_btn.setStyleSheet('background-color: #D32F2F; color: white; padding: 4px; margin-left: 2px;')
+                    del_btn.clicked.connect(lambda _, pid=p.get('patientId'): cms_delete_patient(pid))
+                    action_layout.addWidget(del_btn)
+                
+                action_layout.addStretch()
+                cms_table.setCellWidget(r, 6, action_widget)
         
         # Connect signals
         cms_register_btn.clicked.connect(cms_register)
@@ -1749,7 +2046,12 @@ class MainWindow(QtWidgets.QMainWindow):
         self.reload_datasheet()
     
     def reload_datasheet(self):
-        records = datasheet_db.get_all_invoice_records(full=True)
+        if not self._tab_built(self.datasheet_tab):
+            self._invalidate_prefetched('invoice_records')
+            return
+        records = self._take_prefetched('invoice_records')
+        if records is None:
+            records = datasheet_db.get_all_invoice_records(full=True)
         is_admin = self.user.get('role') == 'admin'
         
         if not records:
@@ -1791,7 +2093,7 @@ class MainWindow(QtWidgets.QMainWindow):
             QtWidgets.QMessageBox.information(self, 'Deleted', f'Invoice {invoice_id} removed from datasheet.')
     
     def export_csv(self):
-        records = datasheet_db.get_all_invoice_records(full=True)
+        records = datasheet_db.get_all_invoice_records(full=True, include_archived=True)
         if not records: return
         default_filename = DEFAULT_CSV_FILENAME.replace('{date}', datetime.date.today().strftime('%Y%m%d'))
         fname, _ = QtWidgets.QFileDialog.getSaveFileName(self, 'Save CSV', default_filename, 'CSV (*.csv)')
@@ -1804,7 +2106,7 @@ class MainWindow(QtWidgets.QMainWindow):
         QtWidgets.QMessageBox.information(self, 'Success', f'Saved {fname}')
     
     def export_xlsx(self):
-        records = datasheet_db.get_all_invoice_records(full=True)
+        records = datasheet_db.get_all_invoice_records(full=True, include_archived=True)
         if not records: return
         default_filename = DEFAULT_XLSX_FILENAME.replace('{date}', datetime.date.today().strftime('%Y%m%d'))
         fname, _ = QtWidgets.QFileDialog.getSaveFileName(self, 'Save XLSX', default_filename, 'Excel (*.xlsx)')
@@ -1824,72 +2126,182 @@ class MainWindow(QtWidgets.QMainWindow):
     
     # ===== REPORT TRACKER TAB =====
     def init_reports_tab(self):
-        # Clear old layout if it exists
-        if self.reports_tab.layout():
-            while self.reports_tab.layout().count():
-                widget = self.reports_tab.layout().takeAt(0).widget()
-                if widget:
-                    widget.deleteLater()
-        
         layout = QtWidgets.QVBoxLayout(self.reports_tab)
         h = QtWidgets.QHBoxLayout()
         h.addWidget(QtWidgets.QLabel('Search:'))
-        search = QtWidgets.QLineEdit()
-        search.setPlaceholderText('Search...')
-        h.addWidget(search)
+        self.reports_search = QtWidgets.QLineEdit()
+        self.reports_search.setPlaceholderText('Invoice ID, patient, patient ID or VID...')
+        h.addWidget(self.reports_search)
+        
+        self.reports_status_filter = QtWidgets.QComboBox()
+        h.addWidget(self.reports_status_filter)
+        self.reports_date_filter = QtWidgets.QComboBox()
+        for label, days in (('Any time', None), ('Today', 0), ('Last 7 days', 7), ('Last 30 days', 30)):
+            self.reports_date_filter.addItem(label, days)
+        h.addWidget(self.reports_date_filter)
         layout.addLayout(h)
         
-        self.reports_table = QtWidgets.QTableWidget()
-        self.reports_table.setColumnCount(7)
-        self.reports_table.setHorizontalHeaderLabels(REPORT_TABLE_HEADERS)
+        self.reports_model = ReportsTableModel(REPORT_TABLE_HEADERS, parent=self)
+        self.reports_table = QtWidgets.QTableView()
+        self.reports_table.setModel(self.reports_model)
+        self.reports_table.setSelectionBehavior(QtWidgets.QAbstractItemView.SelectRows)
+        self.reports_table.setSelectionMode(QtWidgets.QAbstractItemView.ExtendedSelection)
+        self.reports_table.setEditTriggers(QtWidgets.QAbstractItemView.NoEditTriggers)
+        self.reports_table.horizontalHeader().setStretchLastSection(True)
+        self.reports_table.doubleClicked.connect(lambda index: self.open_report_pdf(self.reports_model.report_at(index.row())))
         layout.addWidget(self.reports_table)
         
-        def filter_reports():
-            q = search.text().lower()
-            self.reports_table.setRowCount(0)
-            for rpt in report_tracker_db.get_all_reports():
-                if q in (rpt.get('invoiceId', '') + rpt.get('patientName', '') + rpt.get('patientId', '') + (rpt.get('vid') or '')).lower():
-                    r = self.reports_table.rowCount()
-                    self.reports_table.insertRow(r)
-                    self.reports_table.setItem(r, 0, QtWidgets.QTableWidgetItem(rpt.get('invoiceId', '')))
-                    self.reports_table.setItem(r, 1, QtWidgets.QTableWidgetItem(rpt.get('patientName', '')))
-                    self.reports_table.setItem(r, 2, QtWidgets.QTableWidgetItem(rpt.get('patientId', '')))
-                    self.reports_table.setItem(r, 3, QtWidgets.QTableWidgetItem(rpt.get('status', '')))
-                    self.reports_table.setItem(r, 4, QtWidgets.QTableWidgetItem(rpt.get('vid') or ''))
-                    self.reports_table.setItem(r, 5, QtWidgets.QTableWidgetItem(rpt.get('created_at', '')))
-                    
-                    # Create button widget with both Open and Mark Delivered
-                    btn_widget = QtWidgets.QWidget()
-                    btn_layout = QtWidgets.QHBoxLayout(btn_widget)
-                    btn_layout.setContentsMargins(2, 2, 2, 2)
-                    
-                    open_btn = QtWidgets.QPushButton('Open')
-                    open_btn.setMaximumWidth(70)
-                    open_btn.clicked.connect(lambda _, fn=rpt.get('pdf_filename'): webbrowser.open(f"file://{os.path.abspath(os.path.join(INVOICE_STORAGE_DIR, fn))}"))
-                    btn_layout.addWidget(open_btn)
-                    
-                    # Mark Delivered button - only if status is not already "DELIVERED"
-                    status = rpt.get('status', '').upper()
-                    if status != 'DELIVERED':
-                        mark_btn = QtWidgets.QPushButton('Mark Delivered')
-                        mark_btn.setMaximumWidth(100)
-                        mark_btn.setStyleSheet('background-color: #4CAF50; color: white;')
-                        mark_btn.clicked.connect(lambda _, inv_id=rpt.get('invoiceId'): self.mark_report_delivered(inv_id))
-                        btn_layout.addWidget(mark_btn)
-                    
-                    # Delete button (Admin only)
-                    if self.user.get('role') == 'admin':
-                        del_btn = QtWidgets.QPushButton('Delete')
-                        del_btn.setMaximumWidth(60)
-                        del_btn.setStyleSheet('background-color: #D32F2F; color: white; margin-left: 5px;')
-                        del_btn.clicked.connect(lambda _, inv_id=rpt.get('invoiceId'): self.delete_report_ui(inv_id))
-                        btn_layout.addWidget(del_btn)
-                    
-                    btn_layout.addStretch()
-                    self.reports_table.setCellWidget(r, 6, btn_widget)
+        # Actions apply to the selected rows
+        actions = QtWidgets.QHBoxLayout()
+        open_btn = QtWidgets.QPushButton('Open')
+        open_btn.clicked.connect(lambda: [self.open_report_pdf(r) for r in self._selected_reports()[:1]])
+        actions.addWidget(open_btn)
+        mark_btn = QtWidgets.QPushButton('Mark Delivered')
+        mark_btn.setStyleSheet('background-color: #4CAF50; color: white;')
+        mark_btn.clicked.connect(self._mark_selected_reports_delivered)
+        actions.addWidget(mark_btn)
+        if self.user.get('role') == 'admin':
+            del_btn = QtWidgets.QPushButton('Delete')
+            del_btn.setStyleSheet('background-color: #D32F2F; color: white;')
+            del_btn.clicked.connect(lambda: [self.delete_report_ui(r['invoiceId']) for r in self._selected_reports()[:1]])
+            actions.addWidget(del_btn)
+        actions.addStretch()
+        layout.addLayout(actions)
+        
+        # Rapid delivery with a barcode scanner: set the VID once, then scan invoice IDs
+        scan_group = QtWidgets.QGroupBox('Rapid Delivery (Scanner)')
+        scan_layout = QtWidgets.QHBoxLayout(scan_group)
+        scan_layout.addWidget(QtWidgets.QLabel('VID:'))
+        self.reports_scan_vid = self._make_vid_input()
+        self.reports_scan_vid.setMaximumWidth(160)
+        scan_layout.addWidget(self.reports_scan_vid)
+        scan_layout.addWidget(QtWidgets.QLabel('Invoice:'))
+        self.reports_scan_input = QtWidgets.QLineEdit()
+        self.reports_scan_input.setPlaceholderText('Scan or type an invoice ID, then Enter')
+        self.reports_scan_input.returnPressed.connect(self._on_report_scanned)
+        scan_layout.addWidget(self.reports_scan_input)
+        self.reports_scan_result = QtWidgets.QLabel('')
+        scan_layout.addWidget(self.reports_scan_result, 1)
+        layout.addWidget(scan_group)
+        self._pending_scans = {}
+        self._scan_count = 0
+        self.reports_scan_flush_timer = QtCore.QTimer(self)
+        self.reports_scan_flush_timer.setSingleShot(True)
+        self.reports_scan_flush_timer.setInterval(SCAN_FLUSH_INTERVAL_MS)
+        self.reports_scan_flush_timer.timeout.connect(self._flush_scanned_deliveries)
+        
+        # Filter in SQL, once typing pauses rather than on every keystroke
+        self.reports_search_timer = QtCore.QTimer(self)
+        self.reports_search_timer.setSingleShot(True)
+        self.reports_search_timer.setInterval(250)
+        self.reports_search_timer.timeout.connect(self._apply_report_filters)
+        self.reports_search.textChanged.connect(self.reports_search_timer.start)
+        self.reports_status_filter.currentIndexChanged.connect(self._apply_report_filters)
+        self.reports_date_filter.currentIndexChanged.connect(self._apply_report_filters)
+        
+        self._update_report_counts()
+        self.reports_model.set_filters(first_page=self._take_prefetched('reports'))
+    
+    def _apply_report_filters(self):
+        days = self.reports_date_filter.currentData()
+        date_range = None
+        if days is not None:
+            date_range = ((datetime.date.today() - datetime.timedelta(days=days)).isoformat(), None)
+        self.reports_model.set_filters(
+            query=self.reports_search.text(),
+            status=self.reports_status_filter.currentData(),
+            date_range=date_range
+        )
+    
+    def _update_report_counts(self):
+        """Show per-status totals in the status filter"""
+        counts = report_tracker_db.status_counts()
+        current = self.reports_status_filter.currentData()
+        self.reports_status_filter.blockSignals(True)
+        self.reports_status_filter.clear()
+        self.reports_status_filter.addItem(f'All ({sum(counts.values())})', None)
+        for status in ('Undelivered', 'Delivered'):
+            self.reports_status_filter.addItem(f'{status} ({counts.get(status, 0)})', status)
+        self.reports_status_filter.setCurrentIndex(max(0, self.reports_status_filter.findData(current)))
+        self.reports_status_filter.blockSignals(False)
+    
+    def _selected_reports(self):
+        rows = sorted({index.row() for index in self.reports_table.selectionModel().selectedRows()})
+        return [self.reports_model.report_at(r) for r in rows]
+    
+    def _mark_selected_reports_delivered(self):
+        selected = self._selected_reports()
+        pending = [r['invoiceId'] for r in selected if r.get('status', '').upper() != 'DELIVERED']
+        if pending:
+            self.mark_reports_delivered(pending)
+        elif selected:
+            QtWidgets.QMessageBox.information(self, 'Already Delivered', 'The selected reports are already marked as delivered.')
+    
+    def _on_report_scanned(self):
+        """Rapid entry: a scanner types the invoice ID and Enter; mark it delivered at once"""
+        started = time.perf_counter()
+        invoice_id = self.reports_scan_input.text().strip()
+        self.reports_scan_input.clear()
+        if not invoice_id:
+            return
+        vid = self.reports_scan_vid.text().strip()
+        error = self._vid_error(vid)
+        if error:
+            self._show_scan_result(f'{error} Scans need a VID first.', ok=False)
+            self.reports_scan_vid.setFocus()
+            return
         
-        search.textChanged.connect(filter_reports)
-        filter_reports()
+        pending_ids = {i for ids in self._pending_scans.values() for i in ids}
+        rpt = None if invoice_id in pending_ids else report_tracker_db.get_report(invoice_id)
+        if invoice_id in pending_ids or (rpt and rpt.get('status', '').upper() == 'DELIVERED'):
+            self._show_scan_result(f'{invoice_id}: already delivered', ok=False)
+        elif rpt is None:
+            self._show_scan_result(f'{invoice_id}: no such report', ok=False)
+        else:
+            # Shown as delivered now; written with the next batch
+            self._pending_scans.setdefault(vid, []).append(invoice_id)
+            self.reports_model.update_reports([invoice_id], {'status': 'Delivered', 'vid': vid})
+            self._scan_count += 1
+            self._show_scan_result(f"{invoice_id}: delivered to {rpt.get('patientName', '')} ({self._scan_count} this session)", ok=True)
+            if not self.reports_scan_flush_timer.isActive():
+                self.reports_scan_flush_timer.start()
+        
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        if elapsed_ms > SCAN_LATENCY_TARGET_MS:
+            print(f"Report scan took {elapsed_ms:.0f} ms (target {SCAN_LATENCY_TARGET_MS} ms)")
+    
+    def _show_scan_result(self, text, ok):
+        self.reports_scan_result.setText(text)
+        self.reports_scan_result.setStyleSheet(f"font-weight: bold; color: {'#107C10' if ok else '#D13438'};")
+    
+    def _flush_scanned_deliveries(self):
+        """Write the scans collected since the last batch, one transaction per VID"""
+        pending, self._pending_scans = getattr(self, '_pending_scans', {}), {}
+        failed = []
+        for vid, invoice_ids in pending.items():
+            updated = set(report_tracker_db.mark_reports_delivered(invoice_ids, vid))
+            for invoice_id in invoice_ids:
+                if invoice_id not in updated and not self._is_report_delivered(invoice_id):
+                    failed.append(invoice_id)
+        if failed:
+            # These were shown as delivered but not written (e.g. the database was locked)
+            self.reports_model.update_reports(failed, {'status': 'Undelivered', 'vid': None})
+            self._scan_count -= len(failed)
+            self._show_scan_result(f"{len(failed)} scan(s) could not be saved, please scan again: {', '.join(failed)}", ok=False)
+        if pending and hasattr(self, 'reports_status_filter'):
+            self._update_report_counts()
+    
+    @staticmethod
+    def _is_report_delivered(invoice_id):
+        """Whether the stored report is delivered (e.g. by another user); False if it cannot be read"""
+        try:
+            rpt = report_tracker_db.get_report(invoice_id)
+        except Exception:
+            return False
+        return bool(rpt) and rpt.get('status', '').upper() == 'DELIVERED'
+    
+    def open_report_pdf(self, rpt):
+        webbrowser.open(f"file://{os.path.abspath(os.path.join(get_invoice_storage_dir(), rpt.get('pdf_filename')))}")
     
     def delete_report_ui(self, invoice_id: str):
         """Handle report deletion from UI"""
@@ -1908,7 +2320,7 @@ class MainWindow(QtWidgets.QMainWindow):
                 
                 # Delete file if exists
                 if pdf_filename:
-                    file_path = os.path.join(INVOICE_STORAGE_DIR, pdf_filename)
+                    file_path = os.path.join(get_invoice_storage_dir(), pdf_filename)
                     if os.path.exists(file_path):
                         try:
                             os.remove(file_path)
@@ -1917,77 +2329,64 @@ class MainWindow(QtWidgets.QMainWindow):
                             print(f"Error deleting file {file_path}: {e}")
                             QtWidgets.QMessageBox.warning(self, "Warning", f"Record deleted but failed to delete file: {e}")
                 
-                # Refresh table
-                self.refresh_reports_data()
+                # Update the loaded rows in place
+                self.reports_model.remove_report(invoice_id)
+                self._update_report_counts()
                 QtWidgets.QMessageBox.information(self, "Success", "Report deleted successfully")
                 
             except Exception as e:
                 QtWidgets.QMessageBox.critical(self, "Error", f"Failed to delete report: {e}")
 
     def refresh_reports_data(self):
-        """Refresh reports table without reinitializing the entire tab"""
-        if hasattr(self, 'reports_table'):
-            q = ''
-            self.reports_table.setRowCount(0)
-            for rpt in report_tracker_db.get_all_reports():
-                r = self.reports_table.rowCount()
-                self.reports_table.insertRow(r)
-                self.reports_table.setItem(r, 0, QtWidgets.QTableWidgetItem(rpt.get('invoiceId', '')))
-                self.reports_table.setItem(r, 1, QtWidgets.QTableWidgetItem(rpt.get('patientName', '')))
-                self.reports_table.setItem(r, 2, QtWidgets.QTableWidgetItem(rpt.get('patientId', '')))
-                self.reports_table.setItem(r, 3, QtWidgets.QTableWidgetItem(rpt.get('status', '')))
-                self.reports_table.setItem(r, 4, QtWidgets.QTableWidgetItem(rpt.get('vid') or ''))
-                self.reports_table.setItem(r, 5, QtWidgets.QTableWidgetItem(rpt.get('created_at', '')))
-                
-                # Create button widget with both Open and Mark Delivered
-                btn_widget = QtWidgets.QWidget()
-                btn_layout = QtWidgets.QHBoxLayout(btn_widget)
-                btn_layout.setContentsMargins(2, 2, 2, 2)
-                
-                open_btn = QtWidgets.QPushButton('Open')
-                open_btn.setMaximumWidth(70)
-                open_btn.clicked.connect(lambda _, fn=rpt.get('pdf_filename'): webbrowser.open(f"file://{os.path.abspath(os.path.join(INVOICE_STORAGE_DIR, fn))}"))
-                btn_layout.addWidget(open_btn)
-                
-                # Mark Delivered button - only if status is not already "DELIVERED"
-                status = rpt.get('status', '').upper()
-                if status != 'DELIVERED':
-                    mark_btn = QtWidgets.QPushButton('Mark Delivered')
-                    mark_btn.setMaximumWidth(100)
-                    mark_btn.setStyleSheet('background-color: #4CAF50; color: white;')
-                    mark_btn.clicked.connect(lambda _, inv_id=rpt.get('invoiceId'): self.mark_report_delivered(inv_id))
-                    btn_layout.addWidget(mark_btn)
-                
-                # Delete button (Admin only)
-                if self.user.get('role') == 'admin':
-                    del_btn = QtWidgets.QPushButton('Delete')
-                    del_btn.setMaximumWidth(60)
-                    del_btn.setStyleSheet('background-color: #D32F2F; color: white; margin-left: 5px;')
-                    del_btn.clicked.connect(lambda _, inv_id=rpt.get('invoiceId'): self.delete_report_ui(inv_id))
-                    btn_layout.addWidget(del_btn)
-                
-                btn_layout.addStretch()
-                self.reports_table.setCellWidget(r, 6, btn_widget)
+        """Reload the first page of reports with the current filters"""
+        if not self._tab_built(self.reports_tab):
+            self._invalidate_prefetched('reports')
+        elif hasattr(self, 'reports_model'):
+            self._update_report_counts()
+            self._apply_report_filters()
+    
+    @staticmethod
+    def _make_vid_input():
+        vid_input = QtWidgets.QLineEdit()
+        vid_input.setPlaceholderText('Enter 15-digit VID')
+        # Use regex validator to allow up to 15 digits
+        vid_regex = QtCore.QRegularExpression(r'[0-9]{0,15}')
+        vid_validator = QtGui.QRegularExpressionValidator(vid_regex)
+        vid_input.setValidator(vid_validator)
+        return vid_input
+    
+    @staticmethod
+    def _vid_error(vid):
+        """Validation message for a VID, or None if it is valid"""
+        if not vid:
+            return 'Please enter a VID.'
+        if len(vid) != 15:
+            return 'VID must be exactly 15 digits.'
+        if not vid.isdigit():
+            return 'VID must contain only digits.'
+        return None
     
     def mark_report_delivered(self, invoice_id: str):
         """Show dialog to mark a report as delivered with VID input"""
+        self.mark_reports_delivered([invoice_id])
+    
+    def mark_reports_delivered(self, invoice_ids):
+        """Show dialog to mark one or more reports as delivered with a single VID"""
         dialog = QtWidgets.QDialog(self)
-        dialog.setWindowTitle('Mark Report as Delivered')
+        dialog.setWindowTitle('Mark Report as Delivered' if len(invoice_ids) == 1 else 'Mark Reports as Delivered')
         dialog.setGeometry(100, 100, 400, 150)
         
         layout = QtWidgets.QVBoxLayout(dialog)
         
-        layout.addWidget(QtWidgets.QLabel(f'Invoice ID: {invoice_id}'))
+        if len(invoice_ids) == 1:
+            layout.addWidget(QtWidgets.QLabel(f'Invoice ID: {invoice_ids[0]}'))
+        else:
+            layout.addWidget(QtWidgets.QLabel(f'{len(invoice_ids)} reports selected'))
         
         # VID Input
         vid_layout = QtWidgets.QHBoxLayout()
         vid_layout.addWidget(QtWidgets.QLabel('VID (15 digits):'))
-        vid_input = QtWidgets.QLineEdit()
-        vid_input.setPlaceholderText('Enter 15-digit VID')
-        # Use regex validator to allow up to 15 digits
-        vid_regex = QtCore.QRegularExpression(r'[0-9]{0,15}')
-        vid_validator = QtGui.QRegularExpressionValidator(vid_regex)
-        vid_input.setValidator(vid_validator)
+        vid_input = self._make_vid_input()
         vid_layout.addWidget(vid_input)
         layout.addLayout(vid_layout)
         
@@ -2001,25 +2400,35 @@ class MainWindow(QtWidgets.QMainWindow):
         
         def do_mark_delivered():
             vid = vid_input.text().strip()
-            if not vid:
-                QtWidgets.QMessageBox.warning(dialog, 'Input Error', 'Please enter a VID.')
-                return
-            
-            if len(vid) != 15:
-                QtWidgets.QMessageBox.warning(dialog, 'Input Error', 'VID must be exactly 15 digits.')
-                return
-            
-            if not vid.isdigit():
-                QtWidgets.QMessageBox.warning(dialog, 'Input Error', 'VID must contain only digits.')
+            error = self._vid_error(vid)
+            if error:
+                QtWidgets.QMessageBox.warning(dialog, 'Input Error', error)
                 return
             
             try:
-                report_tracker_db.mark_report_delivered(invoice_id, vid)
-                QtWidgets.QMessageBox.information(dialog, 'Success', f'Report {invoice_id} marked as delivered.')
+                # One transaction for the whole selection
+                updated = report_tracker_db.mark_reports_delivered(invoice_ids, vid)
+                # Already delivered reports are skipped; any other ID missing was not written
+                failed = [i for i in invoice_ids if i not in updated and not self._is_report_delivered(i)]
+                if updated:
+                    # Update the loaded rows in place instead of reloading the table
+                    self.reports_model.update_reports(updated, {'status': 'Delivered', 'vid': vid})
+                    self._update_report_counts()
+                if failed:
+                    QtWidgets.QMessageBox.warning(
+                        dialog, 'Not Saved',
+                        f'{len(failed)} of {len(invoice_ids)} report(s) could not be marked as delivered, '
+                        f'please try again: {", ".join(failed)}'
+                    )
+                    if updated:
+                        dialog.accept()
+                    return
+                if len(invoice_ids) == 1:
+                    message = f'Report {invoice_ids[0]} marked as delivered.'
+                else:
+                    message = f'{len(updated)} of {len(invoice_ids)} reports marked as delivered.'
+                QtWidgets.QMessageBox.information(dialog, 'Success', message)
                 dialog.accept()
-                # Refresh the reports table and datasheet
-                self.refresh_reports_data()
-                self.reload_datasheet()
             except Exception as e:
                 QtWidgets.QMessageBox.critical(dialog, 'Error', f'Failed to mark report as delivered: {str(e)}')
         
@@ -2076,9 +2485,13 @@ class MainWindow(QtWidgets.QMainWindow):
         logs_w = QtWidgets.QWidget()
         logs_layout = QtWidgets.QVBoxLayout(logs_w)
         self.adm_logs_table = QtWidgets.QTableWidget()
-        self.adm_logs_table.setColumnCount(3)
-        self.adm_logs_table.setHorizontalHeaderLabels(['Timestamp', 'Event', 'User'])
+        self.adm_logs_table.setColumnCount(4)
+        self.adm_logs_table.setHorizontalHeaderLabels(['Timestamp', 'Event', 'User', 'Details'])
+        self.adm_logs_table.horizontalHeader().setStretchLastSection(True)
         logs_layout.addWidget(self.adm_logs_table)
+        self.adm_logs_more_btn = QtWidgets.QPushButton('Load More')
+        self.adm_logs_more_btn.clicked.connect(self.adm_load_more_logs)
+        logs_layout.addWidget(self.adm_logs_more_btn, 0, QtCore.Qt.AlignRight)
         tabs.addTab(logs_w, 'Logs')
         self.adm_reload_logs()
         
@@ -2088,7 +2501,9 @@ class MainWindow(QtWidgets.QMainWindow):
         maint_group = QtWidgets.QGroupBox("Database Backup")
         mg_layout = QtWidgets.QVBoxLayout(maint_group)
         
-        backup_info = QtWidgets.QLabel("Creates a ZIP backup of all system databases. Use this before updating or migrating.")
+        backup_info = QtWidgets.QLabel(
+            "Creates a ZIP backup of all system databases. Use this before updating or migrating.\n"
+            "Incremental backups are also taken automatically every hour; export one as a ZIP to restore it.")
         backup_info.setWordWrap(True)
         mg_layout.addWidget(backup_info)
         
@@ -2097,6 +2512,11 @@ class MainWindow(QtWidgets.QMainWindow):
         self.backup_btn.clicked.connect(self.adm_backup_databases)
         mg_layout.addWidget(self.backup_btn)
         
+        self.export_snapshot_btn = QtWidgets.QPushButton("Export Automatic Backup...")
+        MainWindow.style_button_with_dynamic_spacing(self.export_snapshot_btn, font_size=12, padding="10px 20px")
+        self.export_snapshot_btn.clicked.connect(self.adm_export_snapshot)
+        mg_layout.addWidget(self.export_snapshot_btn)
+        
         # Restore Section
         mg_layout.addSpacing(20)
         restore_label = QtWidgets.QLabel("Restore System")
@@ -2123,6 +2543,37 @@ class MainWindow(QtWidgets.QMainWindow):
         mg_layout.addWidget(self.restore_btn)
         
         maint_layout.addWidget(maint_group)
+        
+        # Test aliases: extra names the fuzzy catalogue search matches
+        alias_group = QtWidgets.QGroupBox("Test Aliases")
+        alias_layout = QtWidgets.QFormLayout(alias_group)
+        alias_info = QtWidgets.QLabel("Other names staff use for a test (comma separated). Catalogue searches also find the test by these names.")
+        alias_info.setWordWrap(True)
+        alias_layout.addRow(alias_info)
+        self.adm_alias_code = QtWidgets.QLineEdit()
+        self.adm_alias_code.setPlaceholderText('Test code')
+        self.adm_alias_code.editingFinished.connect(self.adm_load_aliases)
+        alias_layout.addRow('Test Code:', self.adm_alias_code)
+        self.adm_alias_test_name = QtWidgets.QLabel('')
+        alias_layout.addRow('Test:', self.adm_alias_test_name)
+        self.adm_alias_list = QtWidgets.QLineEdit()
+        self.adm_alias_list.setPlaceholderText('e.g. CBC, Hemogram')
+        alias_layout.addRow('Aliases:', self.adm_alias_list)
+        alias_save_btn = QtWidgets.QPushButton("Save Aliases")
+        alias_save_btn.clicked.connect(self.adm_save_aliases)
+        alias_layout.addRow(alias_save_btn)
+        maint_layout.addWidget(alias_group)
+        
+        cache_group = QtWidgets.QGroupBox("Lookup Caches")
+        cache_layout = QtWidgets.QVBoxLayout(cache_group)
+        self.adm_cache_stats = QtWidgets.QLabel('')
+        self.adm_cache_stats.setStyleSheet('font-family: monospace;')
+        cache_layout.addWidget(self.adm_cache_stats)
+        cache_refresh_btn = QtWidgets.QPushButton("Refresh")
+        cache_refresh_btn.clicked.connect(self.adm_show_cache_stats)
+        cache_layout.addWidget(cache_refresh_btn)
+        maint_layout.addWidget(cache_group)
+        self.adm_show_cache_stats()
         maint_layout.addStretch()
         
         tabs.addTab(maint_w, 'Maintenance')
@@ -2131,13 +2582,39 @@ class MainWindow(QtWidgets.QMainWindow):
         """Restore system from backup via Admin Panel"""
         zip_path, _ = QtWidgets.QFileDialog.getOpenFileName(self, "Select Backup Archive", "", "ZIP Files (*.zip)")
         if zip_path:
+            busy = [t for t in (getattr(self, 'backup_thread', None), self.auto_backup_thread, self.archive_thread) if t is not None and t.isRunning()]
+            if busy:
+                QtWidgets.QMessageBox.warning(self, "Backup Running", "Please wait for the running backup to finish before restoring.")
+                return
             from app.restore_utils import restore_system_from_backup
             success = restore_system_from_backup(zip_path, self)
             if success:
-                # Logic to restart or close?
-                # The helper shows a message saying app will close.
-                QtWidgets.QApplication.quit()
-                sys.exit(0)
+                # Users and all cached data come from the restored databases; log in again
+                self.do_logout()
+    
+    def adm_load_aliases(self):
+        code = self.adm_alias_code.text().strip()
+        test_row = catalogue_db.get_test_row(code) if code else None
+        self.adm_alias_test_name.setText(test_row.testName if test_row else ('Unknown test code' if code else ''))
+        self.adm_alias_list.setText(', '.join(catalogue_db.get_test_aliases(code)) if test_row else '')
+    
+    def adm_save_aliases(self):
+        code = self.adm_alias_code.text().strip()
+        if not catalogue_db.get_test_row(code):
+            QtWidgets.QMessageBox.warning(self, 'Error', 'Enter a valid test code first.')
+            return
+        try:
+            catalogue_db.set_test_aliases(code, self.adm_alias_list.text().split(','))
+            QtWidgets.QMessageBox.information(self, 'Success', f'Aliases saved for {code}')
+        except Exception as e:
+            QtWidgets.QMessageBox.warning(self, 'Error', str(e))
+    
+    def adm_show_cache_stats(self):
+        lines = []
+        for c in cache.all_stats():
+            rate = f"{c['hit_rate']:.0%}" if c['hit_rate'] is not None else '-'
+            lines.append(f"{c['name']}: {c['size']}/{c['maxsize']} cached, {c['hits']} hits, {c['misses']} misses, hit rate {rate}")
+        self.adm_cache_stats.setText('\n'.join(lines) or 'No caches in use')
     
     def adm_create_user(self):
         try:
@@ -2149,93 +2626,64 @@ class MainWindow(QtWidgets.QMainWindow):
             QtWidgets.QMessageBox.warning(self, 'Error', str(e))
     
     def adm_backup_databases(self):
-        """Create a zip backup of all databases"""
+        """Create a zip backup of all databases in the background"""
+        self.backup_btn.setEnabled(False)
+        self.statusBar().showMessage("Starting backup...")
+        self.backup_thread = BackupThread(parent=self)
+        self.backup_thread.progress.connect(self._on_backup_progress)
+        self.backup_thread.backup_finished.connect(self._on_backup_finished)
+        self.backup_thread.error_occurred.connect(self._on_backup_error)
+        self.backup_thread.start()
+    
+    def adm_export_snapshot(self):
+        """Export one of the automatic incremental backups as a regular backup ZIP"""
+        snapshots = backup_store.list_snapshots()
+        if not snapshots:
+            QtWidgets.QMessageBox.information(self, "No Backups", "No automatic backups have been taken yet.")
+            return
+        labels = [f"{s['created_at'].replace('T', ' ')}  ({len(s['files'])} files)" for s in snapshots]
+        choice, ok = QtWidgets.QInputDialog.getItem(self, "Export Automatic Backup", "Backup:", labels, 0, False)
+        if not ok:
+            return
+        snapshot = snapshots[labels.index(choice)]
+        default_name = os.path.join(backup_service.get_backup_dir(), f"auto_backup_{snapshot['id'][:15]}.zip")
+        zip_path, _ = QtWidgets.QFileDialog.getSaveFileName(self, "Save Backup As", default_name, "ZIP Files (*.zip)")
+        if not zip_path:
+            return
+        self.backup_btn.setEnabled(False)
+        self.statusBar().showMessage("Exporting backup...")
+        self.backup_thread = BackupThread(zip_path, snapshot_id=snapshot['id'], parent=self)
+        self.backup_thread.backup_finished.connect(self._on_backup_finished)
+        self.backup_thread.error_occurred.connect(self._on_backup_error)
+        self.backup_thread.start()
+    
+    def _on_backup_progress(self, done, total, name):
+        if name:
+            self.statusBar().showMessage(f"Backing up {name}... ({done + 1}/{total})")
+    
+    def _on_backup_finished(self, manifest):
+        self.backup_btn.setEnabled(True)
+        zip_path = manifest['path']
+        self.statusBar().showMessage(f"Backup saved to {zip_path}", 10000)
+        msg = f"Backup created successfully!\n\nFiles backed up: {len(manifest['files'])}\nLocation: {zip_path}"
+        
+        # Open folder in explorer
+        if os.name == 'nt':
+            os.startfile(os.path.dirname(zip_path))
+        
+        QtWidgets.QMessageBox.information(self, "Backup Success", msg)
+        
+        # Log action if auth_db is available
         try:
-            from app.utils import get_database_dir
-            import shutil
-            from datetime import datetime
-            
-            db_dir = get_database_dir()
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            backup_name = f"manual_backup_{timestamp}"
-            backup_path = os.path.join(db_dir, "backups", backup_name)
-            
-            # Create backup directory
-            os.makedirs(backup_path, exist_ok=True)
-            
-            # Copy all .db files
-            count = 0
-            for file in os.listdir(db_dir):
-                if file.endswith(".db"):
-                    shutil.copy2(os.path.join(db_dir, file), os.path.join(backup_path, file))
-                    count += 1
-            
-            # --- Backup Config & Logos ---
-            project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__))) # app -> root
-            if getattr(sys, 'frozen', False):
-                 project_root = os.path.dirname(sys.executable)
-                 
-            conf_path = get_config_path()
-            if os.path.exists(conf_path):
-                shutil.copy2(conf_path, os.path.join(backup_path, "config.yaml"))
-                count += 1
-                
-                # Check for custom logos in config
-                try:
-                    with open(conf_path, 'r', encoding='utf-8') as f:
-                        config = yaml.safe_load(f) or {}
-                        
-                    logos_to_backup = []
-                    if 'BRANDING_LOGO' in config and config['BRANDING_LOGO']:
-                        logos_to_backup.append(config['BRANDING_LOGO'])
-                    if 'REPORT_LOGO' in config and config['REPORT_LOGO']:
-                        logos_to_backup.append(config['REPORT_LOGO'])
-                        
-                    if logos_to_backup:
-                        logo_backup_dir = os.path.join(backup_path, "logos")
-                        os.makedirs(logo_backup_dir, exist_ok=True)
-                        
-                        for logo_file in logos_to_backup:
-                            # Try to resolve path (could be absolute or relative to assets)
-                            src_path = None
-                            if os.path.isabs(logo_file):
-                                if os.path.exists(logo_file):
-                                    src_path = logo_file
-                            else:
-                                # Try assets dir
-                                candidate = get_asset_path(logo_file)
-                                if os.path.exists(candidate):
-                                    src_path = candidate
-                                    
-                            if src_path:
-                                shutil.copy2(src_path, os.path.join(logo_backup_dir, os.path.basename(logo_file)))
-                                count += 1
-                except Exception as ex:
-                    print(f"Warning backing up logos: {ex}")
-            
-            # Create ZIP archive
-            zip_path = shutil.make_archive(backup_path, 'zip', backup_path)
-            
-            # Clean up raw folder to save space, keeping only the zip
-            shutil.rmtree(backup_path)
-            
-            msg = f"Backup created successfully!\n\nFiles backed up: {count}\nLocation: {zip_path}"
-            
-            # Open folder in explorer
-            if os.name == 'nt':
-                os.startfile(os.path.dirname(zip_path))
-            
-            QtWidgets.QMessageBox.information(self, "Backup Success", msg)
-            
-            # Log action if auth_db is available
-            try:
-                auth_db.log_event(self.user['username'], "backup_created", f"Created backup: {os.path.basename(zip_path)}")
-                self.adm_reload_logs()
-            except:
-                pass
-                
-        except Exception as e:
-            QtWidgets.QMessageBox.critical(self, "Backup Failed", f"An error occurred during backup:\n{str(e)}")
+            auth_db.log_event(self.user['id'], "backup_created", {'file': os.path.basename(zip_path)})
+            self.adm_reload_logs()
+        except:
+            pass
+    
+    def _on_backup_error(self, message):
+        self.backup_btn.setEnabled(True)
+        self.statusBar().clearMessage()
+        QtWidgets.QMessageBox.critical(self, "Backup Failed", f"An error occurred during backup:\n{message}")
 
     def adm_reload_users(self):
         users = auth_db.get_all_users()
@@ -2246,12 +2694,24 @@ class MainWindow(QtWidgets.QMainWindow):
             self.adm_users_table.setItem(r, 2, QtWidgets.QTableWidgetItem(u.get('full_name', '')))
     
     def adm_reload_logs(self):
-        logs = auth_db.get_login_logs()
-        self.adm_logs_table.setRowCount(len(logs))
-        for r, log in enumerate(logs):
+        self.adm_logs_table.setRowCount(0)
+        self._adm_logs_cursor = None
+        self.adm_load_more_logs()
+    
+    def adm_load_more_logs(self):
+        """Append the next page of audit events (keyset-paginated, newest first)"""
+        logs = audit_log.get_events(audit_log.LOG_PAGE_SIZE, before=self._adm_logs_cursor)
+        start = self.adm_logs_table.rowCount()
+        self.adm_logs_table.setRowCount(start + len(logs))
+        for r, log in enumerate(logs, start):
+            details = log.get('details') or {}
             self.adm_logs_table.setItem(r, 0, QtWidgets.QTableWidgetItem(log.get('timestamp', '')))
             self.adm_logs_table.setItem(r, 1, QtWidgets.QTableWidgetItem(log.get('event', '')))
-            self.adm_logs_table.setItem(r, 2, QtWidgets.QTableWidgetItem(str(log.get('user_id', ''))))
+            self.adm_logs_table.setItem(r, 2, QtWidgets.QTableWidgetItem(log.get('username') or str(log.get('user_id', ''))))
+            self.adm_logs_table.setItem(r, 3, QtWidgets.QTableWidgetItem(', '.join(f"{k}: {v}" for k, v in details.items())))
+        if logs:
+            self._adm_logs_cursor = logs[-1]['cursor']
+        self.adm_logs_more_btn.setEnabled(len(logs) == audit_log.LOG_PAGE_SIZE)
     
     # ===== POLYCLINIC TAB INITIALIZATION =====
     
@@ -2265,8 +2725,10 @@ class MainWindow(QtWidgets.QMainWindow):
         patient_group = QtWidgets.QGroupBox("Patient Details")
         patient_layout = QtWidgets.QHBoxLayout(patient_group)
         
-        patient_layout.addWidget(QtWidgets.QLabel("Patient Phone:"))
+        patient_layout.addWidget(QtWidgets.QLabel("Patient Phone / ID:"))
         self.poly_patient_phone = QtWidgets.QLineEdit()
+        self.poly_patient_phone.setPlaceholderText("Phone or patient ID...")
+        self.poly_patient_completer = self._attach_patient_completer(self.poly_patient_phone, self.poly_lookup_patient)
         patient_layout.addWidget(self.poly_patient_phone)
         
         search_btn = QtWidgets.QPushButton("Search")
@@ -2274,9 +2736,6 @@ class MainWindow(QtWidgets.QMainWindow):
         search_btn.clicked.connect(self.poly_lookup_patient)
         patient_layout.addWidget(search_btn)
         
-        search_btn.clicked.connect(self.poly_lookup_patient)
-        patient_layout.addWidget(search_btn)
-        
         layout.addWidget(patient_group)
         
         # Patient info display
@@ -2350,6 +2809,9 @@ class MainWindow(QtWidgets.QMainWindow):
         self.poly_booking_date = QtWidgets.QCalendarWidget()
         self.poly_booking_date.setMinimumDate(QtCore.QDate.currentDate())
         self.poly_booking_date.clicked.connect(self.poly_update_time_slots)
+        self.poly_booking_date.currentPageChanged.connect(lambda _year, _month: self.poly_update_calendar_availability())
+        self.poly_calendar_slots = {}
+        self._poly_calendar_formats = self._poly_make_calendar_formats()
         datetime_layout.addWidget(self.poly_booking_date, 1)
         
         # Right: Time, Fees, Serial
@@ -2389,16 +2851,19 @@ class MainWindow(QtWidgets.QMainWindow):
         MainWindow.style_button_with_dynamic_spacing(book_btn, font_size=13, padding="8px 16px")
         book_btn.clicked.connect(self.poly_book_appointment)
         layout.addWidget(book_btn)
+        
+        # Tab is built on first show, so load the doctor list right away
+        self._poly_load_doctors_once()
     
     def poly_lookup_patient(self):
-        """Lookup patient by phone number"""
+        """Lookup patient by phone number or patient ID"""
         phone = self.poly_patient_phone.text().strip()
         if not phone:
-            QtWidgets.QMessageBox.warning(self, "Error", "Please enter a phone number")
+            QtWidgets.QMessageBox.warning(self, "Error", "Please enter a phone number or patient ID")
             return
         
         try:
-            patient = patient_cms_db.get_patient_by_phone(phone)
+            patient = patient_cms_db.lookup_patient(phone)
             if patient:
                 self.poly_patient_name.setText(patient.get('name', ''))
                 self.poly_patient_id.setText(str(patient.get('patientId', '')))
@@ -2406,6 +2871,8 @@ class MainWindow(QtWidgets.QMainWindow):
                 self.poly_patient_gender.setText(patient.get('sex', ''))
                 # Store the patientId for booking (this is the primary key)
                 self.poly_selected_patient_id = patient.get('patientId')
+            elif self._show_patient_suggestions(self.poly_patient_completer, phone, minimum=2):
+                self.poly_clear_patient_info()
             else:
                 QtWidgets.QMessageBox.information(self, "Not Found", "Patient not found. Please register in Patient CMS first.")
                 self.poly_clear_patient_info()
@@ -2428,8 +2895,7 @@ class MainWindow(QtWidgets.QMainWindow):
         
         search_text = self.poly_doctor_search.text().lower()
         try:
-            doctors = polyclinic_db.get_all_doctors()
-            filtered = [d for d in doctors if search_text in d['name'].lower() or search_text in d['speciality'].lower()]
+            filtered = polyclinic_db.search_doctors(search_text)
             
             self.poly_doctor_list.clear()
             for doc in filtered:
@@ -2442,6 +2908,8 @@ class MainWindow(QtWidgets.QMainWindow):
     
     def _poly_load_doctors_once(self):
         """Load doctors list once on first focus"""
+        if not self._tab_built(self.poly_booking_tab):
+            return
         if not self.poly_doctors_loaded:
             self.poly_doctors_loaded = True
             self.poly_doctor_search.textChanged.connect(self.poly_filter_doctors)
@@ -2466,45 +2934,45 @@ class MainWindow(QtWidgets.QMainWindow):
         # Update time slots for current date
         self.poly_update_time_slots()
     
+    @staticmethod
+    def _poly_make_calendar_formats():
+        """Date formats for the booking calendar, built once"""
+        unavailable = QtGui.QTextCharFormat()
+        unavailable.setForeground(QtGui.QBrush(QtGui.QColor("lightgray")))
+        available = QtGui.QTextCharFormat()
+        available.setForeground(QtGui.QBrush(QtCore.Qt.black))
+        available.setFontWeight(QtGui.QFont.Bold)
+        full = QtGui.QTextCharFormat()
+        full.setForeground(QtGui.QBrush(QtGui.QColor("#D13438")))
+        full.setFontStrikeOut(True)
+        return {'unavailable': unavailable, 'available': available, 'full': full}
+    
     def poly_update_calendar_availability(self):
-        """Grey out dates where doctor is not available"""
+        """Grey out dates of the visible month where the doctor is not available"""
         if not hasattr(self, 'poly_selected_doctor_id'):
             return
             
         try:
-            # Get available weekdays (0=Mon, 6=Sun)
-            availability = polyclinic_db.get_doctor_availability(self.poly_selected_doctor_id)
-            available_weekdays = {a['day_of_week'] for a in availability}
-            
-            # Format for unavailable days (Greyed out)
-            unavailable_fmt = QtGui.QTextCharFormat()
-            unavailable_fmt.setForeground(QtGui.QBrush(QtGui.QColor("lightgray")))
-            # unavailable_fmt.setBackground(QtGui.QBrush(QtGui.QColor("#f0f0f0")))
-            
-            # Format for available days (Standard)
-            available_fmt = QtGui.QTextCharFormat()
-            available_fmt.setForeground(QtGui.QBrush(QtCore.Qt.black))
-            available_fmt.setFontWeight(QtGui.QFont.Bold)
+            # The grid also shows the end of the previous and start of the next month
+            calendar = self.poly_booking_date
+            first = QtCore.QDate(calendar.yearShown(), calendar.monthShown(), 1)
+            start = first.addDays(-((first.dayOfWeek() - calendar.firstDayOfWeek().value) % 7))
+            end = start.addDays(6 * 7 - 1)
+            self.poly_calendar_slots = availability_service.get_calendar(
+                self.poly_selected_doctor_id, start.toPython(), end.toPython())
             
             # Reset formats first (clear all custom formatting)
-            self.poly_booking_date.setDateTextFormat(QtCore.QDate(), QtGui.QTextCharFormat())
-            
-            # Apply over a 3-month range from current month
-            start_date = self.poly_booking_date.selectedDate().addDays(-15) # Start a bit before
-            for i in range(90): # Look ahead 90 days
-                date = start_date.addDays(i)
-                # Python weekday() is 0-6 (Mon-Sun)
-                # QDate.dayOfWeek() is 1-7 (Mon-Sun)
-                # We use python conversion for consistency with DB
-                py_weekday = date.toPython().weekday()
-                
-                # Check if date is in the past
-                is_past = date < QtCore.QDate.currentDate()
-                
-                if is_past or py_weekday not in available_weekdays:
-                    self.poly_booking_date.setDateTextFormat(date, unavailable_fmt)
+            calendar.setDateTextFormat(QtCore.QDate(), QtGui.QTextCharFormat())
+            formats = self._poly_calendar_formats
+            for i in range(6 * 7):
+                date = start.addDays(i)
+                slots = self.poly_calendar_slots.get(date.toString(QtCore.Qt.ISODate))
+                if not slots:
+                    calendar.setDateTextFormat(date, formats['unavailable'])
+                elif all(slot.is_full for slot in slots):
+                    calendar.setDateTextFormat(date, formats['full'])
                 else:
-                    self.poly_booking_date.setDateTextFormat(date, available_fmt)
+                    calendar.setDateTextFormat(date, formats['available'])
                     
         except Exception as e:
             print(f"Error updating calendar: {e}")
@@ -2517,19 +2985,22 @@ class MainWindow(QtWidgets.QMainWindow):
         
         try:
             selected_date_obj = self.poly_booking_date.selectedDate().toPython()
-            day_of_week = selected_date_obj.weekday()
             
-            # Get availability for this doctor and day
-            availability = polyclinic_db.get_doctor_availability(self.poly_selected_doctor_id)
-            day_slots = [a for a in availability if a['day_of_week'] == day_of_week]
+            # Slots of the visible month were loaded with the calendar formats
+            day_slots = self.poly_calendar_slots.get(selected_date_obj.isoformat())
+            if day_slots is None:
+                day_slots = availability_service.get_day_slots(self.poly_selected_doctor_id, selected_date_obj)
             
             self.poly_time_slot.clear()
             self.poly_available_slots = []  # Store slot objects for later use
             
             for slot in day_slots:
-                display_text = f"{slot['start_time']} - {slot['end_time']}"
+                booked = f"{slot.booked}/{slot.capacity}" if slot.capacity is not None else str(slot.booked)
+                display_text = f"{slot.start_time} - {slot.end_time}  ({booked} booked{', full' if slot.is_full else ''})"
                 item = QtWidgets.QListWidgetItem(display_text)
-                item.setData(QtCore.Qt.UserRole, slot)  # Store slot data
+                item.setData(QtCore.Qt.UserRole, slot._asdict())  # Store slot data
+                if slot.is_full:
+                    item.setFlags(item.flags() & ~QtCore.Qt.ItemIsEnabled)
                 self.poly_time_slot.addItem(item)
                 self.poly_available_slots.append(slot)
             
@@ -2585,6 +3056,15 @@ class MainWindow(QtWidgets.QMainWindow):
             booking_time = slot['start_time']
             serial_number = int(self.poly_serial_display.text())
             
+            # The slot may have filled up since the calendar was loaded
+            current = {s.start_time: s for s in availability_service.get_day_slots(
+                self.poly_selected_doctor_id, self.poly_booking_date.selectedDate().toPython())}
+            if booking_time in current and current[booking_time].is_full:
+                QtWidgets.QMessageBox.warning(self, "Slot Full", "This time slot is fully booked. Please choose another.")
+                self.poly_update_calendar_availability()
+                self.poly_update_time_slots()
+                return
+            
             # Create booking using the stored patient ID
             booking_id = polyclinic_db.add_booking(
                 self.poly_selected_patient_id,
@@ -2602,6 +3082,9 @@ class MainWindow(QtWidgets.QMainWindow):
                 f"Appointment booked successfully!\nSerial Number: {serial_number}\nBooking Date: {booking_date}\nTime: {booking_time}"
             )
             
+            # Booked counts changed
+            self.poly_update_calendar_availability()
+            
             # Clear form
             self.poly_patient_phone.clear()
             self.poly_clear_patient_info()
@@ -2761,7 +3244,7 @@ class MainWindow(QtWidgets.QMainWindow):
         """Handle add time slot button click"""
         self._poly_add_slot_impl(day_idx, "09:00", "17:00")
     
-    def _poly_add_slot_impl(self, day_idx, start_time="09:00", end_time="17:00"):
+    def _poly_add_slot_impl(self, day_idx, start_time="09:00", end_time="17:00", capacity=None):
         """Implementation to add a time slot"""
         day_widget = self.poly_day_widgets[day_idx]
         slot_index = len(day_widget['slots'])
@@ -2780,6 +3263,14 @@ class MainWindow(QtWidgets.QMainWindow):
         slot_layout.addWidget(QtWidgets.QLabel("To:"))
         slot_layout.addWidget(end_widget)
         
+        # Most patients per date in this slot (0 = no limit)
+        capacity_widget = QtWidgets.QSpinBox()
+        capacity_widget.setRange(0, 500)
+        capacity_widget.setSpecialValueText("No limit")
+        capacity_widget.setValue(capacity or 0)
+        slot_layout.addWidget(QtWidgets.QLabel("Max:"))
+        slot_layout.addWidget(capacity_widget)
+        
         # Remove button
         remove_btn = QtWidgets.QPushButton("Remove")
         remove_btn.setMaximumWidth(80)
@@ -2791,6 +3282,7 @@ class MainWindow(QtWidgets.QMainWindow):
         day_widget['slots'].append({
             'start': start_widget,
             'end': end_widget,
+            'capacity': capacity_widget,
             'layout': slot_layout
         })
         
@@ -2837,7 +3329,7 @@ class MainWindow(QtWidgets.QMainWindow):
             return
         
         # Collect all day schedules
-        schedule_data = {}  # day_idx -> [(start_time, end_time), ...]
+        schedule_data = {}  # day_idx -> [(start_time, end_time, capacity), ...]
         for day_idx in range(7):
             day_widget = self.poly_day_widgets[day_idx]
             if day_widget['checkbox'].isChecked():
@@ -2846,7 +3338,8 @@ class MainWindow(QtWidgets.QMainWindow):
                     for slot in day_widget['slots']:
                         start_time = slot['start'].time().toString("HH:mm")
                         end_time = slot['end'].time().toString("HH:mm")
-                        time_slots.append((start_time, end_time))
+                        capacity = slot['capacity'].value() or None
+                        time_slots.append((start_time, end_time, capacity))
                     schedule_data[day_idx] = time_slots
         
         if not schedule_data:
@@ -2875,8 +3368,8 @@ class MainWindow(QtWidgets.QMainWindow):
                 # Clear and re-add availability per day
                 polyclinic_db.clear_doctor_availability(doctor_id)
                 for day_idx, time_slots in schedule_data.items():
-                    for start_time, end_time in time_slots:
-                        polyclinic_db.add_availability(doctor_id, day_idx, start_time, end_time)
+                    for start_time, end_time, capacity in time_slots:
+                        polyclinic_db.add_availability(doctor_id, day_idx, start_time, end_time, capacity)
                 
                 QtWidgets.QMessageBox.information(self, "Success", f"Doctor '{name}' updated successfully!")
             else:
@@ -2885,8 +3378,8 @@ class MainWindow(QtWidgets.QMainWindow):
                 
                 # Add availability per day
                 for day_idx, time_slots in schedule_data.items():
-                    for start_time, end_time in time_slots:
-                        polyclinic_db.add_availability(doctor_id, day_idx, start_time, end_time)
+                    for start_time, end_time, capacity in time_slots:
+                        polyclinic_db.add_availability(doctor_id, day_idx, start_time, end_time, capacity)
                 
                 QtWidgets.QMessageBox.information(self, "Success", f"Doctor '{name}' added successfully!")
             
@@ -2917,8 +3410,7 @@ class MainWindow(QtWidgets.QMainWindow):
         is_admin = self.user.get('role') == 'admin'
         
         try:
-            doctors = polyclinic_db.get_all_doctors()
-            filtered = [d for d in doctors if search_text in d['name'].lower() or search_text in d['speciality'].lower()]
+            filtered = polyclinic_db.search_doctors(search_text)
             
             self.poly_doctor_mgmt_table.setRowCount(len(filtered))
             for r, doc in enumerate(filtered):
@@ -2982,7 +3474,8 @@ class MainWindow(QtWidgets.QMainWindow):
                     day_schedule[day_idx] = []
                 day_schedule[day_idx].append({
                     'start': avail['start_time'],
-                    'end': avail['end_time']
+                    'end': avail['end_time'],
+                    'capacity': avail.get('capacity')
                 })
             
             # Clear and rebuild day widgets
@@ -3001,7 +3494,7 @@ class MainWindow(QtWidgets.QMainWindow):
                     day_widget['checkbox'].setChecked(True)
                     day_widget['add_btn'].setEnabled(True)  # Explicitly enable button
                     for slot in day_schedule[day_idx]:
-                        self._poly_add_slot_impl(day_idx, slot['start'], slot['end'])
+                        self._poly_add_slot_impl(day_idx, slot['start'], slot['end'], slot['capacity'])
                 else:
                     day_widget['checkbox'].setChecked(False)
                     day_widget['add_btn'].setEnabled(False)  # Explicitly disable button
@@ -3072,11 +3565,23 @@ class MainWindow(QtWidgets.QMainWindow):
         
         left_layout.addWidget(summary_group)
         
-        # Export Day button
-        self.poly_export_day_btn = QtWidgets.QPushButton('📊 Export Day Data')
+        # Export section - range starts at the queue date filter
+        export_group = QtWidgets.QGroupBox("Export")
+        export_group_layout = QtWidgets.QFormLayout(export_group)
+        
+        self.poly_export_end_date = QtWidgets.QDateEdit()
+        self.poly_export_end_date.setDate(QtCore.QDate.currentDate())
+        export_group_layout.addRow("Until:", self.poly_export_end_date)
+        self.poly_queue_date_filter.dateChanged.connect(
+            lambda d: self.poly_export_end_date.setDate(d) if self.poly_export_end_date.date() < d else None
+        )
+        
+        self.poly_export_day_btn = QtWidgets.QPushButton('📊 Export Data')
         self.poly_export_day_btn.setStyleSheet('font-size: 11px; padding: 8px 16px; background-color: #4CAF50; color: white; font-weight: bold;')
         self.poly_export_day_btn.clicked.connect(self.poly_export_day)
-        left_layout.addWidget(self.poly_export_day_btn)
+        export_group_layout.addRow(self.poly_export_day_btn)
+        
+        left_layout.addWidget(export_group)
         
         left_layout.addStretch()
         
@@ -3257,76 +3762,56 @@ class MainWindow(QtWidgets.QMainWindow):
                 QtWidgets.QMessageBox.warning(self, "Error", f"Error deleting booking: {str(e)}")
     
     def poly_export_day(self):
-        """Export day data to XLSX"""
-        try:
-            selected_doctor_id = self.poly_queue_doctor_filter.currentData()
-            selected_date = str(self.poly_queue_date_filter.date().toPython())
-            
-            if not selected_doctor_id:
-                QtWidgets.QMessageBox.warning(self, "Error", "Please select a doctor for export")
-                return
-            
+        """Export bookings from the queue date up to the export end date to XLSX.
+        
+        "All Doctors" produces one sheet per doctor. The workbook is written by a
+        background thread; progress is shown in the status bar.
+        """
+        if getattr(self, 'poly_export_thread', None) and self.poly_export_thread.isRunning():
+            self.statusBar().showMessage("An export is already running...", 3000)
+            return
+        
+        selected_doctor_id = self.poly_queue_doctor_filter.currentData()
+        start_date = self.poly_queue_date_filter.date().toPython()
+        end_date = self.poly_export_end_date.date().toPython()
+        
+        if end_date < start_date:
+            QtWidgets.QMessageBox.warning(self, "Error", "Export end date cannot be before the queue date")
+            return
+        
+        if selected_doctor_id:
             doctor = polyclinic_db.get_doctor(selected_doctor_id)
-            
-            import openpyxl
-            from openpyxl.styles import Font, PatternFill, Alignment, Border, Side
-            
-            wb = openpyxl.Workbook()
-            ws = wb.active
-            ws.title = "Queue"
-            
-            # Headers
-            headers = ['Serial', 'Patient Name', PATIENT_ID_LABEL, 'Phone', 'Payment', 'Attendance', 'Fees']
-            ws.append(headers)
-            
-            # Style header
-            header_fill = PatternFill(start_color="0078D4", end_color="0078D4", fill_type="solid")
-            header_font = Font(bold=True, color="FFFFFF")
-            for cell in ws[1]:
-                cell.fill = header_fill
-                cell.font = header_font
-                cell.alignment = Alignment(horizontal="center")
-            
-            # Get bookings
-            bookings = polyclinic_db.get_bookings_for_doctor_date(selected_doctor_id, selected_date)
-            
-            total_fees = 0
-            collected_fees = 0
-            for booking in bookings:
-                patient = patient_cms_db.get_patient(booking['patient_id'])
-                fees = doctor.get('visiting_fees', 0)
-                total_fees += fees
-                if booking['payment_status'] == 'PAID':
-                    collected_fees += fees
-                
-                ws.append([
-                    booking['serial_number'],
-                    patient.get('name', '') if patient else '',
-                    booking['patient_id'],
-                    patient.get('phone', '') if patient else '',
-                    booking['payment_status'],
-                    booking['attendance_status'],
-                    fees
-                ])
-            
-            # Summary rows
-            ws.append([])
-            ws.append(['SUMMARY'])
-            ws.append(['Total Patients:', len(bookings)])
-            ws.append(['Total Fees:', total_fees])
-            ws.append(['Collected Fees:', collected_fees])
-            ws.append(['Pending Fees:', total_fees - collected_fees])
-            
-            # Save file
-            filename = f"Polyclinic_Queue_{doctor['name']}_{selected_date}.xlsx"
-            wb.save(filename)
-            
-            QtWidgets.QMessageBox.information(self, "Success", f"Data exported to {filename}")
-            
-        except ImportError:
-            QtWidgets.QMessageBox.warning(self, "Error", "openpyxl not installed. Please install it to use export feature.")
-        except Exception as e:
-            QtWidgets.QMessageBox.warning(self, "Error", f"Error exporting: {str(e)}")
+            label = doctor['name'] if doctor else str(selected_doctor_id)
+        else:
+            label = "All_Doctors"
+        
+        date_label = str(start_date) if start_date == end_date else f"{start_date}_to_{end_date}"
+        default_filename = f"Polyclinic_Queue_{label}_{date_label}.xlsx"
+        fname, _ = QtWidgets.QFileDialog.getSaveFileName(self, 'Save XLSX', default_filename, 'Excel (*.xlsx)')
+        if not fname:
+            return
+        
+        self.poly_export_day_btn.setEnabled(False)
+        self.statusBar().showMessage("Exporting polyclinic data...")
+        
+        self.poly_export_thread = PolyclinicExportThread(fname, str(start_date), str(end_date), selected_doctor_id)
+        self.poly_export_thread.progress.connect(self._on_poly_export_progress)
+        self.poly_export_thread.export_finished.connect(self._on_poly_export_finished)
+        self.poly_export_thread.error_occurred.connect(self._on_poly_export_error)
+        self.poly_export_thread.start()
+    
+    def _on_poly_export_progress(self, done, total):
+        self.statusBar().showMessage(f"Exporting polyclinic data... {done}/{total} bookings")
+    
+    def _on_poly_export_finished(self, filename, rows, sheets):
+        self.poly_export_day_btn.setEnabled(True)
+        self.statusBar().showMessage(f"Exported {rows} bookings ({sheets} sheet(s)) to {filename}", 10000)
+        QtWidgets.QMessageBox.information(self, "Success", f"Data exported to {filename}")
+    
+    def _on_poly_export_error(self, message):
+        self.poly_export_day_btn.setEnabled(True)
+        self.statusBar().clearMessage()
+        QtWidgets.QMessageBox.warning(self, "Error", message)
     
     def init_poly_cms_tab(self):
         """Initialize Patient CMS tab for Polyclinic (shared with Pathology)"""
@@ -3335,12 +3820,20 @@ class MainWindow(QtWidgets.QMainWindow):
 
 
 def main():
+    startup_timer = PhaseTimer('launch')
+    migrations.run_migrations()
+    startup_timer.mark('migrations')
+    new_databases = migrations.new_databases()
     patient_cms_db.init_db()
     datasheet_db.init_db()
     report_tracker_db.init_db()
     auth_db.init_db()
     catalogue_db.init_db()
     special_tests_db.init_db()
+    polyclinic_db.init_db()
+    for db_name in new_databases:
+        migrations.stamp_new_database(db_name)
+    startup_timer.mark('db_init')
     
     app = QtWidgets.QApplication(sys.argv)
     app.setQuitOnLastWindowClosed(False)
@@ -3353,6 +3846,12 @@ def main():
     except Exception:
         pass
     
+    # Pick up edits to config.yaml made outside the app (or by a restore)
+    config_poll_timer = QtCore.QTimer()
+    config_poll_timer.setInterval(CONFIG_POLL_INTERVAL_MS)
+    config_poll_timer.timeout.connect(get_config().reload_if_changed)
+    config_poll_timer.start()
+    
     if not auth_db.check_if_any_user_exists():
         # Show branded First Time Setup
         setup_dlg = FirstTimeSetupDialog()
@@ -3381,6 +3880,8 @@ def main():
     
     login_win.logged_in.connect(on_login)
     login_win.show()
+    startup_timer.mark('login_shown')
+    startup_timer.save()
     
     sys.exit(app.exec())
 
@@ -0,0 +1,54 @@
+"""Startup phase timings for PekoCMS"""
+import os
+import json
+import time
+import datetime
+
+from app.utils import get_app_data_dir
+
+TIMINGS_FILENAME = 'startup_timings.jsonl'
+
+
+class PhaseTimer:
+    """Records how long each named startup phase took.
+
+    `mark(phase)` stores the time since the previous mark, so phases read as
+    a breakdown of the total. `save()` prints the breakdown and appends it to
+    startup_timings.jsonl in the app data directory for tracking over time.
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self._start = time.perf_counter()
+        self._last = self._start
+        self.phases = {}
+        self.extra = {}
+
+    def mark(self, phase):
+        now = time.perf_counter()
+        self.phases[phase] = round((now - self._last) * 1000, 1)
+        self._last = now
+
+    def add(self, key, value):
+        """Attach additional measurements (e.g. background query timings)"""
+        self.extra[key] = value
+
+    @property
+    def total_ms(self):
+        return round((self._last - self._start) * 1000, 1)
+
+    def save(self):
+        record = {
+            'timer': self.name,
+            'at': datetime.datetime.now().isoformat(timespec='seconds'),
+            'total_ms': self.total_ms,
+            'phases': self.phases,
+        }
+        record.update(self.extra)
+        breakdown = ', '.join(f"{k}={v}ms" for k, v in self.phases.items())
+        print(f"Startup [{self.name}]: {self.total_ms}ms ({breakdown})")
+        try:
+            with open(os.path.join(get_app_data_dir(), TIMINGS_FILENAME), 'a', encoding='utf-8') as f:
+                f.write(json.dumps(record) + '\n')
+        except OSError as e:
+            print(f"Warning: Could not save startup timings: {e}")
@@ -1,6 +1,8 @@
 """Worker threads for background operations in PekoCMS"""
 import sys
 import os
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from PySide6 import QtCore
 
 # Add parent directory to path for db imports
@@ -9,6 +11,11 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from db import catalogue_db
 from db import data_fetcher
 from db import special_tests_db
+from db import polyclinic_export
+from db import backup_service
+from db import backup_store
+from db import auth_db
+from db import archive_service
 
 
 class CatalogueLoaderThread(QtCore.QThread):
@@ -20,29 +27,25 @@ class CatalogueLoaderThread(QtCore.QThread):
     def run(self):
         """Run in separate thread - load from cache first, then fetch if needed"""
         try:
-            # Load from SQLite cache first (instant)
-            cached_data = catalogue_db.get_all_tests()
-            if cached_data:
-                self.status_updated.emit(f"Loaded {len(cached_data)} tests from cache")
+            # Check the SQLite cache first (instant)
+            cached_count = catalogue_db.get_test_count()
+            if cached_count:
+                self.status_updated.emit(f"Loaded {cached_count} tests from cache")
                 # Don't block waiting for web data - use cache immediately
             else:
-                # Cache is empty - try to fetch fresh data from the server
+                # Cache is empty - sync now from the first available catalogue source
                 self.status_updated.emit("Loading data from server (this may take 1-2 minutes)...")
-                fresh_data = data_fetcher.get_catalogue_data()
-                if fresh_data:
-                    # Store in local database
-                    for test in fresh_data:
-                        catalogue_db.add_or_update_test(test)
-                    cached_data = fresh_data
-                    self.status_updated.emit(f"Loaded {len(fresh_data)} tests from server")
+                status = data_fetcher.fetch_catalogue_data()
+                if status.row_count:
+                    self.status_updated.emit(f"Loaded {status.row_count} tests")
                 else:
                     self.status_updated.emit("No test data available")
         except Exception as e:
             # Use cached data on error
             try:
-                cached_data = catalogue_db.get_all_tests()
-                if cached_data:
-                    self.status_updated.emit(f"Using cached data ({len(cached_data)} tests)")
+                cached_count = catalogue_db.get_test_count()
+                if cached_count:
+                    self.status_updated.emit(f"Using cached data ({cached_count} tests)")
                 else:
                     self.status_updated.emit("No test data available")
             except:
@@ -59,7 +62,7 @@ class InvoiceCatalogueLoaderThread(QtCore.QThread):
     def run(self):
         """Run in separate thread"""
         try:
-            cat = catalogue_db.get_all_tests()
+            cat = catalogue_db.get_all_test_rows()
             if not cat:
                 cat = data_fetcher.get_catalogue_data()
                 status = data_fetcher.get_fetch_status()
@@ -79,7 +82,7 @@ class SpecialTestsLoaderThread(QtCore.QThread):
     def run(self):
         """Run in separate thread"""
         try:
-            special_tests = special_tests_db.get_all_special_tests()
+            special_tests = special_tests_db.get_index().all()
             self.tests_loaded.emit(special_tests)
         except Exception as e:
             self.error_occurred.emit(f"Error loading special tests: {str(e)}")
@@ -97,3 +100,149 @@ class FullCatalogueLoaderThread(QtCore.QThread):
             self.data_ready.emit(data)
         except Exception as e:
             self.error_occurred.emit(f"Error loading catalogue: {str(e)}")
+
+
+class PolyclinicExportThread(QtCore.QThread):
+    """Worker thread for exporting polyclinic bookings to XLSX"""
+    progress = QtCore.Signal(int, int)
+    export_finished = QtCore.Signal(str, int, int)
+    error_occurred = QtCore.Signal(str)
+    
+    def __init__(self, filename, start_date, end_date, doctor_id=None, parent=None):
+        super().__init__(parent)
+        self.filename = filename
+        self.start_date = start_date
+        self.end_date = end_date
+        self.doctor_id = doctor_id
+    
+    def run(self):
+        """Run in separate thread"""
+        try:
+            result = polyclinic_export.export_bookings_xlsx(
+                self.filename, self.start_date, self.end_date, self.doctor_id,
+                progress_callback=self.progress.emit
+            )
+            self.export_finished.emit(result['filename'], result['rows'], result['sheets'])
+        except ImportError:
+            self.error_occurred.emit("openpyxl not installed. Please install it to use export feature.")
+        except Exception as e:
+            self.error_occurred.emit(f"Error exporting: {str(e)}")
+
+
+class BackupThread(QtCore.QThread):
+    """Worker thread for hot backups of the databases, config and logos.
+    
+    With a snapshot_id, exports that stored incremental snapshot as a zip instead.
+    """
+    progress = QtCore.Signal(int, int, str)
+    backup_finished = QtCore.Signal(dict)
+    error_occurred = QtCore.Signal(str)
+    
+    def __init__(self, dest_path=None, snapshot_id=None, parent=None):
+        super().__init__(parent)
+        self.dest_path = dest_path
+        self.snapshot_id = snapshot_id
+    
+    def run(self):
+        """Run in separate thread"""
+        try:
+            if self.snapshot_id:
+                manifest = backup_store.export_snapshot(self.snapshot_id, self.dest_path)
+            else:
+                manifest = backup_service.create_backup(self.dest_path, progress_callback=self.progress.emit)
+            self.backup_finished.emit(manifest)
+        except Exception as e:
+            self.error_occurred.emit(f"Error creating backup: {str(e)}")
+
+
+class AutoBackupThread(QtCore.QThread):
+    """Worker thread for the scheduled incremental backup and retention pass"""
+    backup_finished = QtCore.Signal(dict)
+    error_occurred = QtCore.Signal(str)
+    
+    def run(self):
+        """Run in separate thread"""
+        try:
+            self.backup_finished.emit(backup_store.run_automatic_backup())
+        except Exception as e:
+            self.error_occurred.emit(f"Automatic backup failed: {str(e)}")
+
+
+class ArchiveThread(QtCore.QThread):
+    """Worker thread that moves old log, report and invoice rows into monthly archives"""
+    archive_finished = QtCore.Signal(dict)
+    error_occurred = QtCore.Signal(str)
+    
+    def run(self):
+        """Run in separate thread"""
+        try:
+            self.archive_finished.emit(archive_service.run_archiver())
+        except Exception as e:
+            self.error_occurred.emit(f"Archiving failed: {str(e)}")
+
+
+class LoginThread(QtCore.QThread):
+    """Worker thread for password verification, so key derivation does not freeze the login window"""
+    login_finished = QtCore.Signal(object)  # user dict, or None for bad credentials
+    error_occurred = QtCore.Signal(str)
+    
+    def __init__(self, username, password, parent=None):
+        super().__init__(parent)
+        self.username = username
+        self.password = password
+    
+    def run(self):
+        """Run in separate thread"""
+        try:
+            self.login_finished.emit(auth_db.authenticate(self.username, self.password))
+        except auth_db.LoginThrottled as e:
+            self.error_occurred.emit(str(e))
+        except Exception as e:
+            self.error_occurred.emit(f"Login failed: {str(e)}")
+        finally:
+            self.password = None
+
+
+class SyncStatusBridge(QtCore.QObject):
+    """Re-emits catalogue sync scheduler updates as a Qt signal (queued to the GUI thread)"""
+    status_changed = QtCore.Signal(object)
+    
+    def __init__(self, scheduler=None, parent=None):
+        super().__init__(parent)
+        self.scheduler = scheduler or data_fetcher.get_scheduler()
+        self._listener = self.status_changed.emit
+        self.scheduler.add_listener(self._listener)
+    
+    def detach(self):
+        """Stop receiving scheduler updates"""
+        self.scheduler.remove_listener(self._listener)
+
+
+class StartupPrefetchThread(QtCore.QThread):
+    """Runs the initial data queries concurrently so tabs can open with data ready"""
+    data_ready = QtCore.Signal(dict, dict)  # results by name, query time (ms) by name
+    
+    MAX_WORKERS = 4
+    
+    def __init__(self, queries, parent=None):
+        super().__init__(parent)
+        self.queries = queries  # name -> callable
+    
+    @staticmethod
+    def _timed(fn):
+        start = time.perf_counter()
+        result = fn()
+        return result, round((time.perf_counter() - start) * 1000, 1)
+    
+    def run(self):
+        """Run in separate thread"""
+        results, timings = {}, {}
+        with ThreadPoolExecutor(max_workers=min(self.MAX_WORKERS, len(self.queries) or 1)) as pool:
+            futures = {pool.submit(self._timed, fn): name for name, fn in self.queries.items()}
+            for future in as_completed(futures):
+                name = futures[future]
+                try:
+                    results[name], timings[name] = future.result()
+                except Exception as e:
+                    print(f"Startup prefetch '{name}' failed: {e}")
+        self.data_ready.emit(results, timings)
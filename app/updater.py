@@ -1,9 +1,7 @@
 
 import sys
 import os
-import requests
 import webbrowser
-from packaging import version
 from PySide6 import QtCore, QtWidgets
 
 # Current App Version
@@ -17,6 +15,10 @@ class UpdateCheckerThread(QtCore.QThread):
     
     def run(self):
         try:
+            # Imported here so they are not loaded at application startup
+            import requests
+            from packaging import version
+            
             api_url = f"https://api.github.com/repos/{GITHUB_REPO}/releases/latest"
             response = requests.get(api_url, timeout=10)
             
@@ -1,7 +1,7 @@
 """Utilities, constants, and helper functions for PekoCMS"""
 import sys
 import os
-from PySide6 import QtGui
+from functools import lru_cache
 
 # Add parent directory to path for db imports
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -32,6 +32,7 @@ def get_asset_path(filename):
     # Use branding constant
     return os.path.join(BASE_PATH, ASSETS_DIRECTORY, filename)
 
+@lru_cache(maxsize=None)
 def get_app_data_dir():
     """Get writable application data directory"""
     if getattr(sys, 'frozen', False):
@@ -45,6 +46,7 @@ def get_app_data_dir():
     os.makedirs(data_dir, exist_ok=True)
     return data_dir
 
+@lru_cache(maxsize=None)
 def get_database_dir():
     """Get database directory"""
     data_dir = get_app_data_dir()
@@ -52,6 +54,7 @@ def get_database_dir():
     os.makedirs(db_dir, exist_ok=True)
     return db_dir
 
+@lru_cache(maxsize=None)
 def get_config_path():
     """Get config file path"""
     if getattr(sys, 'frozen', False):
@@ -73,6 +76,7 @@ def get_config_path():
         return os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'config.yaml')
 
 
+@lru_cache(maxsize=None)
 def get_invoice_storage_dir():
     """Get invoice storage directory, create if doesn't exist"""
     if getattr(sys, 'frozen', False):
@@ -85,4 +89,8 @@ def get_invoice_storage_dir():
     return invoice_dir
 
 
-INVOICE_STORAGE_DIR = get_invoice_storage_dir()
+def __getattr__(name):
+    # Resolved on first access instead of creating the folder at import time
+    if name == 'INVOICE_STORAGE_DIR':
+        return get_invoice_storage_dir()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,108 @@
+"""Benchmark: streaming catalogue import from the file drop source.
+
+Writes a synthetic catalogue (JSON Lines and CSV) into a throwaway drop
+folder and times a full import through CatalogueImporter. It then
+interrupts an import halfway and times the resumed run.
+
+Usage: python benchmarks/catalogue_import.py [--tests 50000]
+"""
+import argparse
+import csv
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from db import catalogue_db
+from db.catalogue_sources import CatalogueImporter, FileDropSource
+
+
+def _make_test(i):
+    return {
+        'testCode': f"T{i:06d}",
+        'testName': f"Test Panel {i}",
+        'testFees': float(100 + i % 900),
+        'CategoryName': 'Biochemistry',
+        'SampleType': 'Serum',
+        'FastingRequired': 'Yes' if i % 7 == 0 else 'No',
+        'ReportedOn': 'Same Day',
+        'ClinicalUse': 'Routine screening and monitoring.',
+    }
+
+
+def _write_drop(folder, fmt, count):
+    for name in os.listdir(folder):
+        os.remove(os.path.join(folder, name))
+    path = os.path.join(folder, f"catalogue.{fmt}")
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        if fmt == 'jsonl':
+            for i in range(count):
+                f.write(json.dumps(_make_test(i)) + '\n')
+        else:
+            writer = csv.DictWriter(f, fieldnames=list(_make_test(0).keys()))
+            writer.writeheader()
+            for i in range(count):
+                writer.writerow(_make_test(i))
+    return path
+
+
+class _Interrupted(Exception):
+    pass
+
+
+class _InterruptingSource(FileDropSource):
+    """Stops after `limit` records to simulate a crash mid-import."""
+
+    def __init__(self, folder, limit):
+        super().__init__(folder)
+        self.limit = limit
+
+    def iter_tests(self):
+        for n, test in enumerate(super().iter_tests()):
+            if n >= self.limit:
+                raise _Interrupted()
+            yield test
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--tests', type=int, default=50000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        catalogue_db.DB_NAME = os.path.join(tmp, 'catalogue.db')
+        catalogue_db.init_db()
+        drop = os.path.join(tmp, 'drop')
+        os.makedirs(drop)
+
+        for fmt in ('jsonl', 'csv'):
+            _write_drop(drop, fmt, args.tests)
+            start = time.perf_counter()
+            count = CatalogueImporter(FileDropSource(drop)).run()
+            elapsed = time.perf_counter() - start
+            print(f"{fmt:<6} full import: {count} rows in {elapsed:.2f} s ({count / elapsed:,.0f} rows/s)")
+
+        _write_drop(drop, 'jsonl', args.tests)
+        half = args.tests // 2
+        try:
+            CatalogueImporter(_InterruptingSource(drop, half)).run()
+        except _Interrupted:
+            pass
+        checkpoint = catalogue_db.get_import_checkpoint('file_drop')
+        print(f"interrupted at {checkpoint['position']} rows; live catalogue still has {catalogue_db.get_test_count()}")
+
+        start = time.perf_counter()
+        count = CatalogueImporter(FileDropSource(drop)).run()
+        elapsed = time.perf_counter() - start
+        print(f"resumed import: {count} rows in {elapsed:.2f} s")
+
+        start = time.perf_counter()
+        count = CatalogueImporter(FileDropSource(drop)).run()
+        print(f"unchanged snapshot: {count} rows in {time.perf_counter() - start:.3f} s")
+
+
+if __name__ == '__main__':
+    main()
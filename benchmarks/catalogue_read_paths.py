@@ -0,0 +1,76 @@
+"""Benchmark: JSON raw_data reads vs typed CatalogueRow reads.
+
+Builds a throwaway catalogue database and times the old dict-returning read
+paths against the typed projections used by the invoice screen.
+
+Usage: python benchmarks/catalogue_read_paths.py [--tests 5000] [--repeat 5]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from db import catalogue_db
+
+
+def _make_test(i):
+    return {
+        'testCode': f"T{i:05d}",
+        'testName': f"Test Panel {i} - Serum Analysis",
+        'testFees': float(100 + i % 900),
+        'CategoryName': 'Biochemistry',
+        'SampleType': 'Serum',
+        'SampleVolume': '2 mL',
+        'FastingRequired': 'Yes' if i % 7 == 0 else 'No',
+        'PatientConsentForm': 'No',
+        'ReportedOn': 'Same Day',
+        'isActive': 'Y',
+        'MethodName': 'Photometry',
+        'ProcessingDepartment': 'Central Lab',
+        'ClinicalUse': 'Routine screening and monitoring of metabolic function. ' * 4,
+        'Components': [{'name': f"Component {j}", 'unit': 'mg/dL'} for j in range(8)],
+    }
+
+
+def _best_of(repeat, fn):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--tests', type=int, default=5000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        catalogue_db.DB_NAME = os.path.join(tmp, 'catalogue.db')
+        catalogue_db.init_db()
+        catalogue_db.refresh_catalogue(_make_test(i) for i in range(args.tests))
+        codes = [f"T{i:05d}" for i in range(0, args.tests, max(1, args.tests // 200))]
+
+        cases = [
+            ('full catalogue', catalogue_db.get_all_tests, catalogue_db.get_all_test_rows),
+            ("search 'panel 1'", lambda: catalogue_db.search_tests('panel 1'),
+             lambda: catalogue_db.search_test_rows('panel 1')),
+            (f"{len(codes)} single lookups", lambda: [catalogue_db.get_test(c) for c in codes],
+             lambda: [catalogue_db.get_test_row(c) for c in codes]),
+        ]
+
+        print(f"{args.tests} tests, best of {args.repeat}")
+        print(f"{'case':<22}{'raw_data JSON':>16}{'typed rows':>14}{'speedup':>10}")
+        for label, before, after in cases:
+            t_before = _best_of(args.repeat, before)
+            t_after = _best_of(args.repeat, after)
+            print(f"{label:<22}{t_before:>13.1f} ms{t_after:>11.1f} ms{t_before / t_after:>9.1f}x")
+
+
+if __name__ == '__main__':
+    main()
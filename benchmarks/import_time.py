@@ -0,0 +1,72 @@
+"""Benchmark: import-time budget for the main application module.
+
+Runs `python -X importtime -c "import app.pyside_app"` in a fresh
+interpreter and reports the slowest modules. Exits with status 1 when the
+total exceeds the budget or when a module that should only load on demand
+(PDF generation, spreadsheets, network, password hashing) was imported.
+
+Usage: python benchmarks/import_time.py [--budget-ms 400] [--top 15]
+"""
+import argparse
+import os
+import subprocess
+import sys
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Top-level packages that must not be imported just to show the login window
+LAZY_MODULES = ('fpdf', 'openpyxl', 'requests', 'packaging', 'pydantic', 'werkzeug')
+
+
+def _measure(module):
+    env = dict(os.environ, QT_QPA_PLATFORM=os.environ.get('QT_QPA_PLATFORM', 'offscreen'))
+    proc = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f"import {module}"],
+        cwd=PROJECT_ROOT, env=env, capture_output=True, text=True
+    )
+    if proc.returncode != 0:
+        raise SystemExit(f"import {module} failed:\n{proc.stderr[-2000:]}")
+
+    # Lines look like: "import time:  self [us] | cumulative | imported package"
+    entries = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        # One space follows the separator; deeper nesting adds two per level
+        entries.append((name.rstrip()[1:], int(self_us), int(cumulative_us)))
+    return entries
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--module', default='app.pyside_app')
+    parser.add_argument('--budget-ms', type=float, default=400.0)
+    parser.add_argument('--top', type=int, default=15)
+    args = parser.parse_args()
+
+    entries = _measure(args.module)
+    top_level = [e for e in entries if not e[0].startswith(' ')]
+    total_ms = next((cum for name, _, cum in top_level if name == args.module), 0) / 1000
+
+    print(f"Slowest modules imported by {args.module} (cumulative):")
+    for name, self_us, cumulative_us in sorted(entries, key=lambda e: e[2], reverse=True)[:args.top]:
+        print(f"  {cumulative_us / 1000:8.1f} ms  (self {self_us / 1000:6.1f} ms)  {name.strip()}")
+
+    loaded = sorted({name.strip().split('.')[0] for name, _, _ in entries} & set(LAZY_MODULES))
+    print(f"\nimport {args.module}: {total_ms:.1f} ms (budget {args.budget_ms:.0f} ms)")
+
+    failed = False
+    if total_ms > args.budget_ms:
+        print("FAIL: import time is over budget")
+        failed = True
+    if loaded:
+        print(f"FAIL: modules that should load on demand were imported: {', '.join(loaded)}")
+        failed = True
+    if not failed:
+        print("OK")
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,79 @@
+"""Benchmark: renaming polyclinic_bookings.nidaan_id on a large database.
+
+Builds a synthetic legacy polyclinic.db with the old `nidaan_id` column,
+then times the online backup, the native ALTER TABLE RENAME COLUMN and the
+table-rebuild fallback used on SQLite versions older than 3.25.
+
+Usage: python benchmarks/migration_rename.py [--rows 1000000]
+"""
+import argparse
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from migration_tool import DatabaseMigrator
+
+
+def _build_legacy_db(path, rows):
+    conn = sqlite3.connect(path)
+    conn.execute("""
+        CREATE TABLE polyclinic_bookings (
+            booking_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            nidaan_id TEXT NOT NULL,
+            doctor_id INTEGER NOT NULL,
+            booking_date DATE NOT NULL,
+            booking_time TEXT NOT NULL,
+            serial_number INTEGER NOT NULL,
+            payment_status TEXT DEFAULT 'PENDING',
+            attendance_status TEXT DEFAULT 'PENDING',
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    conn.executemany(
+        "INSERT INTO polyclinic_bookings (nidaan_id, doctor_id, booking_date, booking_time, serial_number) "
+        "VALUES (?, ?, ?, ?, ?)",
+        ((f"N{i:08d}", i % 40, f"2024-{1 + i % 12:02d}-{1 + i % 28:02d}", '10:00 AM', i % 60)
+         for i in range(rows))
+    )
+    conn.execute("CREATE INDEX idx_bookings_date_doctor ON polyclinic_bookings (booking_date, doctor_id)")
+    conn.commit()
+    conn.close()
+
+
+def _timed(label, fn):
+    start = time.perf_counter()
+    result = fn()
+    print(f"{label:<28} {time.perf_counter() - start:8.2f} s")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_dir = Path(tmp)
+        db_path = db_dir / 'polyclinic.db'
+        _timed(f"build {args.rows:,} rows", lambda: _build_legacy_db(db_path, args.rows))
+        print(f"database size                {db_path.stat().st_size / 1e6:8.1f} MB")
+
+        migrator = DatabaseMigrator(tmp)
+        copy_path = db_dir / 'polyclinic_copy.db'
+        _timed("online backup", lambda: migrator.copy_database(db_path, copy_path))
+
+        _timed("pending check", migrator.pending_migrations)
+        ok = _timed("native RENAME COLUMN",
+                    lambda: migrator.rename_column(db_path, 'polyclinic_bookings', 'nidaan_id', 'patient_id'))
+        ok = _timed("table rebuild (fallback)",
+                    lambda: migrator.rename_column_via_recreate(copy_path, 'polyclinic_bookings', 'nidaan_id', 'patient_id')) and ok
+        print(f"both renames succeeded: {ok}; pending after: {migrator.pending_migrations()}")
+
+
+if __name__ == '__main__':
+    main()
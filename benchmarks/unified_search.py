@@ -0,0 +1,78 @@
+"""Benchmark: unified quick search (Ctrl+K) on a large patient table.
+
+Builds throwaway patient, doctor, catalogue and special test databases
+(FTS indexes included) and times search_service.search() for typical
+queries against the 50 ms budget. Exits with status 1 if any query is
+over budget.
+
+Usage: python benchmarks/unified_search.py [--patients 100000] [--repeat 5] [--budget-ms 50]
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from db import catalogue_db, patient_cms_db, polyclinic_db, search_service, special_tests_db
+
+FIRST_NAMES = ['Amit', 'Anita', 'Rahul', 'Priya', 'Suresh', 'Kavya', 'Mohan', 'Deepa', 'Arjun', 'Sneha']
+LAST_NAMES = ['Sharma', 'Verma', 'Gupta', 'Iyer', 'Nair', 'Reddy', 'Das', 'Bose', 'Khan', 'Singh']
+QUERIES = ['am', 'amit', 'amit sh', 'priya nair', '98765', 'pek-0012', 'cardio', 'lipid', 'blood count']
+
+
+def _populate(patients):
+    rng = random.Random(42)
+    conn = patient_cms_db._get_db_connection()
+    with conn:
+        conn.executemany(
+            "INSERT INTO patients (patientId, name, sex, age, phone, address, created_at) VALUES (?, ?, ?, ?, ?, ?, ?)",
+            [(f"PEK-{i:06d}", f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}", 'M', 30,
+              f"9{i:09d}", 'Pekoland', '2025-01-01T00:00:00') for i in range(patients)]
+        )
+    conn.close()
+    for i in range(40):
+        polyclinic_db.add_doctor(f"Dr {rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}",
+                                 rng.choice(['Cardiology', 'Dermatology', 'Orthopaedics']), 'MD', 500)
+    catalogue_db.refresh_catalogue(
+        {'testCode': f"T{i:05d}", 'testName': f"{'Lipid Profile' if i % 5 == 0 else 'Complete Blood Count'} {i}",
+         'testFees': 100.0} for i in range(5000))
+    for i in range(50):
+        special_tests_db.add_special_test({'testName': f"Special Panel {i}", 'testDescription': 'Send-out',
+                                           'testFees': 900})
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--patients', type=int, default=100000)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--budget-ms', type=float, default=50.0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for module, name in ((patient_cms_db, 'patient_cms.db'), (polyclinic_db, 'polyclinic.db'),
+                             (catalogue_db, 'catalogue.db'), (special_tests_db, 'special_tests.db')):
+            module.DB_NAME = os.path.join(tmp, name)
+            module.init_db()
+        start = time.perf_counter()
+        _populate(args.patients)
+        print(f"{args.patients} patients indexed in {time.perf_counter() - start:.1f} s, best of {args.repeat}")
+
+        over_budget = False
+        print(f"{'query':<16}{'hits':>6}{'time':>12}")
+        for query in QUERIES:
+            best = float('inf')
+            for _ in range(args.repeat):
+                t = time.perf_counter()
+                hits = search_service.search(query)
+                best = min(best, (time.perf_counter() - t) * 1000)
+            flag = '' if best <= args.budget_ms else '  OVER BUDGET'
+            over_budget = over_budget or bool(flag)
+            print(f"{query!r:<16}{len(hits):>6}{best:>9.1f} ms{flag}")
+    sys.exit(1 if over_budget else 0)
+
+
+if __name__ == '__main__':
+    main()
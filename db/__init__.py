@@ -2,6 +2,7 @@
 # Note: Lazy imports to avoid circular dependencies
 __all__ = [
     'auth_db',
+    'audit_log',
     'patient_cms_db',
     'catalogue_db',
     'datasheet_db',
@@ -9,5 +10,16 @@ __all__ = [
     'special_tests_db',
     'polyclinic_db',
     'invoice_service',
+    'polyclinic_export',
     'data_fetcher',
+    'catalogue_sources',
+    'migrations',
+    'backup_service',
+    'backup_store',
+    'restore_service',
+    'archive_service',
+    'fts',
+    'search_service',
+    'cache',
+    'availability_service',
 ]
@@ -0,0 +1,216 @@
+"""Time-based partitioning of the large, append-mostly tables.
+
+Old rows of a partitioned table are moved out of the live ("hot") database
+into one archive database per month, e.g. `databases/archive/login_logs_2025_01.db`.
+The archive table has the same schema as the hot table. Hot tables stay
+small, so the everyday queries on them stay fast.
+
+`archive_partition()` moves rows older than the partition's hot period in
+batches of ARCHIVE_BATCH_SIZE. Each batch is one transaction with the
+archive file ATTACHed. It pauses between batches so other writers are not
+held up. Rows are copied and deleted in the same transaction, so an
+interrupted run can simply be repeated. A row whose key is already in the
+month's archive makes the copy fail, and the whole batch is rolled back
+rather than deleting a row that was not archived.
+
+Reads that span time use `iter_partitions()`. It yields the hot table,
+then each monthly archive (newest first) ATTACHed one at a time on the same
+connection, so a query can still join other tables of the hot database.
+`delete_row()` deletes a row by key from whichever partition holds it.
+"""
+import os
+import re
+import time
+import sqlite3
+import datetime
+import threading
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional
+
+from . import auth_db, datasheet_db, report_tracker_db
+from app.utils import get_database_dir
+
+ARCHIVE_FOLDER = 'archive'
+ARCHIVE_ALIAS = 'arch'
+ARCHIVE_BATCH_SIZE = 500        # rows moved per transaction
+ARCHIVE_BATCH_PAUSE = 0.05      # seconds to yield to other writers between batches
+
+
+class Partition(NamedTuple):
+    module: Any                 # owning db module (DB_NAME, _get_db_connection)
+    table: str
+    time_column: str            # ISO-8601 text; its first 7 characters pick the month
+    hot_days: int               # rows newer than this stay in the hot table
+    condition: Optional[str]    # extra SQL a row must satisfy to be archived
+
+
+PARTITIONS = {
+    'login_logs': Partition(auth_db, 'login_logs', 'timestamp', 90, None),
+    # Undelivered reports stay hot however old they are
+    'reports': Partition(report_tracker_db, 'reports', 'created_at', 180, "status = 'Delivered'"),
+    'invoice_records': Partition(datasheet_db, 'invoice_records', 'invoiceDate', 365, None),
+}
+
+# Only one archiver may move rows at a time
+_archive_lock = threading.Lock()
+
+
+def get_archive_dir(db_dir: Optional[str] = None) -> str:
+    archive_dir = os.path.join(db_dir or get_database_dir(), ARCHIVE_FOLDER)
+    os.makedirs(archive_dir, exist_ok=True)
+    return archive_dir
+
+
+def archive_path(name: str, month: str) -> str:
+    """Archive file for a partition and a 'YYYY-MM' month."""
+    return os.path.join(get_archive_dir(), f"{name}_{month.replace('-', '_')}.db")
+
+
+def list_archive_months(name: str) -> List[str]:
+    """Months ('YYYY-MM') with an archive file for a partition, newest first."""
+    pattern = re.compile(rf"^{re.escape(name)}_(\d{{4}})_(\d{{2}})\.db$")
+    months = []
+    for filename in os.listdir(get_archive_dir()):
+        match = pattern.match(filename)
+        if match:
+            months.append(f"{match.group(1)}-{match.group(2)}")
+    return sorted(months, reverse=True)
+
+
+def _columns(conn: sqlite3.Connection, schema: str, table: str) -> List[str]:
+    return [r[1] for r in conn.execute(f"PRAGMA {schema}.table_info('{table}')").fetchall()]
+
+
+def _ensure_archive_table(conn: sqlite3.Connection, p: Partition) -> List[str]:
+    """Creates the archive table like the hot one; returns the columns both have."""
+    hot_columns = _columns(conn, 'main', p.table)
+    if not _columns(conn, ARCHIVE_ALIAS, p.table):
+        row = conn.execute("SELECT sql FROM main.sqlite_master WHERE type = 'table' AND name = ?", (p.table,)).fetchone()
+        create_sql = re.sub(r'^\s*CREATE\s+TABLE\s+(IF\s+NOT\s+EXISTS\s+)?["\'`]?\w+["\'`]?',
+                            f'CREATE TABLE IF NOT EXISTS {ARCHIVE_ALIAS}.{p.table}', row[0], flags=re.IGNORECASE)
+        conn.execute(create_sql)
+        conn.execute(f"CREATE INDEX IF NOT EXISTS {ARCHIVE_ALIAS}.idx_{p.table}_{p.time_column} "
+                     f"ON {p.table}({p.time_column})")
+    else:
+        # Columns added to the hot table since this month was archived
+        archive_columns = _columns(conn, ARCHIVE_ALIAS, p.table)
+        for column in hot_columns:
+            if column not in archive_columns:
+                conn.execute(f"ALTER TABLE {ARCHIVE_ALIAS}.{p.table} ADD COLUMN {column}")
+    return hot_columns
+
+
+def _attach(conn: sqlite3.Connection, path: str) -> None:
+    conn.execute(f"ATTACH DATABASE ? AS {ARCHIVE_ALIAS}", (path,))
+
+
+def _detach(conn: sqlite3.Connection) -> None:
+    conn.execute(f"DETACH DATABASE {ARCHIVE_ALIAS}")
+
+
+def archive_partition(name: str, now: Optional[datetime.datetime] = None,
+                      batch_size: int = ARCHIVE_BATCH_SIZE, pause: float = ARCHIVE_BATCH_PAUSE) -> int:
+    """Moves rows older than the partition's hot period into monthly archives. Returns the row count."""
+    p = PARTITIONS[name]
+    cutoff = ((now or datetime.datetime.now()) - datetime.timedelta(days=p.hot_days)).isoformat()
+    # Rows whose time is not ISO-8601 cannot be placed in a month and stay hot
+    where = f"{p.time_column} < ? AND {p.time_column} GLOB '[0-9][0-9][0-9][0-9]-[0-9][0-9]*'"
+    if p.condition:
+        where += f" AND {p.condition}"
+
+    moved = 0
+    with _archive_lock:
+        conn = p.module._get_db_connection()
+        conn.isolation_level = None   # explicit transactions; ATTACH is not allowed inside one
+        try:
+            while True:
+                rows = conn.execute(
+                    f"SELECT rowid AS rid, substr({p.time_column}, 1, 7) AS month FROM {p.table} "
+                    f"WHERE {where} ORDER BY {p.time_column} LIMIT ?", (cutoff, batch_size)
+                ).fetchall()
+                if not rows:
+                    break
+                by_month: Dict[str, List[int]] = {}
+                for row in rows:
+                    by_month.setdefault(row['month'], []).append(row['rid'])
+
+                for month, rowids in by_month.items():
+                    _attach(conn, archive_path(name, month))
+                    try:
+                        columns = ', '.join(_ensure_archive_table(conn, p))
+                        placeholders = ', '.join('?' * len(rowids))
+                        conn.execute("BEGIN IMMEDIATE")
+                        try:
+                            conn.execute(f"INSERT INTO {ARCHIVE_ALIAS}.{p.table} ({columns}) "
+                                         f"SELECT {columns} FROM main.{p.table} WHERE rowid IN ({placeholders})", rowids)
+                            conn.execute(f"DELETE FROM main.{p.table} WHERE rowid IN ({placeholders})", rowids)
+                            conn.execute("COMMIT")
+                        except sqlite3.Error:
+                            conn.execute("ROLLBACK")
+                            raise
+                    finally:
+                        _detach(conn)
+                    moved += len(rowids)
+                time.sleep(pause)
+        finally:
+            conn.close()
+    return moved
+
+
+def run_archiver(now: Optional[datetime.datetime] = None) -> Dict[str, int]:
+    """Background job: archives every partition. Returns rows moved per partition."""
+    results = {}
+    for name in PARTITIONS:
+        try:
+            results[name] = archive_partition(name, now)
+        except sqlite3.Error as e:
+            print(f"Archiving {name} failed: {e}")
+            results[name] = 0
+    return results
+
+
+def iter_partitions(conn: sqlite3.Connection, name: str, months: Optional[List[str]] = None) -> Iterator[str]:
+    """Yields the table to query for each partition: the hot table, then each archive month.
+
+    Each archive is ATTACHed while its name is yielded and detached afterwards,
+    so queries can run against one month at a time on the hot connection.
+    `months` limits which archive months are visited (default: all, newest first).
+    """
+    p = PARTITIONS[name]
+    yield f"main.{p.table}"
+    for month in (list_archive_months(name) if months is None else months):
+        _attach(conn, archive_path(name, month))
+        try:
+            yield f"{ARCHIVE_ALIAS}.{p.table}"
+        finally:
+            _detach(conn)
+
+
+def query_all(name: str, sql: str, params: tuple = ()) -> List[Dict[str, Any]]:
+    """Runs `sql` (with `{table}` in place of the table name) on every partition and concatenates the rows."""
+    p = PARTITIONS[name]
+    conn = p.module._get_db_connection()
+    try:
+        rows = []
+        for table in iter_partitions(conn, name):
+            rows += [dict(r) for r in conn.execute(sql.format(table=table), params).fetchall()]
+        return rows
+    finally:
+        conn.close()
+
+
+def delete_row(name: str, key_column: str, key: Any) -> Optional[Dict[str, Any]]:
+    """Deletes the row with this key from whichever partition holds it. Returns the row, or None."""
+    p = PARTITIONS[name]
+    conn = p.module._get_db_connection()
+    partitions = iter_partitions(conn, name)
+    try:
+        for table in partitions:
+            row = conn.execute(f"SELECT * FROM {table} WHERE {key_column} = ?", (key,)).fetchone()
+            if row is not None:
+                with conn:
+                    conn.execute(f"DELETE FROM {table} WHERE {key_column} = ?", (key,))
+                return dict(row)
+        return None
+    finally:
+        partitions.close()
+        conn.close()
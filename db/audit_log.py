@@ -0,0 +1,140 @@
+"""Batched, asynchronous audit log for PekoCMS (the login_logs table in auth.db).
+
+`log_event()` only puts the event on a queue and returns. A background
+writer thread collects events for up to FLUSH_INTERVAL_MS, then inserts the
+batch in a single transaction, so a burst of events costs one commit and
+callers on the GUI thread never wait for the disk. Details are stored as
+JSON. Reads are keyset-paginated on (timestamp, id), which the timestamp
+index serves directly, so loading later pages does not get slower. Pages
+continue from the hot table into the monthly archives (see archive_service).
+"""
+import json
+import time
+import queue
+import atexit
+import datetime
+import threading
+from contextlib import closing
+from typing import Any, Dict, List, Optional, Tuple
+
+from . import auth_db, archive_service
+
+FLUSH_INTERVAL_MS = 200
+MAX_BATCH_SIZE = 500
+LOG_PAGE_SIZE = 200
+
+# (timestamp, id) of the last row of a page; pass it back to get the next page
+LogCursor = Tuple[str, int]
+
+
+class _AuditWriter:
+    def __init__(self):
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name='audit-log-writer', daemon=True)
+        self._thread.start()
+
+    def put(self, row: Tuple) -> None:
+        self._queue.put(row)
+
+    def flush(self) -> None:
+        """Blocks until every event queued so far has been written."""
+        self._queue.join()
+
+    def _next_batch(self) -> List[Tuple]:
+        """Waits for an event, then collects more for up to FLUSH_INTERVAL_MS."""
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + FLUSH_INTERVAL_MS / 1000
+        while len(batch) < MAX_BATCH_SIZE:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self) -> None:
+        while True:
+            batch = self._next_batch()
+            # Every event is marked done whatever happens, or flush() would wait forever
+            try:
+                with closing(auth_db._get_db_connection()) as conn, conn:
+                    conn.executemany(
+                        "INSERT INTO login_logs (user_id, event, timestamp, details) VALUES (?, ?, ?, ?)",
+                        batch
+                    )
+            except Exception as e:
+                print(f"Audit log write error ({len(batch)} events dropped): {e}")
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+
+_writer: Optional[_AuditWriter] = None
+_writer_lock = threading.Lock()
+
+
+def _get_writer() -> _AuditWriter:
+    global _writer
+    with _writer_lock:
+        if _writer is None:
+            _writer = _AuditWriter()
+            atexit.register(_writer.flush)
+        return _writer
+
+
+def log_event(user_id: Optional[int], event: str, details: Optional[Dict[str, Any]] = None) -> None:
+    """Queues an audit event; it is written with the next batch."""
+    timestamp = datetime.datetime.now().isoformat()
+    payload = json.dumps(details) if details else None
+    _get_writer().put((user_id, event, timestamp, payload))
+
+
+def flush() -> None:
+    """Waits until all queued events are in the database."""
+    if _writer is not None:
+        _writer.flush()
+
+
+def get_events(limit: int = LOG_PAGE_SIZE, before: Optional[LogCursor] = None,
+               user_id: Optional[int] = None, event: Optional[str] = None) -> List[Dict[str, Any]]:
+    """Returns up to `limit` events, newest first, with the username and parsed details.
+
+    Pass the 'cursor' of the last returned row as `before` to get the next page.
+    Archived months are read once the hot table has no more matching rows.
+    """
+    flush()
+    months = None
+    where, params = [], []
+    if before is not None:
+        where.append("(l.timestamp, l.id) < (?, ?)")
+        params += list(before)
+        # Archive months after the cursor cannot hold older rows
+        months = [m for m in archive_service.list_archive_months('login_logs') if m <= before[0][:7]]
+    if user_id is not None:
+        where.append("l.user_id = ?")
+        params.append(user_id)
+    if event is not None:
+        where.append("l.event = ?")
+        params.append(event)
+    sql = ("SELECT l.*, u.username FROM {table} l LEFT JOIN main.users u ON u.id = l.user_id"
+           + (" WHERE " + " AND ".join(where) if where else "")
+           + " ORDER BY l.timestamp DESC, l.id DESC LIMIT ?")
+
+    rows = []
+    conn = auth_db._get_db_connection()
+    try:
+        # Archived rows are all older than hot ones, so partitions are read in order
+        with closing(archive_service.iter_partitions(conn, 'login_logs', months)) as tables:
+            for table in tables:
+                cursor = conn.execute(sql.format(table=table), params + [limit - len(rows)])
+                rows += [dict(r) for r in cursor.fetchall()]
+                if len(rows) >= limit:
+                    break
+    finally:
+        conn.close()
+    for row in rows:
+        row['details'] = json.loads(row['details']) if row.get('details') else None
+        row['cursor'] = (row['timestamp'], row['id'])
+    return rows
@@ -1,15 +1,60 @@
 
 import sqlite3
-import datetime
+import time
 import os
+from functools import lru_cache
 from typing import Optional, Dict, Any, List
-from werkzeug.security import generate_password_hash, check_password_hash
 
 # Get path to databases folder
 from app.utils import get_database_dir
+from app.config_service import get_config
 DB_DIR = get_database_dir()
 DB_NAME = os.path.join(DB_DIR, 'auth.db')
 
+# werkzeug method string; override with PASSWORD_HASH_METHOD in config.yaml.
+# Stored hashes made with other parameters are upgraded on the next login.
+DEFAULT_PASSWORD_HASH_METHOD = 'scrypt:32768:8:1'
+
+# Login throttling: failed attempts allowed per username, and in total, within a window
+MAX_FAILED_ATTEMPTS_PER_USER = 5
+USER_ATTEMPT_WINDOW_SECONDS = 300
+MAX_FAILED_ATTEMPTS_GLOBAL = 20
+GLOBAL_ATTEMPT_WINDOW_SECONDS = 60
+
+
+class LoginThrottled(Exception):
+    """Raised by authenticate() while too many logins have failed recently."""
+
+    def __init__(self, retry_after: int):
+        self.retry_after = retry_after
+        super().__init__(f"Too many failed login attempts. Try again in {retry_after} seconds.")
+
+
+def _hash_method() -> str:
+    return get_config().get('PASSWORD_HASH_METHOD') or DEFAULT_PASSWORD_HASH_METHOD
+
+
+def _hash_password(password: str) -> str:
+    # werkzeug is imported on first use so it does not delay the login window
+    from werkzeug.security import generate_password_hash
+    return generate_password_hash(password, method=_hash_method())
+
+
+@lru_cache(maxsize=4)
+def _dummy_hash(method: str) -> str:
+    """A hash to verify against for unknown usernames, so they take as long as real ones."""
+    from werkzeug.security import generate_password_hash
+    return generate_password_hash(os.urandom(16).hex(), method=method)
+
+
+def _method_prefix(method: str) -> str:
+    """The method as werkzeug writes it into hashes, e.g. 'scrypt' -> 'scrypt:32768:8:1'."""
+    return _dummy_hash(method).split('$', 1)[0]
+
+
+def _needs_rehash(hashed_password: str) -> bool:
+    return hashed_password.split('$', 1)[0] != _method_prefix(_hash_method())
+
 
 def _get_db_connection() -> sqlite3.Connection:
     """Establishes a connection to the authentication database."""
@@ -55,6 +100,25 @@ def init_db() -> None:
             )
         """)
 
+        # Structured details (JSON) and indexes for the audit log (see audit_log.py)
+        if not _table_has_column(conn, 'login_logs', 'details'):
+            cursor.execute("ALTER TABLE login_logs ADD COLUMN details TEXT")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_login_logs_timestamp ON login_logs(timestamp)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_login_logs_user ON login_logs(user_id, timestamp)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_login_logs_event ON login_logs(event, timestamp)")
+
+        # Recent login attempts, for throttling (successful ones clear a user's failures)
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS login_attempts (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                username TEXT NOT NULL,
+                success INTEGER NOT NULL,
+                attempted_at REAL NOT NULL
+            )
+        """)
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_login_attempts_username ON login_attempts(username, attempted_at)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_login_attempts_time ON login_attempts(attempted_at)")
+
         # If users table exists but missing full_name, add it and populate from username
         if not _table_has_column(conn, 'users', 'full_name'):
             try:
@@ -79,7 +143,7 @@ def create_user(username: str, password: str, full_name: str, role: str = 'user'
         cursor = conn.cursor()
         cursor.execute(
             "INSERT INTO users (username, password, full_name, role) VALUES (?, ?, ?, ?)",
-            (username, generate_password_hash(password), full_name, role)
+            (username, _hash_password(password), full_name, role)
         )
         conn.commit()
     except sqlite3.IntegrityError:
@@ -134,33 +198,89 @@ def set_user_role(user_id: int, role: str) -> None:
         conn.close()
 
 
-def log_event(user_id: Optional[int], event: str) -> None:
+def log_event(user_id: Optional[int], event: str, details: Optional[Dict[str, Any]] = None) -> None:
+    """Records an audit event. Returns immediately; events are written in batches."""
+    from . import audit_log
+    audit_log.log_event(user_id, event, details)
+
+
+def get_login_logs(limit: int = 200) -> List[Dict[str, Any]]:
+    """Newest audit events first. See audit_log.get_events for paging and filters."""
+    from . import audit_log
+    return audit_log.get_events(limit)
+
+
+def check_password(hashed_password: str, password_to_check: str) -> bool:
+    """Verifies a password against its stored hash."""
+    from werkzeug.security import check_password_hash
+    return check_password_hash(hashed_password, password_to_check)
+
+
+def _throttle_retry_after(cursor: sqlite3.Cursor, username: str, now: float) -> int:
+    """Seconds until another attempt is allowed for this username (0 if allowed now)."""
+    retry_after = 0
+    for where, params, limit, window in (
+        ("username = ? AND ", (username,), MAX_FAILED_ATTEMPTS_PER_USER, USER_ATTEMPT_WINDOW_SECONDS),
+        ("", (), MAX_FAILED_ATTEMPTS_GLOBAL, GLOBAL_ATTEMPT_WINDOW_SECONDS),
+    ):
+        # The oldest failure that still counts towards the limit decides when it is lifted
+        cursor.execute(
+            f"SELECT attempted_at FROM login_attempts WHERE {where}success = 0 AND attempted_at > ? "
+            "ORDER BY attempted_at DESC LIMIT 1 OFFSET ?",
+            params + (now - window, limit - 1)
+        )
+        row = cursor.fetchone()
+        if row:
+            retry_after = max(retry_after, int(row['attempted_at'] + window - now) + 1)
+    return retry_after
+
+
+def authenticate(username: str, password: str) -> Optional[Dict[str, Any]]:
+    """Verifies a login. Returns the user record, or None for bad credentials.
+
+    Unknown usernames are checked against a dummy hash so they take as long as
+    real ones. Hashes made with outdated parameters are replaced on success.
+    Raises LoginThrottled while too many attempts have failed recently.
+    Slow by design (key derivation); call it off the GUI thread.
+    """
+    now = time.time()
     conn = _get_db_connection()
     try:
         cursor = conn.cursor()
-        cursor.execute(
-            "INSERT INTO login_logs (user_id, event, timestamp) VALUES (?, ?, ?)",
-            (user_id, event, datetime.datetime.now().isoformat())
-        )
-        conn.commit()
+        retry_after = _throttle_retry_after(cursor, username, now)
+        if retry_after:
+            raise LoginThrottled(retry_after)
+        cursor.execute("SELECT * FROM users WHERE username = ?", (username,))
+        row = cursor.fetchone()
     finally:
         conn.close()
 
+    user = dict(row) if row else None
+    valid = check_password(user['password'] if user else _dummy_hash(_hash_method()), password)
+    valid = valid and user is not None
 
-def get_login_logs(limit: int = 200) -> List[Dict[str, Any]]:
     conn = _get_db_connection()
     try:
         cursor = conn.cursor()
-        cursor.execute("SELECT * FROM login_logs ORDER BY timestamp DESC LIMIT ?", (limit,))
-        rows = cursor.fetchall()
-        return [dict(r) for r in rows]
+        if valid:
+            cursor.execute("DELETE FROM login_attempts WHERE username = ? AND success = 0", (username,))
+            if _needs_rehash(user['password']):
+                user['password'] = _hash_password(password)
+                cursor.execute("UPDATE users SET password = ? WHERE id = ?", (user['password'], user['id']))
+        cursor.execute(
+            "INSERT INTO login_attempts (username, success, attempted_at) VALUES (?, ?, ?)",
+            (username, int(valid), now)
+        )
+        cursor.execute(
+            "DELETE FROM login_attempts WHERE attempted_at < ?",
+            (now - max(USER_ATTEMPT_WINDOW_SECONDS, GLOBAL_ATTEMPT_WINDOW_SECONDS),)
+        )
+        conn.commit()
+    except sqlite3.Error as e:
+        print(f"Login attempt logging error: {e}")
     finally:
         conn.close()
-
-
-def check_password(hashed_password: str, password_to_check: str) -> bool:
-    """Verifies a password against its stored hash."""
-    return check_password_hash(hashed_password, password_to_check)
+    return user if valid else None
 
 
 def check_if_any_user_exists() -> bool:
@@ -199,7 +319,7 @@ def update_user(user_id: str, password: Optional[str] = None, full_name: Optiona
         
         if password is not None and password.strip():
             updates.append("password = ?")
-            params.append(generate_password_hash(password))
+            params.append(_hash_password(password))
         
         if not updates:
             raise ValueError("No fields to update")
@@ -0,0 +1,124 @@
+"""Materialised booking calendar for polyclinic doctors.
+
+A doctor's weekly schedule (doctor_availability) is expanded into one
+`availability_calendar` row per bookable slot and date over a rolling
+window of CALENDAR_HORIZON_DAYS from today, with the slot's capacity and
+how many patients are booked into it. The booking screen reads a month
+of it with one indexed query instead of re-deriving availability date by
+date.
+
+Triggers created by polyclinic_db keep the booked counts current for
+every booking write, and mark a doctor's calendar stale when their
+schedule changes. A doctor's calendar is rebuilt on the next read when it
+is stale or its window no longer starts today.
+"""
+import datetime
+import sqlite3
+from typing import Dict, List, NamedTuple, Optional
+
+from . import polyclinic_db
+
+CALENDAR_HORIZON_DAYS = 90
+
+
+class CalendarSlot(NamedTuple):
+    slot_date: str              # 'YYYY-MM-DD'
+    start_time: str
+    end_time: str
+    capacity: Optional[int]     # None: no limit
+    booked: int
+
+    @property
+    def is_full(self) -> bool:
+        return self.capacity is not None and self.booked >= self.capacity
+
+
+def _rebuild(cursor: sqlite3.Cursor, doctor_id: int, today: datetime.date) -> None:
+    """Re-expands one doctor's schedule over the window starting today. Runs in the caller's transaction."""
+    start = today.isoformat()
+    end = (today + datetime.timedelta(days=CALENDAR_HORIZON_DAYS - 1)).isoformat()
+    cursor.execute("""
+        SELECT day_of_week, start_time, end_time, capacity FROM doctor_availability
+        WHERE doctor_id = ? ORDER BY start_time
+    """, (doctor_id,))
+    rules: Dict[int, List[sqlite3.Row]] = {}
+    for rule in cursor.fetchall():
+        rules.setdefault(rule['day_of_week'], []).append(rule)
+    cursor.execute("""
+        SELECT booking_date, booking_time, COUNT(*) AS booked FROM polyclinic_bookings
+        WHERE doctor_id = ? AND booking_date BETWEEN ? AND ?
+        GROUP BY booking_date, booking_time
+    """, (doctor_id, start, end))
+    booked = {(row['booking_date'], row['booking_time']): row['booked'] for row in cursor.fetchall()}
+
+    rows = []
+    for offset in range(CALENDAR_HORIZON_DAYS):
+        date = today + datetime.timedelta(days=offset)
+        slot_date = date.isoformat()
+        for rule in rules.get(date.weekday(), ()):
+            rows.append((doctor_id, slot_date, rule['start_time'], rule['end_time'], rule['capacity'],
+                         booked.get((slot_date, rule['start_time']), 0)))
+
+    cursor.execute("DELETE FROM availability_calendar WHERE doctor_id = ?", (doctor_id,))
+    cursor.executemany("""
+        INSERT OR REPLACE INTO availability_calendar (doctor_id, slot_date, start_time, end_time, capacity, booked)
+        VALUES (?, ?, ?, ?, ?, ?)
+    """, rows)
+    cursor.execute("INSERT OR REPLACE INTO availability_calendar_state (doctor_id, start_date, end_date) VALUES (?, ?, ?)",
+                   (doctor_id, start, end))
+
+
+def _ensure_current(conn: sqlite3.Connection, doctor_id: int, today: datetime.date) -> None:
+    row = conn.execute("SELECT start_date FROM availability_calendar_state WHERE doctor_id = ?",
+                       (doctor_id,)).fetchone()
+    if row is not None and row['start_date'] == today.isoformat():
+        return
+    # Bookings are counted and the rows replaced under one write lock, so none is missed
+    cursor = conn.cursor()
+    cursor.execute("BEGIN IMMEDIATE")
+    try:
+        _rebuild(cursor, doctor_id, today)
+        conn.commit()
+    except sqlite3.Error:
+        conn.rollback()
+        raise
+
+
+def get_calendar(doctor_id: int, start_date: datetime.date, end_date: datetime.date,
+                 today: Optional[datetime.date] = None) -> Dict[str, List[CalendarSlot]]:
+    """Bookable slots per date ('YYYY-MM-DD') from start_date to end_date, both included.
+
+    Dates outside the rolling window (before today or past the horizon),
+    and dates the doctor does not work, are absent.
+    """
+    today = today or datetime.date.today()
+    conn = polyclinic_db._get_db_connection()
+    try:
+        _ensure_current(conn, doctor_id, today)
+        rows = conn.execute("""
+            SELECT slot_date, start_time, end_time, capacity, booked FROM availability_calendar
+            WHERE doctor_id = ? AND slot_date BETWEEN ? AND ?
+            ORDER BY slot_date, start_time
+        """, (doctor_id, start_date.isoformat(), end_date.isoformat())).fetchall()
+    except sqlite3.Error as e:
+        print(f"Availability calendar error: {e}")
+        return {}
+    finally:
+        conn.close()
+    calendar: Dict[str, List[CalendarSlot]] = {}
+    for row in rows:
+        calendar.setdefault(row['slot_date'], []).append(CalendarSlot(*row))
+    return calendar
+
+
+def get_day_slots(doctor_id: int, date: datetime.date) -> List[CalendarSlot]:
+    """The doctor's slots on one date, with capacity and booked counts."""
+    return get_calendar(doctor_id, date, date).get(date.isoformat(), [])
+
+
+def get_month(doctor_id: int, year: int, month: int) -> Dict[str, List[CalendarSlot]]:
+    """Slots per date for one calendar month."""
+    first = datetime.date(year, month, 1)
+    last = (first + datetime.timedelta(days=32)).replace(day=1) - datetime.timedelta(days=1)
+    return get_calendar(doctor_id, first, last)
+
@@ -0,0 +1,193 @@
+"""Hot backups of the PekoCMS databases, config and logos.
+
+Each database is snapshotted with the SQLite online backup API a few pages
+at a time, so the app keeps writing while the backup runs and the copy is
+always consistent. Snapshots are streamed into a compressed zip together
+with a manifest.json that records the size and SHA-256 of every entry.
+"""
+import os
+import sys
+import json
+import sqlite3
+import hashlib
+import zipfile
+import tempfile
+import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from app.utils import get_asset_path, get_config_path, get_database_dir
+from .archive_service import ARCHIVE_FOLDER
+
+BACKUP_FOLDER = 'backups'
+MANIFEST_NAME = 'manifest.json'
+MANIFEST_FORMAT = 1
+BACKUP_PAGES_PER_STEP = 256     # pages copied per backup step before the lock is released
+BACKUP_STEP_SLEEP = 0.005       # seconds to yield to writers between steps
+MAX_SNAPSHOT_RESTARTS = 3       # paged copies restarted by writers before copying in one step
+STREAM_CHUNK_SIZE = 1024 * 1024
+
+# (done, total, current entry name)
+ProgressCallback = Callable[[int, int, str], None]
+
+
+def get_backup_dir() -> str:
+    backup_dir = os.path.join(get_database_dir(), BACKUP_FOLDER)
+    os.makedirs(backup_dir, exist_ok=True)
+    return backup_dir
+
+
+def list_databases(db_dir: Optional[str] = None) -> List[str]:
+    """Database files in the database directory, sorted by name, then the
+    monthly archives as 'archive/<file>' (see archive_service)."""
+    db_dir = db_dir or get_database_dir()
+    names = sorted(f for f in os.listdir(db_dir) if f.endswith('.db') and os.path.isfile(os.path.join(db_dir, f)))
+    archive_dir = os.path.join(db_dir, ARCHIVE_FOLDER)
+    if os.path.isdir(archive_dir):
+        names += sorted(f"{ARCHIVE_FOLDER}/{f}" for f in os.listdir(archive_dir) if f.endswith('.db'))
+    return names
+
+
+class _SnapshotRestarted(Exception):
+    pass
+
+
+def snapshot_database(src_path: str, dest_path: str) -> int:
+    """Copies a live database into dest_path. Returns its user_version.
+
+    The backup API copies BACKUP_PAGES_PER_STEP pages per step and sleeps in
+    between. Writers are only blocked for the length of a step. If the
+    source changes mid-copy, SQLite restarts the copy from the new state.
+    A database that keeps changing is copied in a single step instead, so
+    the backup cannot be starved by a steady stream of writes.
+    """
+    state = {'remaining': None, 'restarts': 0}
+
+    def on_progress(status, remaining, total):
+        if state['remaining'] is not None and remaining > state['remaining']:
+            state['restarts'] += 1
+            if state['restarts'] > MAX_SNAPSHOT_RESTARTS:
+                raise _SnapshotRestarted()
+        state['remaining'] = remaining
+
+    src = sqlite3.connect(src_path)
+    dest = sqlite3.connect(dest_path)
+    try:
+        try:
+            src.backup(dest, pages=BACKUP_PAGES_PER_STEP, progress=on_progress, sleep=BACKUP_STEP_SLEEP)
+        except _SnapshotRestarted:
+            src.backup(dest)
+        return dest.execute("PRAGMA user_version").fetchone()[0]
+    finally:
+        dest.close()
+        src.close()
+
+
+def _stream_into_zip(zf: zipfile.ZipFile, src_path: str, arcname: str) -> Dict[str, Any]:
+    """Writes a file into the archive in chunks and hashes it on the way."""
+    digest = hashlib.sha256()
+    size = 0
+    with open(src_path, 'rb') as src, zf.open(arcname, 'w', force_zip64=True) as dest:
+        while True:
+            chunk = src.read(STREAM_CHUNK_SIZE)
+            if not chunk:
+                break
+            digest.update(chunk)
+            dest.write(chunk)
+            size += len(chunk)
+    return {'name': arcname, 'size': size, 'sha256': digest.hexdigest()}
+
+
+def collect_extra_files(config_path: Optional[str] = None) -> List[Tuple[str, str]]:
+    """Returns (source path, archive name) pairs for config.yaml and custom logos."""
+    import yaml
+
+    config_path = config_path or get_config_path()
+    if not os.path.exists(config_path):
+        return []
+    extras = [(config_path, 'config.yaml')]
+    try:
+        with open(config_path, 'r', encoding='utf-8') as f:
+            config = yaml.safe_load(f) or {}
+    except Exception as e:
+        print(f"Warning reading config for backup: {e}")
+        return extras
+
+    for key in ('BRANDING_LOGO', 'REPORT_LOGO'):
+        logo_file = config.get(key)
+        if not logo_file:
+            continue
+        # Could be absolute or relative to assets
+        src_path = logo_file if os.path.isabs(logo_file) else get_asset_path(logo_file)
+        if os.path.exists(src_path):
+            extras.append((src_path, f"logos/{os.path.basename(logo_file)}"))
+    return extras
+
+
+def create_backup(dest_path: Optional[str] = None, progress_callback: Optional[ProgressCallback] = None,
+                  db_dir: Optional[str] = None, include_extras: bool = True) -> Dict[str, Any]:
+    """Writes a zip backup of every database plus config and logos.
+
+    The archive is written under a temporary name and renamed when complete,
+    so a failed backup never leaves a truncated zip behind.
+    Returns the manifest with the archive path added.
+    """
+    db_dir = db_dir or get_database_dir()
+    if dest_path is None:
+        timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+        dest_path = os.path.join(get_backup_dir(), f"manual_backup_{timestamp}.zip")
+
+    databases = list_databases(db_dir)
+    extras = collect_extra_files() if include_extras else []
+    total = len(databases) + len(extras)
+    manifest = {
+        'format': MANIFEST_FORMAT,
+        'created_at': datetime.datetime.now().isoformat(timespec='seconds'),
+        'platform': sys.platform,
+        'sqlite_version': sqlite3.sqlite_version,
+        'files': [],
+    }
+
+    partial_path = dest_path + '.partial'
+    done = 0
+    try:
+        with zipfile.ZipFile(partial_path, 'w', compression=zipfile.ZIP_DEFLATED, compresslevel=6) as zf:
+            with tempfile.TemporaryDirectory(prefix='pekocms_backup_') as tmp:
+                for db_name in databases:
+                    if progress_callback:
+                        progress_callback(done, total, db_name)
+                    snapshot_path = os.path.join(tmp, db_name)
+                    os.makedirs(os.path.dirname(snapshot_path), exist_ok=True)
+                    user_version = snapshot_database(os.path.join(db_dir, db_name), snapshot_path)
+                    entry = _stream_into_zip(zf, snapshot_path, db_name)
+                    entry.update(kind='database', user_version=user_version)
+                    manifest['files'].append(entry)
+                    os.remove(snapshot_path)
+                    done += 1
+
+            for src_path, arcname in extras:
+                if progress_callback:
+                    progress_callback(done, total, arcname)
+                entry = _stream_into_zip(zf, src_path, arcname)
+                entry['kind'] = 'config' if arcname == 'config.yaml' else 'logo'
+                manifest['files'].append(entry)
+                done += 1
+
+            zf.writestr(MANIFEST_NAME, json.dumps(manifest, indent=2))
+        os.replace(partial_path, dest_path)
+    except BaseException:
+        if os.path.exists(partial_path):
+            os.remove(partial_path)
+        raise
+
+    if progress_callback:
+        progress_callback(done, total, '')
+    manifest['path'] = dest_path
+    return manifest
+
+
+def read_manifest(zip_path: str) -> Optional[Dict[str, Any]]:
+    """Returns the manifest of a backup archive, or None for older backups without one."""
+    with zipfile.ZipFile(zip_path, 'r') as zf:
+        if MANIFEST_NAME not in zf.namelist():
+            return None
+        return json.loads(zf.read(MANIFEST_NAME))
@@ -0,0 +1,281 @@
+"""Incremental, deduplicated backups with a retention policy.
+
+Snapshots live in a content-addressed chunk store under
+`databases/backups/store`. Every file is split into fixed-size chunks that
+are aligned to SQLite pages and named by their SHA-256. A chunk is only
+written if the store does not have it yet. A snapshot is a small JSON file
+that lists each backed-up file's chunks in order. Unchanged files (same
+size and mtime as in the previous snapshot, including any WAL file) are
+not read at all. The cost of a snapshot therefore grows with the amount of
+changed data, not with the size of the databases.
+
+`prune_snapshots` applies an hourly/daily/weekly retention policy and
+removes chunks that no remaining snapshot refers to. `export_snapshot`
+rebuilds a regular backup zip (see backup_service) from any snapshot.
+"""
+import os
+import json
+import zlib
+import hashlib
+import zipfile
+import tempfile
+import datetime
+import threading
+from typing import Any, Dict, List, Optional, Set
+
+from . import backup_service
+from app.utils import get_database_dir
+
+STORE_FOLDER = 'store'
+CHUNK_SIZE = 64 * 1024          # a multiple of every SQLite page size, so page edits stay within one chunk
+CHUNK_COMPRESS_LEVEL = 6
+
+AUTO_BACKUP_INTERVAL_SECONDS = 3600
+AUTO_BACKUP_INITIAL_DELAY_SECONDS = 120
+
+# Retention: newest snapshot of each of the last N hours / days / ISO weeks
+RETENTION = {'hourly': 24, 'daily': 7, 'weekly': 8}
+
+# Manual and scheduled backups share one store; only one may write at a time,
+# and exports hold it too so a prune cannot remove chunks they are reading
+_store_lock = threading.Lock()
+
+
+def get_store_dir() -> str:
+    store_dir = os.path.join(backup_service.get_backup_dir(), STORE_FOLDER)
+    os.makedirs(os.path.join(store_dir, 'chunks'), exist_ok=True)
+    os.makedirs(os.path.join(store_dir, 'snapshots'), exist_ok=True)
+    return store_dir
+
+
+def _chunk_path(store_dir: str, digest: str) -> str:
+    return os.path.join(store_dir, 'chunks', digest[:2], digest)
+
+
+def _write_atomic(path: str, data: bytes) -> None:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+def _file_signature(path: str) -> List[int]:
+    """Size and mtime of a database and its WAL; equal signatures mean unchanged content."""
+    signature = []
+    for p in (path, path + '-wal'):
+        if os.path.exists(p):
+            st = os.stat(p)
+            signature += [st.st_size, st.st_mtime_ns]
+    return signature
+
+
+def _store_file(store_dir: str, path: str, stats: Dict[str, int]) -> Dict[str, Any]:
+    """Chunks a file into the store. Returns its size, SHA-256 and chunk list."""
+    file_digest = hashlib.sha256()
+    chunks = []
+    size = 0
+    with open(path, 'rb') as f:
+        while True:
+            data = f.read(CHUNK_SIZE)
+            if not data:
+                break
+            file_digest.update(data)
+            size += len(data)
+            digest = hashlib.sha256(data).hexdigest()
+            chunks.append(digest)
+            chunk_path = _chunk_path(store_dir, digest)
+            if not os.path.exists(chunk_path):
+                compressed = zlib.compress(data, CHUNK_COMPRESS_LEVEL)
+                _write_atomic(chunk_path, compressed)
+                stats['new_chunks'] += 1
+                stats['new_bytes'] += len(compressed)
+    return {'size': size, 'sha256': file_digest.hexdigest(), 'chunks': chunks}
+
+
+def list_snapshots() -> List[Dict[str, Any]]:
+    """All snapshots, newest first."""
+    snap_dir = os.path.join(get_store_dir(), 'snapshots')
+    snapshots = []
+    for name in os.listdir(snap_dir):
+        if not name.endswith('.json'):
+            continue
+        try:
+            with open(os.path.join(snap_dir, name), 'r', encoding='utf-8') as f:
+                snapshots.append(json.load(f))
+        except (OSError, ValueError) as e:
+            print(f"Warning: Skipping unreadable snapshot {name}: {e}")
+    return sorted(snapshots, key=lambda s: s['id'], reverse=True)
+
+
+def get_snapshot(snapshot_id: str) -> Dict[str, Any]:
+    with open(os.path.join(get_store_dir(), 'snapshots', f"{snapshot_id}.json"), 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def create_snapshot(db_dir: Optional[str] = None, progress_callback: Optional[backup_service.ProgressCallback] = None) -> Dict[str, Any]:
+    """Stores an incremental snapshot of every database, config and logo.
+
+    Returns the snapshot record, including how many new chunks and bytes
+    were written and how many files were reused unchanged.
+    """
+    db_dir = db_dir or get_database_dir()
+    with _store_lock:
+        store_dir = get_store_dir()
+        previous = list_snapshots()
+        previous_files = {f['name']: f for f in previous[0]['files']} if previous else {}
+
+        now = datetime.datetime.now()
+        snapshot = {
+            'id': now.strftime("%Y%m%d_%H%M%S_%f"),
+            'created_at': now.isoformat(timespec='seconds'),
+            'files': [],
+        }
+        stats = {'new_chunks': 0, 'new_bytes': 0, 'reused_files': 0}
+
+        databases = backup_service.list_databases(db_dir)
+        extras = backup_service.collect_extra_files()
+        total = len(databases) + len(extras)
+        done = 0
+
+        with tempfile.TemporaryDirectory(prefix='pekocms_snapshot_') as tmp:
+            for db_name in databases:
+                if progress_callback:
+                    progress_callback(done, total, db_name)
+                src_path = os.path.join(db_dir, db_name)
+                signature = _file_signature(src_path)
+                prior = previous_files.get(db_name)
+                if prior and prior.get('signature') == signature:
+                    entry = dict(prior)
+                    stats['reused_files'] += 1
+                else:
+                    snapshot_path = os.path.join(tmp, db_name)
+                    os.makedirs(os.path.dirname(snapshot_path), exist_ok=True)
+                    user_version = backup_service.snapshot_database(src_path, snapshot_path)
+                    entry = _store_file(store_dir, snapshot_path, stats)
+                    entry.update(name=db_name, kind='database', user_version=user_version, signature=signature)
+                    os.remove(snapshot_path)
+                snapshot['files'].append(entry)
+                done += 1
+
+        for src_path, arcname in extras:
+            if progress_callback:
+                progress_callback(done, total, arcname)
+            signature = _file_signature(src_path)
+            prior = previous_files.get(arcname)
+            if prior and prior.get('signature') == signature:
+                entry = dict(prior)
+                stats['reused_files'] += 1
+            else:
+                entry = _store_file(store_dir, src_path, stats)
+                entry.update(name=arcname, kind='config' if arcname == 'config.yaml' else 'logo', signature=signature)
+            snapshot['files'].append(entry)
+            done += 1
+
+        snapshot.update(stats)
+        # Chunks are on disk before the snapshot that refers to them
+        _write_atomic(os.path.join(store_dir, 'snapshots', f"{snapshot['id']}.json"),
+                      json.dumps(snapshot).encode('utf-8'))
+
+    if progress_callback:
+        progress_callback(done, total, '')
+    return snapshot
+
+
+def select_retained(snapshots: List[Dict[str, Any]], retention: Optional[Dict[str, int]] = None) -> Set[str]:
+    """Ids of the snapshots a retention policy keeps. `snapshots` must be newest first.
+
+    The newest snapshot is always kept. For each period, the newest snapshot
+    in each of the last N distinct hours, days or ISO weeks is kept.
+    """
+    retention = retention or RETENTION
+    buckets = {
+        'hourly': lambda t: t.strftime('%Y-%m-%d %H'),
+        'daily': lambda t: t.strftime('%Y-%m-%d'),
+        'weekly': lambda t: '%d-W%02d' % t.isocalendar()[:2],
+    }
+    keep = {snapshots[0]['id']} if snapshots else set()
+    for period, count in retention.items():
+        seen = set()
+        for snap in snapshots:
+            bucket = buckets[period](datetime.datetime.fromisoformat(snap['created_at']))
+            if bucket in seen:
+                continue
+            if len(seen) >= count:
+                break
+            seen.add(bucket)
+            keep.add(snap['id'])
+    return keep
+
+
+def prune_snapshots(retention: Optional[Dict[str, int]] = None) -> Dict[str, int]:
+    """Deletes snapshots outside the retention policy and chunks nothing refers to."""
+    with _store_lock:
+        store_dir = get_store_dir()
+        snapshots = list_snapshots()
+        keep = select_retained(snapshots, retention)
+
+        removed_snapshots = 0
+        for snap in snapshots:
+            if snap['id'] not in keep:
+                os.remove(os.path.join(store_dir, 'snapshots', f"{snap['id']}.json"))
+                removed_snapshots += 1
+
+        referenced = {c for snap in snapshots if snap['id'] in keep for f in snap['files'] for c in f['chunks']}
+        removed_chunks = 0
+        chunk_root = os.path.join(store_dir, 'chunks')
+        for prefix in os.listdir(chunk_root):
+            prefix_dir = os.path.join(chunk_root, prefix)
+            for name in os.listdir(prefix_dir):
+                if name not in referenced:
+                    os.remove(os.path.join(prefix_dir, name))
+                    removed_chunks += 1
+        return {'removed_snapshots': removed_snapshots, 'removed_chunks': removed_chunks, 'kept': len(keep)}
+
+
+def run_automatic_backup() -> Dict[str, Any]:
+    """Scheduled job: takes a snapshot, then applies the retention policy."""
+    snapshot = create_snapshot()
+    snapshot['pruned'] = prune_snapshots()
+    return snapshot
+
+
+def iter_file_chunks(file_entry: Dict[str, Any], store_dir: Optional[str] = None):
+    """Yields the decompressed content of a snapshot file, chunk by chunk."""
+    store_dir = store_dir or get_store_dir()
+    for digest in file_entry['chunks']:
+        with open(_chunk_path(store_dir, digest), 'rb') as f:
+            yield zlib.decompress(f.read())
+
+
+def export_snapshot(snapshot_id: str, dest_path: str) -> Dict[str, Any]:
+    """Rebuilds a regular backup zip (with manifest) from a stored snapshot."""
+    with _store_lock:
+        snapshot = get_snapshot(snapshot_id)
+        store_dir = get_store_dir()
+        manifest = {
+            'format': backup_service.MANIFEST_FORMAT,
+            'created_at': snapshot['created_at'],
+            'snapshot_id': snapshot_id,
+            'files': [],
+        }
+        partial_path = dest_path + '.partial'
+        try:
+            with zipfile.ZipFile(partial_path, 'w', compression=zipfile.ZIP_DEFLATED, compresslevel=6) as zf:
+                for file_entry in snapshot['files']:
+                    digest = hashlib.sha256()
+                    with zf.open(file_entry['name'], 'w', force_zip64=True) as dest:
+                        for data in iter_file_chunks(file_entry, store_dir):
+                            digest.update(data)
+                            dest.write(data)
+                    if digest.hexdigest() != file_entry['sha256']:
+                        raise ValueError(f"Snapshot {snapshot_id} is damaged: checksum mismatch for {file_entry['name']}")
+                    manifest['files'].append({k: file_entry[k] for k in ('name', 'size', 'sha256', 'kind', 'user_version') if k in file_entry})
+                zf.writestr(backup_service.MANIFEST_NAME, json.dumps(manifest, indent=2))
+            os.replace(partial_path, dest_path)
+        except BaseException:
+            if os.path.exists(partial_path):
+                os.remove(partial_path)
+            raise
+    manifest['path'] = dest_path
+    return manifest
@@ -0,0 +1,95 @@
+"""Bounded in-memory LRU caches for records read again and again.
+
+At the billing counter the same patients come back within minutes and a
+few dozen tests make up most invoice lines. The owning db module reads
+those records through an LRUCache and invalidates entries from its own
+write paths, so a cached record is never older than the last write made
+by this application.
+
+Every cache counts its hits and misses; `all_stats()` reports them for
+each cache created, for display in the admin panel.
+"""
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, List, Optional
+
+_registry: List['LRUCache'] = []
+_registry_lock = threading.Lock()
+
+
+class LRUCache:
+    """Thread-safe mapping holding at most `maxsize` entries, dropping the least recently used.
+
+    `None` is never cached, so a record that does not exist yet is looked up
+    again next time.
+    """
+
+    def __init__(self, name: str, maxsize: int):
+        self.name = name
+        self.maxsize = maxsize
+        self._data: 'OrderedDict[Hashable, Any]' = OrderedDict()
+        self._lock = threading.Lock()
+        # Bumped by every invalidation, so a value loaded meanwhile is not stored
+        self._generation = 0
+        self.hits = 0
+        self.misses = 0
+        with _registry_lock:
+            _registry.append(self)
+
+    def get(self, key: Hashable, loader: Callable[[], Any]) -> Any:
+        """The cached value for `key`, calling `loader()` to fetch and store it on a miss."""
+        with self._lock:
+            if key in self._data:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return self._data[key]
+            self.misses += 1
+            generation = self._generation
+        # Loaded outside the lock so a slow query does not block other readers
+        value = loader()
+        if value is not None:
+            with self._lock:
+                if generation == self._generation:
+                    self._store(key, value)
+        return value
+
+    def put(self, key: Hashable, value: Any) -> None:
+        with self._lock:
+            self._store(key, value)
+
+    def _store(self, key: Hashable, value: Any) -> None:
+        self._data[key] = value
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def invalidate(self, *keys: Hashable) -> None:
+        with self._lock:
+            self._generation += 1
+            for key in keys:
+                self._data.pop(key, None)
+
+    def clear(self) -> None:
+        """Drops every entry (e.g. after a bulk write or a restore); the counters are kept."""
+        with self._lock:
+            self._generation += 1
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    @property
+    def hit_rate(self) -> Optional[float]:
+        """Share of lookups served from the cache, or None before the first lookup."""
+        total = self.hits + self.misses
+        return self.hits / total if total else None
+
+    def stats(self) -> Dict[str, Any]:
+        return {'name': self.name, 'size': len(self._data), 'maxsize': self.maxsize,
+                'hits': self.hits, 'misses': self.misses, 'hit_rate': self.hit_rate}
+
+
+def all_stats() -> List[Dict[str, Any]]:
+    """Size and hit counters of every cache, in creation order."""
+    with _registry_lock:
+        return [c.stats() for c in _registry]
@@ -1,12 +1,46 @@
 import sqlite3
 import json
+import math
 import os
-from typing import List, Dict, Any, Optional
+import re
+import hashlib
+import datetime
+from typing import List, Dict, Any, Optional, Iterable
+
+from . import cache, fts
 
 # Get path to databases folder
 from app.utils import get_database_dir
 DB_DIR = get_database_dir()
 DB_NAME = os.path.join(DB_DIR, 'catalogue.db')
+FTS_TABLE = 'catalogue_fts'
+# Tests most often added to invoices, by testCode (see get_test_row)
+TEST_CACHE_SIZE = 256
+_test_cache = cache.LRUCache('catalogue_tests', TEST_CACHE_SIZE)
+
+# Typed columns filled from each test dict, in insert order
+TEST_COLUMNS = [
+    'testCode', 'testName', 'testFees', 'CategoryName', 'SampleType', 'SampleVolume',
+    'FastingRequired', 'PatientConsentForm', 'ReportedOn', 'isActive', 'MethodName',
+    'ProcessingDepartment', 'ClinicalUse'
+]
+_ALL_COLUMNS = TEST_COLUMNS + ['raw_data', 'raw_hash', 'isDeleted', 'updated_at']
+
+_UPSERT_SQL = """
+    INSERT INTO catalogue ({cols}) VALUES ({marks})
+    ON CONFLICT(testCode) DO UPDATE SET {updates}
+""".format(
+    cols=', '.join(_ALL_COLUMNS),
+    marks=', '.join('?' for _ in _ALL_COLUMNS),
+    updates=', '.join(f"{c} = excluded.{c}" for c in _ALL_COLUMNS if c != 'testCode')
+)
+
+STAGING_TABLE = 'catalogue_staging'
+STAGING_BATCH_SIZE = 1000
+
+# Index names are global in SQLite and survive a table rename, so the staging
+# table alternates between these suffixes on every refresh.
+_NAME_INDEX_PREFIX = 'idx_catalogue_name_'
 
 def _get_db_connection() -> sqlite3.Connection:
     """Establishes a connection to the catalogue database."""
@@ -14,6 +48,30 @@ def _get_db_connection() -> sqlite3.Connection:
     conn.row_factory = sqlite3.Row
     return conn
 
+def _serialize_test(test_data: Dict[str, Any]):
+    """Returns (raw_data, raw_hash) for a test. Keys are sorted so the hash is stable."""
+    raw = json.dumps(test_data, sort_keys=True)
+    return raw, hashlib.sha1(raw.encode('utf-8')).hexdigest()
+
+def _insert_sync_run(cursor: sqlite3.Cursor, source: str, status: str, started: datetime.datetime,
+                     stats: Optional[Dict[str, int]] = None, row_count: Optional[int] = None,
+                     error: Optional[str] = None) -> None:
+    """Appends a row to the sync history using the caller's cursor/transaction."""
+    finished = datetime.datetime.now()
+    stats = stats or {}
+    cursor.execute("""
+        INSERT INTO sync_runs (started_at, finished_at, received, inserted, updated, unchanged, deleted,
+                               source, status, duration_ms, row_count, error)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    """, (started.isoformat(), finished.isoformat(), stats.get('received', 0), stats.get('inserted', 0),
+          stats.get('updated', 0), stats.get('unchanged', 0), stats.get('deleted', 0),
+          source, status, int((finished - started).total_seconds() * 1000), row_count, error))
+
+def _row_values(test_data: Dict[str, Any], raw: str, raw_hash: str, now: str) -> tuple:
+    values = [test_data.get(c) for c in TEST_COLUMNS]
+    values[2] = test_data.get('testFees', 0)
+    return tuple(values) + (raw, raw_hash, 0, now)
+
 def init_db() -> None:
     """Initializes the catalogue database and creates tables if needed."""
     conn = _get_db_connection()
@@ -40,7 +98,68 @@ def init_db() -> None:
             )
         """)
         
+        # Schema Migration: change tracking for diff-based syncs
+        cursor.execute("PRAGMA table_info(catalogue)")
+        existing_columns = [col['name'] for col in cursor.fetchall()]
+        if 'raw_hash' not in existing_columns:
+            print("Catalogue DB Migration: Adding column 'raw_hash'...")
+            cursor.execute("ALTER TABLE catalogue ADD COLUMN raw_hash TEXT")
+        if 'isDeleted' not in existing_columns:
+            print("Catalogue DB Migration: Adding column 'isDeleted'...")
+            cursor.execute("ALTER TABLE catalogue ADD COLUMN isDeleted INTEGER NOT NULL DEFAULT 0")
+        if 'updated_at' not in existing_columns:
+            print("Catalogue DB Migration: Adding column 'updated_at'...")
+            cursor.execute("ALTER TABLE catalogue ADD COLUMN updated_at TEXT")
+        
+        # Stats for each sync run
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS sync_runs (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                started_at TEXT NOT NULL,
+                finished_at TEXT NOT NULL,
+                received INTEGER NOT NULL DEFAULT 0,
+                inserted INTEGER NOT NULL DEFAULT 0,
+                updated INTEGER NOT NULL DEFAULT 0,
+                unchanged INTEGER NOT NULL DEFAULT 0,
+                deleted INTEGER NOT NULL DEFAULT 0
+            )
+        """)
+        cursor.execute("PRAGMA table_info(sync_runs)")
+        run_columns = [col['name'] for col in cursor.fetchall()]
+        for column, definition in [
+            ('source', "TEXT NOT NULL DEFAULT 'diff'"),
+            ('status', "TEXT NOT NULL DEFAULT 'success'"),
+            ('duration_ms', "INTEGER"),
+            ('row_count', "INTEGER"),
+            ('error', "TEXT"),
+        ]:
+            if column not in run_columns:
+                cursor.execute(f"ALTER TABLE sync_runs ADD COLUMN {column} {definition}")
+        
+        # Progress of resumable imports from in-process catalogue sources
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS import_checkpoints (
+                source TEXT PRIMARY KEY,
+                snapshot_id TEXT NOT NULL,
+                position INTEGER NOT NULL DEFAULT 0,
+                status TEXT NOT NULL,
+                updated_at TEXT NOT NULL
+            )
+        """)
+        
+        if _name_index_suffix(cursor, 'catalogue') is None:
+            cursor.execute(f"CREATE INDEX IF NOT EXISTS {_NAME_INDEX_PREFIX}a ON catalogue (isDeleted, testName)")
+        
+        # Used by the unified search (search_service)
+        fts.create_index(cursor, 'catalogue', FTS_TABLE, ['testCode', 'testName'])
+        _init_term_index(cursor)
+        
         conn.commit()
+        
+        # WAL lets searches keep reading the last committed catalogue while a sync writes
+        cursor.execute("PRAGMA journal_mode=WAL")
+        # A restore may have replaced the database
+        _test_cache.clear()
     except sqlite3.Error as e:
         print(f"Catalogue DB initialization error: {e}")
     finally:
@@ -51,68 +170,307 @@ def add_or_update_test(test_data: Dict[str, Any]) -> None:
     conn = _get_db_connection()
     try:
         cursor = conn.cursor()
-        cursor.execute("""
-            INSERT OR REPLACE INTO catalogue 
-            (testCode, testName, testFees, CategoryName, SampleType, SampleVolume, 
-             FastingRequired, PatientConsentForm, ReportedOn, isActive, MethodName, 
-             ProcessingDepartment, ClinicalUse, raw_data)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        """, (
-            test_data.get('testCode'),
-            test_data.get('testName'),
-            test_data.get('testFees', 0),
-            test_data.get('CategoryName'),
-            test_data.get('SampleType'),
-            test_data.get('SampleVolume'),
-            test_data.get('FastingRequired'),
-            test_data.get('PatientConsentForm'),
-            test_data.get('ReportedOn'),
-            test_data.get('isActive'),
-            test_data.get('MethodName'),
-            test_data.get('ProcessingDepartment'),
-            test_data.get('ClinicalUse'),
-            json.dumps(test_data)
-        ))
+        raw, raw_hash = _serialize_test(test_data)
+        cursor.execute(_UPSERT_SQL, _row_values(test_data, raw, raw_hash, datetime.datetime.now().isoformat()))
+        _index_test_terms(cursor, [test_data.get('testCode')])
         conn.commit()
+        _test_cache.invalidate(test_data.get('testCode'))
     except sqlite3.Error as e:
         print(f"Error adding test to catalogue DB: {e}")
     finally:
         conn.close()
 
-def bulk_add_or_update_tests(tests: List[Dict[str, Any]]) -> None:
-    """Bulk insert or update tests. Clears old entries and adds new ones."""
+def sync_tests(tests: List[Dict[str, Any]]) -> Dict[str, int]:
+    """Applies a full catalogue snapshot as a diff against the stored rows.
+
+    Only new or changed tests (by hash of their raw data) are written, codes
+    missing from the snapshot are soft-deleted, and everything happens in one
+    transaction so readers see either the old or the new catalogue. An empty
+    snapshot is treated as a failed fetch and leaves the catalogue untouched.
+    Returns the sync stats, which are also recorded in `sync_runs`.
+    """
+    started = datetime.datetime.now()
+    stats = {'received': len(tests), 'inserted': 0, 'updated': 0, 'unchanged': 0, 'deleted': 0}
     conn = _get_db_connection()
     try:
         cursor = conn.cursor()
-        # Clear old catalogue
-        cursor.execute("DELETE FROM catalogue")
-        # Insert new tests
+        cursor.execute("SELECT testCode, raw_hash, isDeleted FROM catalogue")
+        existing = {row['testCode']: (row['raw_hash'], row['isDeleted']) for row in cursor.fetchall()}
+
+        now = datetime.datetime.now().isoformat()
+        changed = []
+        seen = set()
         for test_data in tests:
-            cursor.execute("""
-                INSERT INTO catalogue 
-                (testCode, testName, testFees, CategoryName, SampleType, SampleVolume, 
-                 FastingRequired, PatientConsentForm, ReportedOn, isActive, MethodName, 
-                 ProcessingDepartment, ClinicalUse, raw_data)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """, (
-                test_data.get('testCode'),
-                test_data.get('testName'),
-                test_data.get('testFees', 0),
-                test_data.get('CategoryName'),
-                test_data.get('SampleType'),
-                test_data.get('SampleVolume'),
-                test_data.get('FastingRequired'),
-                test_data.get('PatientConsentForm'),
-                test_data.get('ReportedOn'),
-                test_data.get('isActive'),
-                test_data.get('MethodName'),
-                test_data.get('ProcessingDepartment'),
-                test_data.get('ClinicalUse'),
-                json.dumps(test_data)
-            ))
+            code = test_data.get('testCode')
+            if not code or code in seen:
+                continue
+            seen.add(code)
+            raw, raw_hash = _serialize_test(test_data)
+            previous = existing.get(code)
+            if previous is None:
+                stats['inserted'] += 1
+            elif previous[0] == raw_hash and not previous[1]:
+                stats['unchanged'] += 1
+                continue
+            else:
+                stats['updated'] += 1
+            changed.append(_row_values(test_data, raw, raw_hash, now))
+
+        missing = []
+        if seen:
+            missing = [(now, code) for code, (_, deleted) in existing.items() if not deleted and code not in seen]
+        stats['deleted'] = len(missing)
+
+        with conn:
+            cursor.executemany(_UPSERT_SQL, changed)
+            cursor.executemany("UPDATE catalogue SET isDeleted = 1, updated_at = ? WHERE testCode = ?", missing)
+            _index_test_terms(cursor, [row[0] for row in changed] + [code for _, code in missing])
+            cursor.execute("SELECT COUNT(*) AS cnt FROM catalogue WHERE isDeleted = 0")
+            _insert_sync_run(cursor, 'diff', 'success', started, stats, cursor.fetchone()['cnt'])
+        _test_cache.invalidate(*[row[0] for row in changed], *[code for _, code in missing])
+    except sqlite3.Error as e:
+        print(f"Error syncing catalogue DB: {e}")
+    finally:
+        conn.close()
+    return stats
+
+def _name_index_suffix(cursor: sqlite3.Cursor, table: str) -> Optional[str]:
+    """Returns the suffix ('a' or 'b') of the name index on a table, if present."""
+    cursor.execute(
+        "SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = ? AND name LIKE ?",
+        (table, _NAME_INDEX_PREFIX + '%')
+    )
+    row = cursor.fetchone()
+    return row['name'][len(_NAME_INDEX_PREFIX):] if row else None
+
+def begin_staging() -> None:
+    """Creates an empty staging table for a full catalogue refresh."""
+    conn = _get_db_connection()
+    try:
+        cursor = conn.cursor()
+        cursor.execute(f"DROP TABLE IF EXISTS {STAGING_TABLE}")
+        cursor.execute(f"""
+            CREATE TABLE {STAGING_TABLE} (
+                testCode TEXT PRIMARY KEY,
+                testName TEXT NOT NULL,
+                testFees REAL NOT NULL,
+                CategoryName TEXT,
+                SampleType TEXT,
+                SampleVolume TEXT,
+                FastingRequired TEXT,
+                PatientConsentForm TEXT,
+                ReportedOn TEXT,
+                isActive TEXT,
+                MethodName TEXT,
+                ProcessingDepartment TEXT,
+                ClinicalUse TEXT,
+                raw_data TEXT,
+                raw_hash TEXT,
+                isDeleted INTEGER NOT NULL DEFAULT 0,
+                updated_at TEXT
+            )
+        """)
+        conn.commit()
+    finally:
+        conn.close()
+
+def _insert_staging(cursor: sqlite3.Cursor, tests: Iterable[Dict[str, Any]], now: str) -> int:
+    insert_sql = f"INSERT OR REPLACE INTO {STAGING_TABLE} ({', '.join(_ALL_COLUMNS)}) VALUES ({', '.join('?' for _ in _ALL_COLUMNS)})"
+    rows = []
+    for test_data in tests:
+        if not test_data.get('testCode'):
+            continue
+        raw, raw_hash = _serialize_test(test_data)
+        rows.append(_row_values(test_data, raw, raw_hash, now))
+    cursor.executemany(insert_sql, rows)
+    return len(rows)
+
+def stage_tests(tests: Iterable[Dict[str, Any]]) -> int:
+    """Writes tests into the staging table in batches. Readers never see these rows."""
+    now = datetime.datetime.now().isoformat()
+    staged = 0
+    conn = _get_db_connection()
+    try:
+        cursor = conn.cursor()
+        batch = []
+        for test_data in tests:
+            batch.append(test_data)
+            if len(batch) >= STAGING_BATCH_SIZE:
+                staged += _insert_staging(cursor, batch, now)
+                conn.commit()
+                batch = []
+        if batch:
+            staged += _insert_staging(cursor, batch, now)
+            conn.commit()
+        return staged
+    finally:
+        conn.close()
+
+def stage_batch(tests: List[Dict[str, Any]], source: str, snapshot_id: str, position: int) -> int:
+    """Stages one batch and advances the source's import checkpoint in the same transaction.
+
+    `position` is the number of source records consumed so far, so an
+    interrupted import can resume from exactly where the last batch ended.
+    """
+    conn = _get_db_connection()
+    try:
+        cursor = conn.cursor()
+        now = datetime.datetime.now().isoformat()
+        staged = _insert_staging(cursor, tests, now)
+        cursor.execute("""
+            INSERT OR REPLACE INTO import_checkpoints (source, snapshot_id, position, status, updated_at)
+            VALUES (?, ?, ?, 'staging', ?)
+        """, (source, snapshot_id, position, now))
+        conn.commit()
+        return staged
+    finally:
+        conn.close()
+
+def staging_exists() -> bool:
+    """Returns True if a staging table from an unfinished refresh is present."""
+    conn = _get_db_connection()
+    try:
+        cursor = conn.cursor()
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (STAGING_TABLE,))
+        return cursor.fetchone() is not None
+    finally:
+        conn.close()
+
+def get_import_checkpoint(source: str) -> Optional[Dict[str, Any]]:
+    """Returns the import checkpoint for a catalogue source, if any."""
+    conn = _get_db_connection()
+    try:
+        cursor = conn.cursor()
+        cursor.execute("SELECT * FROM import_checkpoints WHERE source = ?", (source,))
+        row = cursor.fetchone()
+        return dict(row) if row else None
+    finally:
+        conn.close()
+
+def set_import_checkpoint(source: str, snapshot_id: str, position: int, status: str) -> None:
+    """Records the import state ('staging' or 'done') for a catalogue source."""
+    conn = _get_db_connection()
+    try:
+        conn.execute("""
+            INSERT OR REPLACE INTO import_checkpoints (source, snapshot_id, position, status, updated_at)
+            VALUES (?, ?, ?, ?, ?)
+        """, (source, snapshot_id, position, status, datetime.datetime.now().isoformat()))
+        conn.commit()
+    finally:
+        conn.close()
+
+def discard_staging() -> None:
+    """Drops the staging table without touching the live catalogue."""
+    conn = _get_db_connection()
+    try:
+        conn.execute(f"DROP TABLE IF EXISTS {STAGING_TABLE}")
+        conn.commit()
+    finally:
+        conn.close()
+
+def commit_staging(source: str = 'refresh') -> int:
+    """Indexes the staging table and swaps it in place of the live catalogue.
+
+    Indexes are built before the swap, so the write lock is only held for two
+    table renames. Readers keep their WAL snapshot of the old table until they
+    finish. An empty staging table is discarded instead of swapped in.
+    Returns the number of tests in the new catalogue.
+    """
+    conn = _get_db_connection()
+    try:
+        cursor = conn.cursor()
+        cursor.execute(f"SELECT COUNT(*) AS cnt FROM {STAGING_TABLE}")
+        count = cursor.fetchone()['cnt']
+        if count == 0:
+            cursor.execute(f"DROP TABLE {STAGING_TABLE}")
+            conn.commit()
+            return 0
+
+        suffix = 'b' if _name_index_suffix(cursor, 'catalogue') == 'a' else 'a'
+        cursor.execute(f"DROP INDEX IF EXISTS {_NAME_INDEX_PREFIX}{suffix}")
+        cursor.execute(f"CREATE INDEX {_NAME_INDEX_PREFIX}{suffix} ON {STAGING_TABLE} (isDeleted, testName)")
+        conn.commit()
+
+        started = datetime.datetime.now()
+        cursor.execute("BEGIN IMMEDIATE")
+        try:
+            cursor.execute("SELECT COUNT(*) AS cnt FROM catalogue WHERE isDeleted = 0")
+            previous = cursor.fetchone()['cnt']
+            cursor.execute("DROP TABLE IF EXISTS catalogue_old")
+            # The full-text triggers would follow the old table; re-create them on the new one
+            fts.drop_triggers(cursor, FTS_TABLE)
+            cursor.execute("ALTER TABLE catalogue RENAME TO catalogue_old")
+            cursor.execute(f"ALTER TABLE {STAGING_TABLE} RENAME TO catalogue")
+            fts.create_index(cursor, 'catalogue', FTS_TABLE, ['testCode', 'testName'])
+            _insert_sync_run(cursor, source, 'success', started,
+                             {'received': count, 'inserted': count, 'deleted': previous}, count)
+            conn.commit()
+            _test_cache.clear()
+        except sqlite3.Error:
+            conn.rollback()
+            raise
+
+        # Dropping the old pages is slow on big tables; do it outside the swap
+        cursor.execute("DROP TABLE IF EXISTS catalogue_old")
         conn.commit()
+        # Fuzzy search terms for the new catalogue; lookups skip codes no longer in it meanwhile
+        _rebuild_term_index(cursor)
+        conn.commit()
+        return count
+    finally:
+        conn.close()
+
+def refresh_catalogue(tests: Iterable[Dict[str, Any]]) -> int:
+    """Replaces the whole catalogue via a staging table and an atomic swap."""
+    try:
+        begin_staging()
+        stage_tests(tests)
+        return commit_staging()
+    except sqlite3.Error as e:
+        print(f"Error refreshing catalogue DB: {e}")
+        discard_staging()
+        return 0
+
+def bulk_add_or_update_tests(tests: List[Dict[str, Any]]) -> None:
+    """Bulk insert or update tests. Kept for compatibility; delegates to sync_tests."""
+    sync_tests(tests)
+
+def get_last_sync_run() -> Optional[Dict[str, Any]]:
+    """Returns the stats of the most recent catalogue sync, if any."""
+    conn = _get_db_connection()
+    try:
+        cursor = conn.cursor()
+        cursor.execute("SELECT * FROM sync_runs ORDER BY id DESC LIMIT 1")
+        row = cursor.fetchone()
+        return dict(row) if row else None
     except sqlite3.Error as e:
-        print(f"Error bulk adding tests to catalogue DB: {e}")
+        print(f"Error reading catalogue sync stats: {e}")
+        return None
+    finally:
+        conn.close()
+
+def record_sync_run(source: str, status: str, started: datetime.datetime,
+                    row_count: Optional[int] = None, error: Optional[str] = None) -> None:
+    """Records a sync run performed outside this module (e.g. by the sync worker)."""
+    conn = _get_db_connection()
+    try:
+        _insert_sync_run(conn.cursor(), source, status, started, row_count=row_count, error=error)
+        conn.commit()
+    except sqlite3.Error as e:
+        print(f"Error recording catalogue sync run: {e}")
+    finally:
+        conn.close()
+
+def get_sync_history(limit: int = 20) -> List[Dict[str, Any]]:
+    """Returns the most recent sync runs, newest first."""
+    conn = _get_db_connection()
+    try:
+        cursor = conn.cursor()
+        cursor.execute("SELECT * FROM sync_runs ORDER BY id DESC LIMIT ?", (limit,))
+        return [dict(r) for r in cursor.fetchall()]
+    except sqlite3.Error as e:
+        print(f"Error reading catalogue sync history: {e}")
+        return []
     finally:
         conn.close()
 
@@ -121,7 +479,7 @@ def get_all_tests() -> List[Dict[str, Any]]:
     conn = _get_db_connection()
     try:
         cursor = conn.cursor()
-        cursor.execute("SELECT raw_data FROM catalogue ORDER BY testName ASC")
+        cursor.execute("SELECT raw_data FROM catalogue WHERE isDeleted = 0 ORDER BY testName ASC")
         rows = cursor.fetchall()
         tests = []
         for row in rows:
@@ -143,7 +501,7 @@ def get_test_count() -> int:
     conn = _get_db_connection()
     try:
         cursor = conn.cursor()
-        cursor.execute("SELECT COUNT(*) as cnt FROM catalogue")
+        cursor.execute("SELECT COUNT(*) as cnt FROM catalogue WHERE isDeleted = 0")
         row = cursor.fetchone()
         return row['cnt'] if row else 0
     except sqlite3.Error as e:
@@ -160,7 +518,7 @@ def search_tests(query: str) -> List[Dict[str, Any]]:
         q = f"%{query.lower()}%"
         cursor.execute("""
             SELECT raw_data FROM catalogue 
-            WHERE LOWER(testCode) LIKE ? OR LOWER(testName) LIKE ?
+            WHERE isDeleted = 0 AND (LOWER(testCode) LIKE ? OR LOWER(testName) LIKE ?)
             ORDER BY testName ASC
         """, (q, q))
         rows = cursor.fetchall()
@@ -185,7 +543,7 @@ def get_test(test_code: str) -> Optional[Dict[str, Any]]:
         cursor = conn.cursor()
         cursor.execute("""
             SELECT raw_data FROM catalogue 
-            WHERE testCode = ?
+            WHERE testCode = ? AND isDeleted = 0
         """, (test_code,))
         row = cursor.fetchone()
         if row:
@@ -199,3 +557,302 @@ def get_test(test_code: str) -> Optional[Dict[str, Any]]:
         return None
     finally:
         conn.close()
+
+# --- Typed read paths ---
+# The invoice search table and test selection only need these four columns,
+# so they are read straight from the typed columns without touching raw_data.
+# Use get_test() when the full record is needed (e.g. a detail view).
+
+class CatalogueRow:
+    """Lightweight projection of a catalogue test for lists and selection."""
+    __slots__ = ('testCode', 'testName', 'testFees', 'FastingRequired')
+
+    def __init__(self, testCode: str, testName: str, testFees: float, FastingRequired: Optional[str]):
+        self.testCode = testCode
+        self.testName = testName
+        self.testFees = testFees or 0
+        self.FastingRequired = FastingRequired
+
+    @property
+    def is_fasting(self) -> bool:
+        return (self.FastingRequired or '').lower() == 'yes'
+
+    def __repr__(self) -> str:
+        return f"CatalogueRow({self.testCode!r}, {self.testName!r}, {self.testFees!r})"
+
+_ROW_COLUMNS = "testCode, testName, testFees, FastingRequired"
+
+def _row_cursor(conn: sqlite3.Connection) -> sqlite3.Cursor:
+    cursor = conn.cursor()
+    cursor.row_factory = lambda _cursor, row: CatalogueRow(*row)
+    return cursor
+
+def get_all_test_rows() -> List[CatalogueRow]:
+    """Retrieves all tests as CatalogueRow objects."""
+    conn = _get_db_connection()
+    try:
+        cursor = _row_cursor(conn)
+        cursor.execute(f"SELECT {_ROW_COLUMNS} FROM catalogue WHERE isDeleted = 0 ORDER BY testName ASC")
+        return cursor.fetchall()
+    except sqlite3.Error as e:
+        print(f"Error fetching from catalogue DB: {e}")
+        return []
+    finally:
+        conn.close()
+
+def search_test_rows(query: str) -> List[CatalogueRow]:
+    """Search tests by code or name (case-insensitive), returning CatalogueRow objects."""
+    conn = _get_db_connection()
+    try:
+        cursor = _row_cursor(conn)
+        q = f"%{query.lower()}%"
+        cursor.execute(f"""
+            SELECT {_ROW_COLUMNS} FROM catalogue
+            WHERE isDeleted = 0 AND (LOWER(testCode) LIKE ? OR LOWER(testName) LIKE ?)
+            ORDER BY testName ASC
+        """, (q, q))
+        return cursor.fetchall()
+    except sqlite3.Error as e:
+        print(f"Error searching catalogue DB: {e}")
+        return []
+    finally:
+        conn.close()
+
+def get_test_row(test_code: str) -> Optional[CatalogueRow]:
+    """Get a single test by test code as a CatalogueRow, from the hot-test cache when possible."""
+    return _test_cache.get(test_code, lambda: _load_test_row(test_code))
+
+def _load_test_row(test_code: str) -> Optional[CatalogueRow]:
+    conn = _get_db_connection()
+    try:
+        cursor = _row_cursor(conn)
+        cursor.execute(f"SELECT {_ROW_COLUMNS} FROM catalogue WHERE testCode = ? AND isDeleted = 0", (test_code,))
+        return cursor.fetchone()
+    except sqlite3.Error as e:
+        print(f"Error getting test from catalogue DB: {e}")
+        return None
+    finally:
+        conn.close()
+
+# --- Fuzzy matching ---
+# Every test name and alias is a "term". Each term's trigrams (per word,
+# padded like "  he", " he", "hem", ..., "in ") are stored in catalogue_trigrams,
+# keyed by trigram, so candidates for a misspelled query are found with
+# index lookups on the query's trigrams and then re-ranked by edit distance.
+# Aliases come from the test record ('Aliases' or 'Synonyms', a list or a
+# comma separated string) and from catalogue_aliases, which staff maintain.
+
+FUZZY_LIMIT = 10
+FUZZY_CANDIDATES = 30           # trigram candidates re-ranked by edit distance
+FUZZY_MIN_COVERAGE = 0.4        # share of the query's trigrams a term must contain
+FUZZY_MIN_SIMILARITY = 0.6      # 1 - edit distance / length, after re-ranking
+FUZZY_MIN_QUERY_LENGTH = 3
+_TERM_CHUNK_SIZE = 500
+
+_WORD_RE = re.compile(r'[0-9a-z]+')
+
+def _words(text: Optional[str]) -> List[str]:
+    return _WORD_RE.findall((text or '').lower())
+
+def _trigrams(words: Iterable[str]) -> set:
+    grams = set()
+    for word in words:
+        padded = f"  {word} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+def _record_aliases(raw_data: Optional[str]) -> List[str]:
+    if not raw_data:
+        return []
+    try:
+        record = json.loads(raw_data)
+    except json.JSONDecodeError:
+        return []
+    aliases = []
+    for key in ('Aliases', 'Synonyms'):
+        value = record.get(key)
+        if isinstance(value, str):
+            value = re.split(r'[,;|]', value)
+        if isinstance(value, list):
+            aliases += [str(a).strip() for a in value if str(a).strip()]
+    return aliases
+
+def _init_term_index(cursor: sqlite3.Cursor) -> None:
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS catalogue_aliases (
+            testCode TEXT NOT NULL,
+            alias TEXT NOT NULL,
+            PRIMARY KEY (testCode, alias)
+        )
+    """)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS catalogue_terms (
+            term_id INTEGER PRIMARY KEY,
+            testCode TEXT NOT NULL,
+            term TEXT NOT NULL,
+            gram_count INTEGER NOT NULL
+        )
+    """)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_catalogue_terms_code ON catalogue_terms (testCode)")
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS catalogue_trigrams (
+            trigram TEXT NOT NULL,
+            term_id INTEGER NOT NULL,
+            PRIMARY KEY (trigram, term_id)
+        ) WITHOUT ROWID
+    """)
+    # Existing catalogues are indexed once, on the first start with this table
+    cursor.execute("SELECT EXISTS (SELECT 1 FROM catalogue_terms) AS indexed, EXISTS (SELECT 1 FROM catalogue) AS has_tests")
+    row = cursor.fetchone()
+    if row['has_tests'] and not row['indexed']:
+        _rebuild_term_index(cursor)
+
+def _index_test_terms(cursor: sqlite3.Cursor, codes: Iterable[str]) -> None:
+    """Re-indexes the names and aliases of these tests (deleted tests are dropped)."""
+    codes = list(codes)
+    for i in range(0, len(codes), _TERM_CHUNK_SIZE):
+        chunk = codes[i:i + _TERM_CHUNK_SIZE]
+        marks = ', '.join('?' * len(chunk))
+        cursor.execute(f"""
+            DELETE FROM catalogue_trigrams WHERE term_id IN (
+                SELECT term_id FROM catalogue_terms WHERE testCode IN ({marks}))
+        """, chunk)
+        cursor.execute(f"DELETE FROM catalogue_terms WHERE testCode IN ({marks})", chunk)
+        cursor.execute(f"SELECT testCode, testName, raw_data FROM catalogue WHERE isDeleted = 0 AND testCode IN ({marks})", chunk)
+        terms = {}
+        for row in cursor.fetchall():
+            terms[row['testCode']] = [row['testName']] + _record_aliases(row['raw_data'])
+        cursor.execute(f"SELECT testCode, alias FROM catalogue_aliases WHERE testCode IN ({marks})", chunk)
+        for row in cursor.fetchall():
+            if row['testCode'] in terms:
+                terms[row['testCode']].append(row['alias'])
+        _insert_terms(cursor, terms)
+
+def _insert_terms(cursor: sqlite3.Cursor, terms: Dict[str, List[str]]) -> None:
+    for code, texts in terms.items():
+        seen = set()
+        for text in texts:
+            words = _words(text)
+            normalized = ' '.join(words)
+            if not normalized or normalized in seen:
+                continue
+            seen.add(normalized)
+            grams = _trigrams(words)
+            cursor.execute("INSERT INTO catalogue_terms (testCode, term, gram_count) VALUES (?, ?, ?)",
+                           (code, normalized, len(grams)))
+            term_id = cursor.lastrowid
+            cursor.executemany("INSERT OR IGNORE INTO catalogue_trigrams (trigram, term_id) VALUES (?, ?)",
+                               [(g, term_id) for g in grams])
+
+def _rebuild_term_index(cursor: sqlite3.Cursor) -> None:
+    cursor.execute("DELETE FROM catalogue_trigrams")
+    cursor.execute("DELETE FROM catalogue_terms")
+    cursor.execute("SELECT testCode FROM catalogue WHERE isDeleted = 0")
+    _index_test_terms(cursor, [row['testCode'] for row in cursor.fetchall()])
+
+def _prefix_distance(query: str, text: str, limit: int) -> int:
+    """Edit distance from `query` to the closest prefix of `text`, or limit + 1 once it must exceed `limit`."""
+    text = text[:len(query) + limit]
+    previous = list(range(len(text) + 1))
+    for i, cq in enumerate(query, 1):
+        current = [i]
+        left = i
+        for j, ct in enumerate(text, 1):
+            # min() of the three moves, unrolled: this loop is the hot path of fuzzy search
+            cost = previous[j - 1] + (cq != ct)
+            if previous[j] + 1 < cost:
+                cost = previous[j] + 1
+            if left + 1 < cost:
+                cost = left + 1
+            current.append(cost)
+            left = cost
+        if min(current) > limit:
+            return limit + 1
+        previous = current
+    return min(previous)
+
+def _similarity(query_words: List[str], term: str) -> float:
+    """1 - edit distance / query length, against the best-matching run of words in the term.
+
+    Runs are compared with spaces removed ("tsh3" matches "tsh 3rd"), and
+    only against their start, so a partly typed word still matches.
+    """
+    query = ''.join(query_words)
+    limit = int(len(query) * (1 - FUZZY_MIN_SIMILARITY))
+    term_words = term.split()
+    best = limit + 1
+    for start in range(len(term_words)):
+        best = min(best, _prefix_distance(query, ''.join(term_words[start:start + len(query_words) + 1]), limit))
+        if best == 0:
+            break
+    return 1 - best / len(query)
+
+def fuzzy_search_test_rows(query: str, limit: int = FUZZY_LIMIT) -> List[CatalogueRow]:
+    """Tests whose name or an alias is close to `query`, best match first.
+
+    Tolerates misspellings ("haemoglobin" finds "Hemoglobin") and missing
+    spaces ("TSH3"). Candidates come from the trigram index (no table scan)
+    and are re-ranked by edit distance.
+    """
+    words = _words(query)
+    grams = _trigrams(words)
+    if len(''.join(words)) < FUZZY_MIN_QUERY_LENGTH or not grams:
+        return []
+    marks = ', '.join('?' * len(grams))
+    min_shared = max(1, math.ceil(len(grams) * FUZZY_MIN_COVERAGE))
+    conn = _get_db_connection()
+    try:
+        cursor = conn.cursor()
+        cursor.execute(f"""
+            SELECT t.testCode, t.term, t.gram_count, COUNT(*) AS shared
+            FROM catalogue_trigrams g JOIN catalogue_terms t ON t.term_id = g.term_id
+            WHERE g.trigram IN ({marks})
+            GROUP BY g.term_id HAVING shared >= ?
+            ORDER BY shared DESC LIMIT ?
+        """, list(grams) + [min_shared, FUZZY_CANDIDATES])
+        # (edit similarity, trigram Jaccard) per test; Jaccard prefers the closer-sized name on ties
+        best: Dict[str, tuple] = {}
+        similarities: Dict[str, float] = {}
+        for row in cursor.fetchall():
+            term = row['term']
+            if term not in similarities:
+                similarities[term] = _similarity(words, term)
+            jaccard = row['shared'] / (len(grams) + row['gram_count'] - row['shared'])
+            score = (similarities[term], jaccard)
+            if score[0] >= FUZZY_MIN_SIMILARITY and score > best.get(row['testCode'], (0, 0)):
+                best[row['testCode']] = score
+        if not best:
+            return []
+        codes = sorted(best, key=lambda c: best[c], reverse=True)[:limit]
+        row_cursor = _row_cursor(conn)
+        row_cursor.execute(f"SELECT {_ROW_COLUMNS} FROM catalogue WHERE isDeleted = 0 AND testCode IN ({', '.join('?' * len(codes))})", codes)
+        rows = {row.testCode: row for row in row_cursor.fetchall()}
+        return [rows[c] for c in codes if c in rows]
+    except sqlite3.Error as e:
+        print(f"Error in fuzzy catalogue search: {e}")
+        return []
+    finally:
+        conn.close()
+
+def get_test_aliases(test_code: str) -> List[str]:
+    """Aliases staff added for a test (aliases from the catalogue record are not included)."""
+    conn = _get_db_connection()
+    try:
+        cursor = conn.cursor()
+        cursor.execute("SELECT alias FROM catalogue_aliases WHERE testCode = ? ORDER BY alias", (test_code,))
+        return [row['alias'] for row in cursor.fetchall()]
+    finally:
+        conn.close()
+
+def set_test_aliases(test_code: str, aliases: List[str]) -> None:
+    """Replaces the staff-maintained aliases of a test and re-indexes it."""
+    conn = _get_db_connection()
+    try:
+        with conn:
+            cursor = conn.cursor()
+            cursor.execute("DELETE FROM catalogue_aliases WHERE testCode = ?", (test_code,))
+            cursor.executemany("INSERT OR IGNORE INTO catalogue_aliases (testCode, alias) VALUES (?, ?)",
+                               [(test_code, a.strip()) for a in aliases if a.strip()])
+            _index_test_terms(cursor, [test_code])
+    finally:
+        conn.close()
@@ -0,0 +1,212 @@
+"""Pluggable catalogue sources and a resumable streaming importer.
+
+A source either syncs catalogue.db by itself (the proprietary sync worker)
+or, as a `StreamingSource`, yields test dicts that `CatalogueImporter`
+streams into the staging table and swaps in atomically. Sources are tried in order by
+`sync_from_sources`; the first available one wins.
+"""
+import os
+import sys
+import csv
+import json
+import itertools
+import subprocess
+from abc import ABC, abstractmethod
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from . import catalogue_db
+from app.utils import get_app_data_dir, get_database_dir
+
+SYNC_WORKER_FILENAME = "sync_worker.exe"
+CATALOGUE_DROP_FOLDER = 'catalogue_drop'
+DROP_FILE_EXTENSIONS = ('.jsonl', '.json', '.csv')
+IMPORT_BATCH_SIZE = 1000
+
+# CSV values arrive as strings; these columns are converted on import
+_NUMERIC_FIELDS = ('testFees',)
+
+
+class SourceUnavailableError(Exception):
+    """Raised when no catalogue source can be used."""
+
+
+class CatalogueSource(ABC):
+    """Base class for catalogue sources.
+
+    Sources that write the database themselves implement `sync`. Streaming
+    sources derive from `StreamingSource` instead.
+    """
+    name = 'source'
+
+    @abstractmethod
+    def is_available(self) -> bool:
+        """Whether the source can be synced from right now."""
+
+    @abstractmethod
+    def sync(self, progress_callback: Optional[Callable[[int], None]] = None) -> int:
+        """Brings catalogue.db up to date from this source. Returns rows imported."""
+
+
+class StreamingSource(CatalogueSource):
+    """A source that yields test dicts, imported through `CatalogueImporter`."""
+
+    @abstractmethod
+    def snapshot_id(self) -> str:
+        """Identifies the current data; a new id means there is something new to import."""
+
+    @abstractmethod
+    def iter_tests(self) -> Iterator[Dict[str, Any]]:
+        """Yields test dicts in a stable order (required for resuming)."""
+
+    def sync(self, progress_callback: Optional[Callable[[int], None]] = None) -> int:
+        return CatalogueImporter(self, progress_callback=progress_callback).run()
+
+
+class SyncWorkerSource(CatalogueSource):
+    """The external sync worker executable, which writes catalogue.db directly."""
+    name = 'sync_worker'
+
+    def __init__(self, worker_path: Optional[str] = None):
+        if worker_path is None:
+            base_path = os.path.dirname(os.path.abspath(sys.argv[0]))
+            worker_path = os.path.join(base_path, SYNC_WORKER_FILENAME)
+        self.worker_path = worker_path
+
+    def is_available(self) -> bool:
+        return os.path.exists(self.worker_path)
+
+    def sync(self, progress_callback: Optional[Callable[[int], None]] = None) -> int:
+        db_path = os.path.join(get_database_dir(), catalogue_db.DB_NAME)
+        # CREATE_NO_WINDOW = 0x08000000 ensures no console pops up on Windows
+        creationflags = 0x08000000 if sys.platform == 'win32' else 0
+        subprocess.run([self.worker_path, db_path], check=True, creationflags=creationflags)
+        return catalogue_db.get_test_count()
+
+
+class FileDropSource(StreamingSource):
+    """Reads the newest .jsonl, .json or .csv file from a drop folder.
+
+    JSON files may hold a list of tests or an object with a "tests" list.
+    JSON Lines and CSV files are read one record at a time.
+    """
+    name = 'file_drop'
+
+    def __init__(self, folder: Optional[str] = None):
+        self.folder = folder or os.path.join(get_app_data_dir(), CATALOGUE_DROP_FOLDER)
+
+    def latest_file(self) -> Optional[str]:
+        if not os.path.isdir(self.folder):
+            return None
+        candidates = [
+            os.path.join(self.folder, f) for f in os.listdir(self.folder)
+            if f.lower().endswith(DROP_FILE_EXTENSIONS)
+        ]
+        return max(candidates, key=os.path.getmtime) if candidates else None
+
+    def is_available(self) -> bool:
+        return self.latest_file() is not None
+
+    def snapshot_id(self) -> str:
+        path = self.latest_file()
+        if path is None:
+            raise SourceUnavailableError(f"No catalogue file in {self.folder}")
+        st = os.stat(path)
+        return f"{os.path.basename(path)}:{st.st_size}:{st.st_mtime_ns}"
+
+    def iter_tests(self) -> Iterator[Dict[str, Any]]:
+        path = self.latest_file()
+        if path is None:
+            return
+        lower = path.lower()
+        if lower.endswith('.jsonl'):
+            with open(path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    line = line.strip()
+                    if line:
+                        yield json.loads(line)
+        elif lower.endswith('.json'):
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            yield from (data.get('tests', []) if isinstance(data, dict) else data)
+        else:
+            with open(path, 'r', encoding='utf-8-sig', newline='') as f:
+                for row in csv.DictReader(f):
+                    yield _coerce_csv_row(row)
+
+
+def _coerce_csv_row(row: Dict[str, str]) -> Dict[str, Any]:
+    test = {k: v for k, v in row.items() if k}
+    for field in _NUMERIC_FIELDS:
+        try:
+            test[field] = float(test.get(field) or 0)
+        except ValueError:
+            test[field] = 0.0
+    return test
+
+
+class CatalogueImporter:
+    """Streams a source into the staging table in checkpointed batches.
+
+    Each batch and its checkpoint are committed together. If an import is
+    interrupted, the next run for the same snapshot skips the records that
+    were already staged. A snapshot that was fully imported before is not
+    imported again.
+    """
+
+    def __init__(self, source: StreamingSource, batch_size: int = IMPORT_BATCH_SIZE,
+                 progress_callback: Optional[Callable[[int], None]] = None):
+        self.source = source
+        self.batch_size = batch_size
+        self.progress_callback = progress_callback
+
+    def run(self) -> int:
+        snapshot_id = self.source.snapshot_id()
+        checkpoint = catalogue_db.get_import_checkpoint(self.source.name)
+
+        if checkpoint and checkpoint['snapshot_id'] == snapshot_id and checkpoint['status'] == 'done':
+            return 0
+
+        position = 0
+        if (checkpoint and checkpoint['snapshot_id'] == snapshot_id
+                and checkpoint['status'] == 'staging' and catalogue_db.staging_exists()):
+            position = checkpoint['position']
+        else:
+            catalogue_db.begin_staging()
+
+        records = itertools.islice(self.source.iter_tests(), position, None)
+        batch: List[Dict[str, Any]] = []
+        for test in records:
+            batch.append(test)
+            if len(batch) >= self.batch_size:
+                position += len(batch)
+                catalogue_db.stage_batch(batch, self.source.name, snapshot_id, position)
+                batch = []
+                if self.progress_callback:
+                    self.progress_callback(position)
+        if batch:
+            position += len(batch)
+            catalogue_db.stage_batch(batch, self.source.name, snapshot_id, position)
+            if self.progress_callback:
+                self.progress_callback(position)
+
+        count = catalogue_db.commit_staging(source=self.source.name)
+        catalogue_db.set_import_checkpoint(self.source.name, snapshot_id, position, 'done')
+        return count
+
+
+def get_default_sources() -> List[CatalogueSource]:
+    """Sources tried by the sync scheduler, in order of preference."""
+    return [SyncWorkerSource(), FileDropSource()]
+
+
+def sync_from_sources(sources: Optional[List[CatalogueSource]] = None) -> str:
+    """Syncs from the first available source and returns its name.
+
+    Raises SourceUnavailableError when none of the sources can be used.
+    """
+    sources = sources if sources is not None else get_default_sources()
+    for source in sources:
+        if source.is_available():
+            source.sync()
+            return source.name
+    raise SourceUnavailableError("No catalogue source available")
@@ -1,81 +1,248 @@
-import os
 import sys
-import time
+import random
 import datetime
 import threading
 import subprocess
+from enum import Enum
+from dataclasses import dataclass, replace
+from typing import Callable, List, Optional
 from . import catalogue_db
-from app.utils import get_database_dir
+from .catalogue_sources import SYNC_WORKER_FILENAME, SourceUnavailableError, sync_from_sources
 
 # --- CONFIGURATION ---
-REFRESH_INTERVAL_SECONDS = 3600 
-SYNC_WORKER_FILENAME = "sync_worker.exe"
+REFRESH_INTERVAL_SECONDS = 3600
+INITIAL_DELAY_SECONDS = 5
+JITTER_FRACTION = 0.1           # +/-10% on every scheduled delay
+RETRY_BASE_SECONDS = 60         # first retry after a failure, doubled each time
+MAX_BACKOFF_SECONDS = 4 * 3600
+SKIP_RETRY_SECONDS = 300        # re-check after skipping for busy UI / battery
 
 # --- GLOBAL DATA STORE (Kept for UI compatibility, though mainly unused now) ---
-_CATALOGUE_DATA = [] 
-_FETCH_STATUS = "Not Initialized"
+_CATALOGUE_DATA = []
+
+
+class SyncState(Enum):
+    IDLE = 'idle'
+    RUNNING = 'running'
+    SUCCESS = 'success'
+    FAILED = 'failed'
+    SKIPPED = 'skipped'
+    UNAVAILABLE = 'unavailable'
+
+
+@dataclass(frozen=True)
+class SyncStatus:
+    state: SyncState = SyncState.IDLE
+    message: str = "Not Initialized"
+    last_started: Optional[datetime.datetime] = None
+    last_finished: Optional[datetime.datetime] = None
+    last_duration: Optional[float] = None
+    row_count: Optional[int] = None
+    consecutive_failures: int = 0
+    next_run_at: Optional[datetime.datetime] = None
+
+    @property
+    def is_running(self) -> bool:
+        return self.state == SyncState.RUNNING
+
+
+def _on_battery_power() -> bool:
+    """Best-effort check whether the machine is running on battery."""
+    if sys.platform == 'win32':
+        try:
+            import ctypes
+            from ctypes import wintypes
+
+            class SYSTEM_POWER_STATUS(ctypes.Structure):
+                _fields_ = [
+                    ('ACLineStatus', wintypes.BYTE),
+                    ('BatteryFlag', wintypes.BYTE),
+                    ('BatteryLifePercent', wintypes.BYTE),
+                    ('SystemStatusFlag', wintypes.BYTE),
+                    ('BatteryLifeTime', wintypes.DWORD),
+                    ('BatteryFullLifeTime', wintypes.DWORD),
+                ]
+
+            status = SYSTEM_POWER_STATUS()
+            if ctypes.windll.kernel32.GetSystemPowerStatus(ctypes.byref(status)):
+                return status.ACLineStatus == 0
+        except Exception:
+            pass
+        return False
+    try:
+        import psutil
+        battery = psutil.sensors_battery()
+        return battery is not None and not battery.power_plugged
+    except (ImportError, AttributeError, RuntimeError):
+        return False
+
+
+class FetchScheduler:
+    """Runs catalogue syncs in a daemon thread with jitter and failure backoff.
+
+    Runs are skipped (and retried later) while the UI reports itself busy or
+    the machine is on battery. Every run is recorded once in the catalogue
+    database's `sync_runs` table: by the import itself when it swaps in a
+    new catalogue, otherwise by the scheduler. Listeners receive a
+    `SyncStatus` snapshot on every state change, from the scheduler thread.
+    """
+
+    def __init__(self, job: Callable[[], Optional[str]] = sync_from_sources, source: str = 'scheduler',
+                 interval: float = REFRESH_INTERVAL_SECONDS, initial_delay: float = INITIAL_DELAY_SECONDS):
+        self.job = job
+        self.source = source
+        self.interval = interval
+        self.initial_delay = initial_delay
+        self.skip_on_battery = True
+        self._busy_check: Optional[Callable[[], bool]] = None
+        self._listeners: List[Callable[[SyncStatus], None]] = []
+        self._status = SyncStatus()
+        self._lock = threading.Lock()
+        self._run_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    # --- Status / observers ---
+
+    @property
+    def status(self) -> SyncStatus:
+        with self._lock:
+            return self._status
+
+    def add_listener(self, callback: Callable[[SyncStatus], None]) -> None:
+        with self._lock:
+            self._listeners.append(callback)
+
+    def remove_listener(self, callback: Callable[[SyncStatus], None]) -> None:
+        with self._lock:
+            if callback in self._listeners:
+                self._listeners.remove(callback)
+
+    def set_busy_check(self, callback: Optional[Callable[[], bool]]) -> None:
+        """Sets a callable returning True while the UI should not be disturbed."""
+        self._busy_check = callback
+
+    def _update(self, **changes) -> SyncStatus:
+        with self._lock:
+            self._status = replace(self._status, **changes)
+            status = self._status
+            listeners = list(self._listeners)
+        if 'message' in changes:
+            print(f"[{datetime.datetime.now()}] Catalogue sync: {status.message}")
+        for callback in listeners:
+            try:
+                callback(status)
+            except Exception as e:
+                print(f"Sync status listener error: {e}")
+        return status
+
+    # --- Running ---
+
+    def _should_skip(self) -> Optional[str]:
+        try:
+            if self._busy_check and self._busy_check():
+                return "Skipped: application is busy"
+        except Exception:
+            pass
+        if self.skip_on_battery and _on_battery_power():
+            return "Skipped: running on battery"
+        return None
+
+    def run_once(self) -> SyncStatus:
+        """Runs one sync synchronously. Returns immediately if one is already running."""
+        if not self._run_lock.acquire(blocking=False):
+            return self.status
+        try:
+            started = datetime.datetime.now()
+            self._update(state=SyncState.RUNNING, last_started=started,
+                         message=f"Fetching... (Started: {started.strftime('%H:%M:%S')})")
+            state, error, source = SyncState.SUCCESS, None, self.source
+            last_run = catalogue_db.get_last_sync_run()
+            try:
+                source = self.job() or self.source
+            except SourceUnavailableError:
+                state, error = SyncState.UNAVAILABLE, f"No catalogue source ({SYNC_WORKER_FILENAME} or drop folder). Using offline mode."
+            except subprocess.CalledProcessError as e:
+                state, error = SyncState.FAILED, f"FAILURE: Worker Error (Code {e.returncode})"
+            except Exception as e:
+                state, error = SyncState.FAILED, f"FAILURE: Launcher Error: {e}"
+
+            finished = datetime.datetime.now()
+            row_count = catalogue_db.get_test_count()
+            # An import through the staging table records its own run; don't add a second row
+            if state != SyncState.SUCCESS or catalogue_db.get_last_sync_run() == last_run:
+                catalogue_db.record_sync_run(source, state.value, started, row_count, error)
+            failures = self.status.consecutive_failures + 1 if state == SyncState.FAILED else 0
+            message = error or f"SUCCESS: Sync complete. (Last Refresh: {finished.strftime('%H:%M:%S')})"
+            return self._update(state=state, message=message, last_finished=finished,
+                                last_duration=(finished - started).total_seconds(),
+                                row_count=row_count, consecutive_failures=failures)
+        finally:
+            self._run_lock.release()
+
+    def next_delay(self) -> float:
+        """Seconds until the next attempt, based on the last outcome."""
+        status = self.status
+        if status.state == SyncState.FAILED:
+            base = min(RETRY_BASE_SECONDS * (2 ** (status.consecutive_failures - 1)), MAX_BACKOFF_SECONDS)
+        elif status.state == SyncState.SKIPPED:
+            base = SKIP_RETRY_SECONDS
+        else:
+            base = self.interval
+        return base * random.uniform(1 - JITTER_FRACTION, 1 + JITTER_FRACTION)
+
+    def _loop(self) -> None:
+        # Initial wait to let app startup finish
+        delay = self.initial_delay
+        while not self._stop.is_set():
+            self._update(next_run_at=datetime.datetime.now() + datetime.timedelta(seconds=delay))
+            forced = self._wake.wait(delay)
+            self._wake.clear()
+            if self._stop.is_set():
+                break
+            skip_reason = None if forced else self._should_skip()
+            if skip_reason:
+                self._update(state=SyncState.SKIPPED, message=skip_reason)
+            else:
+                self.run_once()
+            delay = self.next_delay()
+
+    def start(self) -> None:
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, daemon=True, name="catalogue-sync")
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._wake.set()
+
+    def run_now(self) -> None:
+        """Wakes the scheduler thread to sync immediately (busy/battery checks are bypassed)."""
+        self._wake.set()
+
+
+_SCHEDULER = FetchScheduler()
+
+
+def get_scheduler() -> FetchScheduler:
+    return _SCHEDULER
+
+def get_sync_status() -> SyncStatus:
+    return _SCHEDULER.status
 
 def get_fetch_status() -> str:
-    return _FETCH_STATUS
+    return _SCHEDULER.status.message
 
 def get_catalogue_data() -> list:
     return _CATALOGUE_DATA
 
 # --- DATA FETCHING LAUNCHER ---
-def fetch_catalogue_data() -> None:
-    global _FETCH_STATUS
-    
-    if "Fetching..." in _FETCH_STATUS:
-        print(f"[{datetime.datetime.now()}] Skipping fetch, one is already running.")
-        return
-
-    _FETCH_STATUS = f"Fetching... (Started: {datetime.datetime.now().strftime('%H:%M:%S')})"
-    print(f"[{datetime.datetime.now()}] {_FETCH_STATUS}")
-    
-    try:
-        # Determine path to sync_worker.exe
-        # 1. Check in current directory (typical for dev)
-        # 2. Check in sys._MEIPASS (if bundled, though we plan to keep it separate)
-        # 3. Check in dist/PekoCMS (for manual dev testing)
-        
-        base_path = os.path.dirname(os.path.abspath(sys.argv[0]))
-        worker_path = os.path.join(base_path, SYNC_WORKER_FILENAME)
-        
-        # If running from source, logic might differ, assume proprietary/ folder built
-        if not getattr(sys, 'frozen', False):
-            # Development mode specific path if needed
-             pass
-
-        if not os.path.exists(worker_path):
-             _FETCH_STATUS = f"Sync worker not found ({SYNC_WORKER_FILENAME}). Using offline mode."
-             print(f"[{datetime.datetime.now()}] {_FETCH_STATUS}")
-             return
-
-        # Prepare DB PATH
-        db_path = os.path.join(get_database_dir(), catalogue_db.DB_NAME)
-
-        # Launch Worker
-        # CREATE_NO_WINDOW = 0x08000000 ensures no console pops up on Windows
-        subprocess.run([worker_path, db_path], check=True, creationflags=0x08000000)
-        
-        _FETCH_STATUS = f"SUCCESS: Sync complete. (Last Refresh: {datetime.datetime.now().strftime('%H:%M:%S')})"
-        
-    except subprocess.CalledProcessError as e:
-        _FETCH_STATUS = f"FAILURE: Worker Error (Code {e.returncode})"
-    except Exception as e:
-        _FETCH_STATUS = f"FAILURE: Launcher Error: {e}"
-    finally:
-        print(f"[{datetime.datetime.now()}] {_FETCH_STATUS}")
+def fetch_catalogue_data() -> SyncStatus:
+    """Runs one catalogue sync in the calling thread."""
+    return _SCHEDULER.run_once()
 
 def start_fetch_scheduler() -> None:
-    def scheduler_loop():
-        # Initial wait to let app startup finish
-        time.sleep(5) 
-        fetch_catalogue_data()
-        while True:
-            # print(f"[{datetime.datetime.now()}] Next data refresh in {REFRESH_INTERVAL_SECONDS} seconds.")
-            time.sleep(REFRESH_INTERVAL_SECONDS)
-            fetch_catalogue_data()
-
-    scheduler_thread = threading.Thread(target=scheduler_loop, daemon=True)
-    scheduler_thread.start()
\ No newline at end of file
+    _SCHEDULER.start()
@@ -91,13 +91,23 @@ def add_invoice_record(invoice_id: str, invoice_data: Dict[str, Any]) -> None:
     finally:
         conn.close()
 
-def get_all_invoice_records(full: bool = False) -> List[Dict[str, Any]]:
-    """Retrieves all invoice records from the datasheet, newest first."""
+def get_all_invoice_records(full: bool = False, include_archived: bool = True) -> List[Dict[str, Any]]:
+    """Retrieves all invoice records from the datasheet, newest first.
+
+    Records older than a year are moved to monthly archives (see
+    archive_service) and are included; pass include_archived=False to read
+    only the live table.
+    """
     conn = _get_db_connection()
     try:
-        cursor = conn.cursor()
-        cursor.execute("SELECT * FROM invoice_records ORDER BY invoiceDate DESC")
-        rows = cursor.fetchall()
+        if include_archived:
+            from . import archive_service
+            rows = archive_service.query_all('invoice_records', "SELECT * FROM {table}")
+            rows.sort(key=lambda r: r['invoiceDate'], reverse=True)
+        else:
+            cursor = conn.cursor()
+            cursor.execute("SELECT * FROM invoice_records ORDER BY invoiceDate DESC")
+            rows = cursor.fetchall()
 
         if full:
             # For exports, return the full, raw data
@@ -121,11 +131,6 @@ def get_all_invoice_records(full: bool = False) -> List[Dict[str, Any]]:
         conn.close()
 
 def delete_invoice_record(invoice_id: str) -> None:
-    """Deletes an invoice record from the datasheet."""
-    conn = _get_db_connection()
-    try:
-        cursor = conn.cursor()
-        cursor.execute("DELETE FROM invoice_records WHERE invoiceId = ?", (invoice_id,))
-        conn.commit()
-    finally:
-        conn.close()
\ No newline at end of file
+    """Deletes an invoice record from the datasheet, live or archived."""
+    from . import archive_service
+    archive_service.delete_row('invoice_records', 'invoiceId', invoice_id)
@@ -0,0 +1,81 @@
+"""Full-text (FTS5) indexes over ordinary tables, kept in sync by triggers.
+
+Each index is an external-content FTS5 table: it stores only the tokens
+and reads column values from the indexed table by rowid. Insert, delete
+and update triggers on that table keep it current, so every writer updates
+it in the same transaction without knowing it exists. The update trigger
+fires only when an indexed column changes.
+"""
+import sqlite3
+from typing import List, Optional
+
+
+def create_index(cursor: sqlite3.Cursor, table: str, fts_table: str, columns: List[str]) -> bool:
+    """Creates the index and its triggers if missing; returns False if FTS5 is unavailable.
+
+    Rows already in the table are indexed when the index or any trigger had
+    to be created, e.g. after the table was replaced by a rename.
+    Uses `cursor.execute` only, so it can run inside the caller's transaction.
+    """
+    cols = ', '.join(columns)
+    new_cols = ', '.join(f"new.{c}" for c in columns)
+    old_cols = ', '.join(f"old.{c}" for c in columns)
+    cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (fts_table,))
+    needs_rebuild = cursor.fetchone() is None
+    if needs_rebuild:
+        try:
+            cursor.execute(f"""
+                CREATE VIRTUAL TABLE {fts_table} USING fts5(
+                    {cols}, content='{table}', content_rowid='rowid', tokenize='unicode61'
+                )
+            """)
+        except sqlite3.OperationalError as e:
+            print(f"Full-text search on '{table}' unavailable ({e})")
+            return False
+
+    triggers = {
+        f"{fts_table}_insert": f"""
+            AFTER INSERT ON {table} BEGIN
+                INSERT INTO {fts_table}(rowid, {cols}) VALUES (new.rowid, {new_cols});
+            END""",
+        f"{fts_table}_delete": f"""
+            AFTER DELETE ON {table} BEGIN
+                INSERT INTO {fts_table}({fts_table}, rowid, {cols}) VALUES ('delete', old.rowid, {old_cols});
+            END""",
+        f"{fts_table}_update": f"""
+            AFTER UPDATE OF {cols} ON {table} BEGIN
+                INSERT INTO {fts_table}({fts_table}, rowid, {cols}) VALUES ('delete', old.rowid, {old_cols});
+                INSERT INTO {fts_table}(rowid, {cols}) VALUES (new.rowid, {new_cols});
+            END""",
+    }
+    for name, body in triggers.items():
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'trigger' AND name = ?", (name,))
+        if cursor.fetchone() is None:
+            cursor.execute(f"CREATE TRIGGER {name} {body}")
+            needs_rebuild = True
+
+    if needs_rebuild:
+        cursor.execute(f"INSERT INTO {fts_table}({fts_table}) VALUES ('rebuild')")
+    return True
+
+
+def drop_triggers(cursor: sqlite3.Cursor, fts_table: str) -> None:
+    """Drops the sync triggers, e.g. before the indexed table is swapped out by a rename."""
+    for suffix in ('insert', 'delete', 'update'):
+        cursor.execute(f"DROP TRIGGER IF EXISTS {fts_table}_{suffix}")
+
+
+def index_exists(conn: sqlite3.Connection, fts_table: str, schema: str = 'main') -> bool:
+    row = conn.execute(f"SELECT 1 FROM {schema}.sqlite_master WHERE type = 'table' AND name = ?",
+                       (fts_table,)).fetchone()
+    return row is not None
+
+
+def prefix_query(text: str) -> Optional[str]:
+    """Turns typed text into an FTS5 query where every word must match as a prefix.
+
+    Returns None if the text has no searchable words.
+    """
+    words = [w.replace('"', '') for w in text.split()]
+    words = [w for w in words if w]
+    return ' '.join(f'"{w}"*' for w in words) or None
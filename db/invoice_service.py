@@ -4,10 +4,8 @@ import time
 import datetime
 from typing import Dict, Any, Optional
 
-# Import pdf_generator from app module
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from app.pdf_generator import generate_invoice, InvoiceData
-from app.branding import CLINIC_NAME_PREFIX
+from app.config_service import get_config
 
 from . import patient_cms_db
 from . import datasheet_db
@@ -19,6 +17,9 @@ def create_and_save_invoice(data: Dict[str, Any], created_by: Optional[int], add
 
     Keeps behavior compatible with the previous Flask implementation.
     """
+    # fpdf and pydantic are slow to import; load them with the first invoice
+    from app.pdf_generator import generate_invoice, InvoiceData
+
     data = dict(data)  # shallow copy
 
     # Add static info and calculate totals
@@ -56,7 +57,8 @@ def create_and_save_invoice(data: Dict[str, Any], created_by: Optional[int], add
     # Ensure invoice storage directory exists
     os.makedirs(invoice_storage_dir, exist_ok=True)
     patient_name_safe = "".join(c for c in invoice_data_model.patient.name if c.isalnum() or c in " _-").rstrip()
-    filename = f"{CLINIC_NAME_PREFIX}_{invoice_number}_{patient_name_safe}.pdf"
+    clinic_name_prefix = get_config()['CLINIC_NAME'].split()[0]
+    filename = f"{clinic_name_prefix}_{invoice_number}_{patient_name_safe}.pdf"
     filepath = os.path.join(invoice_storage_dir, filename)
     with open(filepath, 'wb') as f:
         f.write(pdf_bytes)
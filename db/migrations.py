@@ -0,0 +1,195 @@
+"""Versioned schema migrations, tracked per database with PRAGMA user_version.
+
+Each database file has an ordered list of steps. A step runs inside its own
+transaction together with the `user_version` bump, so a failed step leaves
+the file at the previous version. When every file is already at its latest
+version, `run_migrations` costs one pragma read per file.
+
+Columns added by a module's `init_db` stay there; this registry is for
+changes `init_db` cannot express, such as renames. A file that `init_db`
+creates already has the latest schema, so it is stamped with the latest
+version (see `stamp_new_database`) and its steps never run on it.
+"""
+import os
+import sqlite3
+import datetime
+from typing import Callable, Dict, List, NamedTuple
+
+from app.utils import get_database_dir
+
+# Database files renamed between releases (old name -> new name)
+FILE_RENAMES = {
+    'nidaan_cms.db': 'patient_cms.db',
+}
+
+
+class Migration(NamedTuple):
+    version: int
+    description: str
+    apply: Callable[[sqlite3.Connection], None]
+
+
+MIGRATIONS: Dict[str, List[Migration]] = {}
+
+
+def migration(db_name: str, version: int):
+    """Registers the decorated function as a step for `db_name`.
+
+    The function's docstring is used as the step description. Versions must
+    increase by one for each new step on the same database.
+    """
+    def decorator(fn: Callable[[sqlite3.Connection], None]):
+        steps = MIGRATIONS.setdefault(db_name, [])
+        expected = len(steps) + 1
+        if version != expected:
+            raise ValueError(f"{db_name}: migration version {version} registered, expected {expected}")
+        steps.append(Migration(version, (fn.__doc__ or fn.__name__).strip(), fn))
+        return fn
+    return decorator
+
+
+def latest_version(db_name: str) -> int:
+    steps = MIGRATIONS.get(db_name)
+    return steps[-1].version if steps else 0
+
+
+def _columns(conn: sqlite3.Connection, table: str) -> List[str]:
+    return [row[1] for row in conn.execute(f"PRAGMA table_info({table})")]
+
+
+def _rename_column(conn: sqlite3.Connection, table: str, old_col: str, new_col: str) -> None:
+    """Renames a column if the table still has the old name. No-op otherwise."""
+    columns = _columns(conn, table)
+    if old_col in columns and new_col not in columns:
+        conn.execute(f"ALTER TABLE {table} RENAME COLUMN {old_col} TO {new_col}")
+
+
+# --- Registered migrations ---
+
+@migration('patient_cms.db', 1)
+def _patient_cms_patient_id(conn):
+    """Rename nidaanId to patientId"""
+    _rename_column(conn, 'patients', 'nidaanId', 'patientId')
+    _rename_column(conn, 'invoices', 'nidaanId', 'patientId')
+
+
+@migration('report_tracker.db', 1)
+def _report_tracker_patient_id(conn):
+    """Rename nidaanId to patientId"""
+    _rename_column(conn, 'reports', 'nidaanId', 'patientId')
+
+
+@migration('polyclinic.db', 1)
+def _polyclinic_patient_id(conn):
+    """Rename nidaan_id to patient_id"""
+    _rename_column(conn, 'polyclinic_bookings', 'nidaan_id', 'patient_id')
+
+
+@migration('datasheet.db', 1)
+def _datasheet_patient_id(conn):
+    """Rename nidaanId to patientId"""
+    _rename_column(conn, 'invoice_records', 'nidaanId', 'patientId')
+
+
+# --- Runner ---
+
+def _rename_files(db_dir: str) -> None:
+    for old_name, new_name in FILE_RENAMES.items():
+        old_path = os.path.join(db_dir, old_name)
+        new_path = os.path.join(db_dir, new_name)
+        if os.path.exists(old_path) and not os.path.exists(new_path):
+            os.rename(old_path, new_path)
+            print(f"Migration: Renamed database file {old_name} -> {new_name}")
+
+
+def _backup(conn: sqlite3.Connection, db_dir: str, db_name: str, stamp: str) -> str:
+    """Copies the database with the online backup API before it is changed."""
+    backup_dir = os.path.join(db_dir, 'backups', stamp)
+    os.makedirs(backup_dir, exist_ok=True)
+    backup_path = os.path.join(backup_dir, db_name)
+    dest = sqlite3.connect(backup_path)
+    try:
+        conn.backup(dest)
+    finally:
+        dest.close()
+    return backup_path
+
+
+def migrate_database(db_path: str, steps: List[Migration], backup_stamp: str = None) -> int:
+    """Applies the steps newer than the file's user_version. Returns steps applied."""
+    conn = sqlite3.connect(db_path, isolation_level=None)
+    try:
+        current = conn.execute("PRAGMA user_version").fetchone()[0]
+        pending = [step for step in steps if step.version > current]
+        if not pending:
+            return 0
+
+        db_dir, db_name = os.path.split(db_path)
+        if backup_stamp:
+            _backup(conn, db_dir, db_name, backup_stamp)
+
+        applied = 0
+        for step in pending:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                step.apply(conn)
+                conn.execute(f"PRAGMA user_version = {int(step.version)}")
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+            applied += 1
+            print(f"Migration: {db_name} v{step.version} - {step.description}")
+        return applied
+    finally:
+        conn.close()
+
+
+def run_migrations(db_dir: str = None, backup: bool = True) -> int:
+    """Brings every existing database up to its latest schema version.
+
+    Files that do not exist yet are skipped; they are created at the latest
+    schema by `init_db`. Errors are reported and do not stop other files.
+    Returns the total number of steps applied.
+    """
+    db_dir = db_dir or get_database_dir()
+    stamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S") if backup else None
+    try:
+        _rename_files(db_dir)
+    except OSError as e:
+        print(f"Migration file rename error: {e}")
+
+    total = 0
+    for db_name, steps in MIGRATIONS.items():
+        db_path = os.path.join(db_dir, db_name)
+        if not os.path.exists(db_path):
+            continue
+        try:
+            total += migrate_database(db_path, steps, stamp)
+        except (sqlite3.Error, OSError) as e:
+            print(f"Migration error in {db_name}: {e}")
+    return total
+
+
+def new_databases(db_dir: str = None) -> List[str]:
+    """Registered database files that do not exist yet, to stamp once `init_db` has created them."""
+    db_dir = db_dir or get_database_dir()
+    return [db_name for db_name in MIGRATIONS if not os.path.exists(os.path.join(db_dir, db_name))]
+
+
+def stamp_new_database(db_name: str, db_dir: str = None) -> None:
+    """Sets a file just created by `init_db` to the latest version of `db_name`.
+
+    A file that already has a version is left alone.
+    """
+    db_path = os.path.join(db_dir or get_database_dir(), db_name)
+    if not os.path.exists(db_path):
+        return
+    conn = sqlite3.connect(db_path, isolation_level=None)
+    try:
+        if conn.execute("PRAGMA user_version").fetchone()[0] == 0:
+            conn.execute(f"PRAGMA user_version = {int(latest_version(db_name))}")
+    except sqlite3.Error as e:
+        print(f"Migration error stamping {db_name}: {e}")
+    finally:
+        conn.close()
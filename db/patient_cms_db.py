@@ -8,12 +8,27 @@ from typing import Optional, Dict, Any, List
 # Add parent directory to path for branding import
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from app.branding import PATIENT_ID_PREFIX, PATIENT_ID_FORMAT
+from . import cache, fts
 
 # Get path to databases folder
 from app.utils import get_database_dir
 DB_DIR = get_database_dir()
 DB_NAME = os.path.join(DB_DIR, 'patient_cms.db')
 
+FTS_TABLE = 'patients_fts'
+_fts_available: Optional[bool] = None
+
+# Phones are matched on their last PHONE_DIGITS digits, so '+91 98765-43210',
+# '098765 43210' and '9876543210' are the same number
+PHONE_DIGITS = 10
+# Fewer trailing digits than this match too many patients to be useful
+MIN_PHONE_SUFFIX = 4
+SUGGESTION_LIMIT = 8
+
+# Patients seen recently at the counter, by patientId (see get_patient)
+PATIENT_CACHE_SIZE = 200
+_patient_cache = cache.LRUCache('patients', PATIENT_CACHE_SIZE)
+
 def _get_db_connection() -> sqlite3.Connection:
     """Establishes a connection to the database."""
     conn = sqlite3.connect(DB_NAME)
@@ -53,7 +68,29 @@ def init_db() -> None:
             print("Patient DB Migration: Adding column 'discountPercentage'...")
             cursor.execute("ALTER TABLE invoices ADD COLUMN discountPercentage REAL NOT NULL DEFAULT 0.0")
 
+        # Normalized phone columns for lookups that ignore formatting and
+        # country codes; the reversed digits turn a suffix match into an
+        # indexed prefix range (see find_patients_by_phone)
+        cursor.execute("PRAGMA table_info(patients)")
+        patient_columns = [col['name'] for col in cursor.fetchall()]
+        for column in ('phone_digits', 'phone_reversed'):
+            if column not in patient_columns:
+                print(f"Patient DB Migration: Adding column '{column}'...")
+                cursor.execute(f"ALTER TABLE patients ADD COLUMN {column} TEXT")
+        cursor.execute("SELECT patientId, phone FROM patients WHERE phone_digits IS NULL")
+        backfill = [(*_phone_keys(row['phone']), row['patientId']) for row in cursor.fetchall()]
+        if backfill:
+            cursor.executemany("UPDATE patients SET phone_digits = ?, phone_reversed = ? WHERE patientId = ?", backfill)
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_patients_phone_digits ON patients(phone_digits)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_patients_phone_reversed ON patients(phone_reversed)")
+
+        # Word-prefix search on name, patient ID and phone (see search_patients)
+        global _fts_available
+        _fts_available = fts.create_index(cursor, 'patients', FTS_TABLE, ['name', 'patientId', 'phone'])
+
         conn.commit()
+        # A restore may have replaced the database
+        _patient_cache.clear()
     except sqlite3.Error as e:
         print(f"Patient CMS DB initialization error: {e}")
     finally:
@@ -79,6 +116,20 @@ def _generate_patient_id(cursor: sqlite3.Cursor) -> str:
 def _dict_from_row(row: Optional[sqlite3.Row]) -> Optional[Dict[str, Any]]:
     return dict(row) if row else None
 
+def normalize_phone(phone: Optional[str]) -> str:
+    """The last PHONE_DIGITS digits of a phone number, ignoring spaces, dashes and country codes."""
+    digits = ''.join(ch for ch in str(phone or '') if ch.isdigit())
+    return digits[-PHONE_DIGITS:]
+
+def _phone_keys(phone: Optional[str]):
+    """Values of the phone_digits and phone_reversed columns for a phone number."""
+    digits = normalize_phone(phone)
+    return digits, digits[::-1]
+
+def _prefix_range(prefix: str):
+    """Bounds of an indexed range scan matching every string that starts with `prefix`."""
+    return prefix, prefix[:-1] + chr(ord(prefix[-1]) + 1)
+
 def add_patient(patient_data: Dict[str, Any]) -> str:
     """Adds a new patient to the database."""
     conn = _get_db_connection()
@@ -86,12 +137,13 @@ def add_patient(patient_data: Dict[str, Any]) -> str:
         cursor = conn.cursor()
         patientId = _generate_patient_id(cursor)
         cursor.execute("""
-            INSERT INTO patients (patientId, name, sex, age, phone, email, address, created_at)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            INSERT INTO patients (patientId, name, sex, age, phone, email, address, created_at,
+                                  phone_digits, phone_reversed)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
         """, (
             patientId, patient_data['name'], patient_data['sex'], patient_data['age'],
             patient_data['phone'], patient_data.get('email'), patient_data['address'],
-            datetime.datetime.now().isoformat()
+            datetime.datetime.now().isoformat(), *_phone_keys(patient_data['phone'])
         ))
         conn.commit()
         return patientId
@@ -106,20 +158,28 @@ def update_patient(patient_id: str, patient_data: Dict[str, Any]) -> None:
     try:
         cursor = conn.cursor()
         cursor.execute("""
-            UPDATE patients SET name=?, sex=?, age=?, phone=?, email=?, address=?
+            UPDATE patients SET name=?, sex=?, age=?, phone=?, email=?, address=?,
+                                phone_digits=?, phone_reversed=?
             WHERE patientId=?
         """, (
             patient_data['name'], patient_data['sex'], patient_data['age'],
             patient_data['phone'], patient_data.get('email'), patient_data['address'],
-            patient_id
+            *_phone_keys(patient_data['phone']), patient_id
         ))
         conn.commit()
+        _patient_cache.invalidate(patient_id)
     except sqlite3.IntegrityError as e:
         raise Exception(f"Phone number '{patient_data['phone']}' may already be in use by another patient.") from e
     finally:
         conn.close()
 
 def get_patient(patient_id: str) -> Optional[Dict[str, Any]]:
+    """The patient with this ID, served from the recent-patient cache when possible."""
+    patient = _patient_cache.get(patient_id, lambda: _load_patient(patient_id))
+    # A copy, so callers can change it without changing the cached record
+    return dict(patient) if patient else None
+
+def _load_patient(patient_id: str) -> Optional[Dict[str, Any]]:
     conn = _get_db_connection()
     try:
         cursor = conn.cursor()
@@ -129,13 +189,69 @@ def get_patient(patient_id: str) -> Optional[Dict[str, Any]]:
         conn.close()
 
 def get_patient_by_phone(phone: str) -> Optional[Dict[str, Any]]:
+    """The patient with this phone number, however it is formatted."""
     conn = _get_db_connection()
     try:
         cursor = conn.cursor()
         cursor.execute("SELECT * FROM patients WHERE phone=?", (phone,))
-        return _dict_from_row(cursor.fetchone())
+        row = cursor.fetchone()
+        digits = normalize_phone(phone)
+        if row is None and digits:
+            cursor.execute("SELECT * FROM patients WHERE phone_digits=? LIMIT 1", (digits,))
+            row = cursor.fetchone()
+        return _dict_from_row(row)
+    finally:
+        conn.close()
+
+def find_patients_by_phone(phone: str, limit: int = SUGGESTION_LIMIT) -> List[Dict[str, Any]]:
+    """Patients whose phone ends with the digits of `phone` (at least MIN_PHONE_SUFFIX of them)."""
+    digits = normalize_phone(phone)
+    if len(digits) < MIN_PHONE_SUFFIX:
+        return []
+    low, high = _prefix_range(digits[::-1])
+    conn = _get_db_connection()
+    try:
+        rows = conn.execute(
+            "SELECT * FROM patients WHERE phone_reversed >= ? AND phone_reversed < ? ORDER BY name ASC LIMIT ?",
+            (low, high, limit)
+        ).fetchall()
+        return [dict(row) for row in rows]
+    finally:
+        conn.close()
+
+def suggest_patients(text: str, limit: int = SUGGESTION_LIMIT) -> List[Dict[str, Any]]:
+    """Patients for a partly typed ID or phone: IDs starting with `text`, then phones ending with its digits."""
+    text = text.strip()
+    if not text:
+        return []
+    conn = _get_db_connection()
+    try:
+        low, high = _prefix_range(text.upper())
+        rows = conn.execute(
+            "SELECT * FROM patients WHERE patientId >= ? AND patientId < ? ORDER BY patientId ASC LIMIT ?",
+            (low, high, limit)
+        ).fetchall()
     finally:
         conn.close()
+    suggestions = [dict(row) for row in rows]
+    if len(suggestions) < limit and not any(ch.isalpha() for ch in text):
+        seen = {p['patientId'] for p in suggestions}
+        for patient in find_patients_by_phone(text, limit):
+            if patient['patientId'] not in seen and len(suggestions) < limit:
+                suggestions.append(patient)
+    return suggestions
+
+def lookup_patient(text: str) -> Optional[Dict[str, Any]]:
+    """Resolves typed text to one patient: an exact patient ID, a phone number, or a unique phone suffix."""
+    text = text.strip()
+    if not text:
+        return None
+    patient = get_patient(text) or get_patient(text.upper()) or get_patient_by_phone(text)
+    if patient is None:
+        matches = find_patients_by_phone(text, limit=2)
+        if len(matches) == 1:
+            patient = matches[0]
+    return patient
 
 def get_all_patients() -> List[Dict[str, Any]]:
     conn = _get_db_connection()
@@ -148,6 +264,27 @@ def get_all_patients() -> List[Dict[str, Any]]:
     finally:
         conn.close()
 
+def search_patients(query: str, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+    """Patients whose name, patient ID or phone has a word starting with each word of `query`, by name."""
+    match = fts.prefix_query(query)
+    if match is None:
+        return get_all_patients()[:limit] if limit else get_all_patients()
+    conn = _get_db_connection()
+    try:
+        if _fts_available:
+            sql = f"SELECT * FROM patients WHERE rowid IN (SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH ?) ORDER BY name ASC"
+            params = [match]
+        else:
+            like = f"%{query.strip()}%"
+            sql = "SELECT * FROM patients WHERE name LIKE ? OR patientId LIKE ? OR phone LIKE ? ORDER BY name ASC"
+            params = [like] * 3
+        if limit:
+            sql += " LIMIT ?"
+            params.append(limit)
+        return [dict(row) for row in conn.execute(sql, params).fetchall()]
+    finally:
+        conn.close()
+
 def add_invoice(invoice_id: str, invoice_data: Dict[str, Any]) -> None:
     """Saves a record of a generated invoice."""
     conn = _get_db_connection()
@@ -228,5 +365,6 @@ def delete_patient(patient_id: str) -> None:
         cursor = conn.cursor()
         cursor.execute("DELETE FROM patients WHERE patientId = ?", (patient_id,))
         conn.commit()
+        _patient_cache.invalidate(patient_id)
     finally:
         conn.close()
\ No newline at end of file
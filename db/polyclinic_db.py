@@ -4,13 +4,19 @@ Manages doctors, availability, and patient bookings
 """
 import sqlite3
 import os
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Iterator
 from datetime import datetime
 
+from . import fts
+
 # Get path to databases folder
 from app.utils import get_database_dir
 DB_DIR = get_database_dir()
 DB_NAME = os.path.join(DB_DIR, 'polyclinic.db')
+PATIENT_DB_NAME = os.path.join(DB_DIR, 'patient_cms.db')
+
+DOCTORS_FTS_TABLE = 'doctors_fts'
+_fts_available: Optional[bool] = None
 
 def _get_db_connection() -> sqlite3.Connection:
     """Establishes a connection to the polyclinic database."""
@@ -66,12 +72,86 @@ def init_db() -> None:
             )
         """)
         
+        # Schema Migration: optional per-slot patient limit (NULL = no limit)
+        cursor.execute("PRAGMA table_info(doctor_availability)")
+        if 'capacity' not in [col['name'] for col in cursor.fetchall()]:
+            print("Polyclinic DB Migration: Adding column 'capacity'...")
+            cursor.execute("ALTER TABLE doctor_availability ADD COLUMN capacity INTEGER")
+        
+        _init_availability_calendar(cursor)
+        
+        # Date-range lookups (queue view, exports) filter on date first
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_bookings_date_doctor
+            ON polyclinic_bookings (booking_date, doctor_id)
+        """)
+        
+        # Word-prefix search on doctor name, speciality and degree
+        global _fts_available
+        _fts_available = fts.create_index(cursor, 'doctors', DOCTORS_FTS_TABLE, ['name', 'speciality', 'degree'])
+        
         conn.commit()
     except sqlite3.Error as e:
         print(f"Polyclinic DB initialization error: {e}")
     finally:
         conn.close()
 
+def _init_availability_calendar(cursor: sqlite3.Cursor) -> None:
+    """Tables and triggers behind the materialised availability calendar.
+
+    `availability_calendar` holds one row per bookable slot and date, filled
+    in by availability_service. Triggers keep its `booked` counts current
+    for every booking write, and drop a doctor's `availability_calendar_state`
+    row when their weekly schedule changes, so the next read rebuilds it.
+    """
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS availability_calendar (
+            doctor_id INTEGER NOT NULL,
+            slot_date TEXT NOT NULL,
+            start_time TEXT NOT NULL,
+            end_time TEXT NOT NULL,
+            capacity INTEGER,
+            booked INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (doctor_id, slot_date, start_time)
+        ) WITHOUT ROWID
+    """)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS availability_calendar_state (
+            doctor_id INTEGER PRIMARY KEY,
+            start_date TEXT NOT NULL,
+            end_date TEXT NOT NULL
+        )
+    """)
+    # Bookings are usually looked up by doctor and date
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_bookings_doctor_date
+        ON polyclinic_bookings (doctor_id, booking_date, booking_time)
+    """)
+    
+    count_booking = """
+        UPDATE availability_calendar SET booked = booked + 1
+        WHERE doctor_id = new.doctor_id AND slot_date = new.booking_date AND start_time = new.booking_time;"""
+    uncount_booking = """
+        UPDATE availability_calendar SET booked = MAX(booked - 1, 0)
+        WHERE doctor_id = old.doctor_id AND slot_date = old.booking_date AND start_time = old.booking_time;"""
+    stale_schedule = "DELETE FROM availability_calendar_state WHERE doctor_id IN ({});"
+    triggers = {
+        'calendar_booking_insert': f"AFTER INSERT ON polyclinic_bookings BEGIN {count_booking} END",
+        'calendar_booking_delete': f"AFTER DELETE ON polyclinic_bookings BEGIN {uncount_booking} END",
+        'calendar_booking_update': ("AFTER UPDATE OF doctor_id, booking_date, booking_time ON polyclinic_bookings "
+                                    f"BEGIN {uncount_booking} {count_booking} END"),
+        'calendar_schedule_insert': f"AFTER INSERT ON doctor_availability BEGIN {stale_schedule.format('new.doctor_id')} END",
+        'calendar_schedule_delete': f"AFTER DELETE ON doctor_availability BEGIN {stale_schedule.format('old.doctor_id')} END",
+        'calendar_schedule_update': ("AFTER UPDATE ON doctor_availability "
+                                     f"BEGIN {stale_schedule.format('old.doctor_id, new.doctor_id')} END"),
+        'calendar_doctor_delete': """AFTER DELETE ON doctors BEGIN
+            DELETE FROM availability_calendar WHERE doctor_id = old.doctor_id;
+            DELETE FROM availability_calendar_state WHERE doctor_id = old.doctor_id;
+        END""",
+    }
+    for name, body in triggers.items():
+        cursor.execute(f"CREATE TRIGGER IF NOT EXISTS {name} {body}")
+
 # ===== DOCTOR OPERATIONS =====
 
 def add_doctor(name_or_dict, speciality=None, degree=None, visiting_fees=None, status='active') -> int:
@@ -168,16 +248,26 @@ def get_doctor_by_name(name: str) -> Optional[Dict[str, Any]]:
         conn.close()
 
 def search_doctors(search_text: str) -> List[Dict[str, Any]]:
-    """Search doctors by name or speciality"""
+    """Search doctors by word prefixes of name, speciality or degree"""
+    match = fts.prefix_query(search_text)
+    if match is None:
+        return get_all_doctors()
     conn = _get_db_connection()
     try:
         cursor = conn.cursor()
-        search_pattern = f"%{search_text.lower()}%"
-        cursor.execute("""
-            SELECT * FROM doctors 
-            WHERE LOWER(name) LIKE ? OR LOWER(speciality) LIKE ?
-            ORDER BY name
-        """, (search_pattern, search_pattern))
+        if _fts_available:
+            cursor.execute(f"""
+                SELECT * FROM doctors
+                WHERE doctor_id IN (SELECT rowid FROM {DOCTORS_FTS_TABLE} WHERE {DOCTORS_FTS_TABLE} MATCH ?)
+                ORDER BY name
+            """, (match,))
+        else:
+            search_pattern = f"%{search_text.lower()}%"
+            cursor.execute("""
+                SELECT * FROM doctors 
+                WHERE LOWER(name) LIKE ? OR LOWER(speciality) LIKE ?
+                ORDER BY name
+            """, (search_pattern, search_pattern))
         
         doctors = []
         for row in cursor.fetchall():
@@ -243,15 +333,16 @@ def delete_doctor(doctor_id: int) -> bool:
 
 # ===== DOCTOR AVAILABILITY OPERATIONS =====
 
-def add_availability(doctor_id: int, day_of_week: int, start_time: str, end_time: str) -> int:
-    """Add availability slot for a doctor"""
+def add_availability(doctor_id: int, day_of_week: int, start_time: str, end_time: str,
+                     capacity: Optional[int] = None) -> int:
+    """Add availability slot for a doctor (capacity: most patients per date, None for no limit)"""
     conn = _get_db_connection()
     try:
         cursor = conn.cursor()
         cursor.execute("""
-            INSERT INTO doctor_availability (doctor_id, day_of_week, start_time, end_time)
-            VALUES (?, ?, ?, ?)
-        """, (doctor_id, day_of_week, start_time, end_time))
+            INSERT INTO doctor_availability (doctor_id, day_of_week, start_time, end_time, capacity)
+            VALUES (?, ?, ?, ?, ?)
+        """, (doctor_id, day_of_week, start_time, end_time, capacity))
         conn.commit()
         return cursor.lastrowid
     finally:
@@ -404,6 +495,52 @@ def get_bookings_between_dates(start_date: str, end_date: str) -> List[Dict[str,
     finally:
         conn.close()
 
+def _export_filter(start_date: str, end_date: str, doctor_id: Optional[int]):
+    where = "b.booking_date BETWEEN ? AND ?"
+    params: List[Any] = [start_date, end_date]
+    if doctor_id:
+        where += " AND b.doctor_id = ?"
+        params.append(doctor_id)
+    return where, params
+
+def count_bookings_for_export(start_date: str, end_date: str, doctor_id: Optional[int] = None) -> int:
+    """Count bookings in a date range (optionally for one doctor)"""
+    conn = _get_db_connection()
+    try:
+        cursor = conn.cursor()
+        where, params = _export_filter(start_date, end_date, doctor_id)
+        cursor.execute(f"SELECT COUNT(*) AS cnt FROM polyclinic_bookings b WHERE {where}", params)
+        return cursor.fetchone()['cnt']
+    finally:
+        conn.close()
+
+def iter_bookings_for_export(start_date: str, end_date: str, doctor_id: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+    """Stream bookings joined with doctor and patient details, grouped by doctor.
+
+    patient_cms.db is attached to the connection so patient names and phones
+    come from the same query instead of one lookup per booking.
+    """
+    conn = _get_db_connection()
+    try:
+        cursor = conn.cursor()
+        cursor.execute("ATTACH DATABASE ? AS pcms", (PATIENT_DB_NAME,))
+        where, params = _export_filter(start_date, end_date, doctor_id)
+        cursor.execute(f"""
+            SELECT b.booking_id, b.booking_date, b.booking_time, b.serial_number,
+                   b.patient_id, b.payment_status, b.attendance_status,
+                   d.doctor_id, d.name AS doctor_name, d.visiting_fees,
+                   p.name AS patient_name, p.phone AS patient_phone
+            FROM polyclinic_bookings b
+            JOIN doctors d ON d.doctor_id = b.doctor_id
+            LEFT JOIN pcms.patients p ON p.patientId = b.patient_id
+            WHERE {where}
+            ORDER BY d.name, d.doctor_id, b.booking_date, b.booking_time, b.serial_number
+        """, params)
+        for row in cursor:
+            yield dict(row)
+    finally:
+        conn.close()
+
 def update_booking_payment_status(booking_id: int, payment_status) -> bool:
     """Update payment status of a booking (accepts both bool and string)"""
     conn = _get_db_connection()
@@ -0,0 +1,143 @@
+import os
+import sys
+import re
+from typing import Dict, Any, Optional, Callable
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from app.branding import PATIENT_ID_LABEL
+
+from . import polyclinic_db
+
+EXPORT_HEADERS = ['Date', 'Time', 'Serial', 'Patient Name', PATIENT_ID_LABEL, 'Phone', 'Payment', 'Attendance', 'Fees']
+EXPORT_COLUMN_WIDTHS = [12, 16, 8, 28, 16, 14, 10, 12, 10]
+PROGRESS_EVERY_ROWS = 200
+
+# Characters Excel does not allow in sheet titles
+_INVALID_SHEET_CHARS = re.compile(r'[\\/*?:\[\]]')
+
+
+def _register_styles(wb) -> None:
+    """Registers the named styles used by the export once per workbook."""
+    from openpyxl.styles import NamedStyle, Font, PatternFill, Alignment
+
+    header = NamedStyle(name='queue_header')
+    header.font = Font(bold=True, color="FFFFFF")
+    header.fill = PatternFill(start_color="0078D4", end_color="0078D4", fill_type="solid")
+    header.alignment = Alignment(horizontal="center")
+    wb.add_named_style(header)
+
+    fees = NamedStyle(name='queue_fees', number_format='#,##0.00')
+    wb.add_named_style(fees)
+
+    summary = NamedStyle(name='queue_summary')
+    summary.font = Font(bold=True)
+    wb.add_named_style(summary)
+
+
+def _sheet_title(name: str, used: set) -> str:
+    """Returns a valid, unique worksheet title for a doctor name."""
+    base = _INVALID_SHEET_CHARS.sub('_', name or 'Doctor').strip() or 'Doctor'
+    base = base[:31]
+    title = base
+    counter = 2
+    while title.lower() in used:
+        suffix = f" ({counter})"
+        title = base[:31 - len(suffix)] + suffix
+        counter += 1
+    used.add(title.lower())
+    return title
+
+
+def _styled(ws, value, style: str):
+    from openpyxl.cell import WriteOnlyCell
+    cell = WriteOnlyCell(ws, value=value)
+    cell.style = style
+    return cell
+
+
+def _open_sheet(wb, title: str):
+    from openpyxl.utils import get_column_letter
+    ws = wb.create_sheet(title=title)
+    # Column widths must be set before the first row is written
+    for idx, width in enumerate(EXPORT_COLUMN_WIDTHS, start=1):
+        ws.column_dimensions[get_column_letter(idx)].width = width
+    ws.freeze_panes = 'A2'
+    ws.append([_styled(ws, h, 'queue_header') for h in EXPORT_HEADERS])
+    return ws
+
+
+def _close_sheet(ws, totals: Dict[str, float]) -> None:
+    ws.append([])
+    ws.append([_styled(ws, 'SUMMARY', 'queue_summary')])
+    ws.append(['Total Patients:', totals['patients']])
+    ws.append(['Total Fees:', _styled(ws, totals['fees'], 'queue_fees')])
+    ws.append(['Collected Fees:', _styled(ws, totals['collected'], 'queue_fees')])
+    ws.append(['Pending Fees:', _styled(ws, totals['fees'] - totals['collected'], 'queue_fees')])
+
+
+def export_bookings_xlsx(filename: str, start_date: str, end_date: str, doctor_id: Optional[int] = None,
+                         progress_callback: Optional[Callable[[int, int], None]] = None) -> Dict[str, Any]:
+    """Writes bookings in a date range to an XLSX file, one sheet per doctor.
+
+    Rows are streamed from a single joined query straight into a write-only
+    workbook, so memory stays flat regardless of the range exported.
+    Returns a summary dict with the number of rows and sheets written.
+    """
+    import openpyxl
+
+    total = polyclinic_db.count_bookings_for_export(start_date, end_date, doctor_id)
+
+    wb = openpyxl.Workbook(write_only=True)
+    _register_styles(wb)
+
+    used_titles = set()
+    ws = None
+    current_doctor = None
+    totals = None
+    sheets = 0
+    done = 0
+
+    for booking in polyclinic_db.iter_bookings_for_export(start_date, end_date, doctor_id):
+        if booking['doctor_id'] != current_doctor:
+            if ws is not None:
+                _close_sheet(ws, totals)
+            current_doctor = booking['doctor_id']
+            ws = _open_sheet(wb, _sheet_title(booking['doctor_name'], used_titles))
+            totals = {'patients': 0, 'fees': 0, 'collected': 0}
+            sheets += 1
+
+        fees = booking.get('visiting_fees') or 0
+        totals['patients'] += 1
+        totals['fees'] += fees
+        if booking['payment_status'] == 'PAID':
+            totals['collected'] += fees
+
+        ws.append([
+            booking['booking_date'],
+            booking['booking_time'],
+            booking['serial_number'],
+            booking.get('patient_name') or '',
+            booking['patient_id'],
+            booking.get('patient_phone') or '',
+            booking['payment_status'],
+            booking['attendance_status'],
+            _styled(ws, fees, 'queue_fees'),
+        ])
+
+        done += 1
+        if progress_callback and done % PROGRESS_EVERY_ROWS == 0:
+            progress_callback(done, total)
+
+    if ws is not None:
+        _close_sheet(ws, totals)
+    else:
+        # Keep the file valid (and self-explanatory) when nothing matched
+        ws = _open_sheet(wb, 'Queue')
+        ws.append(['No bookings found for the selected range'])
+
+    wb.save(filename)
+
+    if progress_callback:
+        progress_callback(done, total)
+
+    return {'filename': filename, 'rows': done, 'sheets': sheets}
@@ -2,13 +2,24 @@
 import sqlite3
 import datetime
 import os
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional, Tuple
+
+from . import fts
 
 # Get path to databases folder
 from app.utils import get_database_dir
 DB_DIR = get_database_dir()
 DB_NAME = os.path.join(DB_DIR, 'report_tracker.db')
 
+REPORT_PAGE_SIZE = 200
+DELIVERY_CHUNK_SIZE = 500
+FTS_TABLE = 'reports_fts'
+
+# (created_at, invoiceId) of the last row of a page; pass it back to get the next page
+ReportCursor = Tuple[str, str]
+
+_fts_available: Optional[bool] = None
+
 def _get_db_connection() -> sqlite3.Connection:
     """Establishes a connection to the database."""
     conn = sqlite3.connect(DB_NAME)
@@ -32,12 +43,24 @@ def init_db() -> None:
                 created_by INTEGER
             )
         """)
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_reports_status ON reports(status, created_at)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_reports_created_at ON reports(created_at)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_reports_patient ON reports(patientId)")
+        _init_fts(cursor)
         conn.commit()
     except sqlite3.Error as e:
         print(f"Report Tracker DB initialization error: {e}")
     finally:
         conn.close()
 
+def _init_fts(cursor: sqlite3.Cursor) -> None:
+    """Creates the full-text index on invoice ID, patient and VID, kept in sync by triggers.
+
+    Skipped (search falls back to LIKE) if this SQLite build has no FTS5.
+    """
+    global _fts_available
+    _fts_available = fts.create_index(cursor, 'reports', FTS_TABLE, ['invoiceId', 'patientName', 'patientId', 'vid'])
+
 def add_report(invoice_id: str, patient_id: str, patient_name: str, pdf_filename: str, created_by: int = None) -> None:
     """Adds a new report record to the tracker, defaulting to 'Undelivered'."""
     conn = _get_db_connection()
@@ -61,8 +84,17 @@ def add_report(invoice_id: str, patient_id: str, patient_name: str, pdf_filename
     finally:
         conn.close()
 
-def get_all_reports() -> List[Dict[str, Any]]:
-    """Retrieves all report records, newest first."""
+def get_all_reports(include_archived: bool = True) -> List[Dict[str, Any]]:
+    """Retrieves all report records, newest first.
+
+    Delivered reports are moved to monthly archives after a while (see
+    archive_service) and are included; pass include_archived=False to read
+    only the live table.
+    """
+    if include_archived:
+        from . import archive_service
+        rows = archive_service.query_all('reports', "SELECT * FROM {table}")
+        return sorted(rows, key=lambda r: r['created_at'], reverse=True)
     conn = _get_db_connection()
     try:
         cursor = conn.cursor()
@@ -75,35 +107,156 @@ def get_all_reports() -> List[Dict[str, Any]]:
     finally:
         conn.close()
 
-def mark_report_delivered(invoice_id: str, vid: str) -> None:
-    """Updates a report's status to 'Delivered' and logs the VID."""
+def _report_filters(query: str, status: Optional[str],
+                    date_range: Optional[Tuple[Optional[str], Optional[str]]],
+                    cursor: Optional[ReportCursor], use_fts: bool) -> Tuple[List[str], List[Any]]:
+    where, params = [], []
+    if query:
+        if use_fts:
+            where.append(f"r.rowid IN (SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH ?)")
+            params.append(fts.prefix_query(query) or '""')
+        else:
+            like = f"%{query}%"
+            where.append("(r.invoiceId LIKE ? OR r.patientName LIKE ? OR r.patientId LIKE ? OR r.vid LIKE ?)")
+            params += [like] * 4
+    if status:
+        where.append("r.status = ?")
+        params.append(status)
+    if date_range:
+        start, end = date_range
+        if start:
+            where.append("r.created_at >= ?")
+            params.append(start)
+        if end:
+            where.append("r.created_at < ?")
+            params.append(end)
+    if cursor is not None:
+        where.append("(r.created_at, r.invoiceId) < (?, ?)")
+        params += list(cursor)
+    return where, params
+
+def _archive_months(status: Optional[str], date_range: Optional[Tuple[Optional[str], Optional[str]]],
+                    cursor: Optional[ReportCursor]) -> List[str]:
+    """Archive months (newest first) that can hold reports matching the filters."""
+    from . import archive_service
+    if status and status != 'Delivered':
+        return []   # only delivered reports are archived
+    months = archive_service.list_archive_months('reports')
+    start, end = date_range or (None, None)
+    if start:
+        months = [m for m in months if m >= start[:7]]
+    if end:
+        months = [m for m in months if m <= end[:7]]
+    if cursor is not None:
+        months = [m for m in months if m <= cursor[0][:7]]
+    return months
+
+def search_reports(query: str = '', status: Optional[str] = None,
+                   date_range: Optional[Tuple[Optional[str], Optional[str]]] = None,
+                   limit: int = REPORT_PAGE_SIZE, cursor: Optional[ReportCursor] = None) -> List[Dict[str, Any]]:
+    """Returns one page of reports, newest first, filtered in SQL.
+
+    `query` matches word prefixes of the invoice ID, patient name, patient ID
+    or VID. `status` is 'Delivered' or 'Undelivered'. `date_range` is a
+    (start, end) pair of ISO dates on created_at, end exclusive; either may
+    be None. Pass the 'cursor' of the last row as `cursor` for the next page.
+
+    Archived (old, delivered) reports are included. Each partition returns
+    its best `limit` rows and the results are merged; archive months are
+    visited newest first and only until they can no longer reach the page.
+    Archives have no full-text index, so there `query` matches as a substring.
+    """
+    from . import archive_service
+    query = query.strip()
+    months = _archive_months(status, date_range, cursor)
+    rows: List[Dict[str, Any]] = []
+
     conn = _get_db_connection()
+    partitions = archive_service.iter_partitions(conn, 'reports', months)
     try:
-        cursor = conn.cursor()
-        cursor.execute("""
-            UPDATE reports
-            SET status = ?, vid = ?
-            WHERE invoiceId = ?
-        """, ('Delivered', vid, invoice_id))
-        conn.commit()
+        for month, table in zip([None] + months, partitions):
+            if month is not None and len(rows) >= limit and month < rows[limit - 1]['created_at'][:7]:
+                break
+            where, params = _report_filters(query, status, date_range, cursor, use_fts=month is None and _fts_available)
+            sql = (f"SELECT r.* FROM {table} r"
+                   + (" WHERE " + " AND ".join(where) if where else "")
+                   + " ORDER BY r.created_at DESC, r.invoiceId DESC LIMIT ?")
+            rows += [dict(r) for r in conn.execute(sql, params + [limit]).fetchall()]
+            rows.sort(key=lambda r: (r['created_at'], r['invoiceId']), reverse=True)
     except sqlite3.Error as e:
-        print(f"Error updating report status in tracker DB: {e}")
+        print(f"Error searching report tracker DB: {e}")
+        return []
     finally:
+        partitions.close()
         conn.close()
+    rows = rows[:limit]
+    for row in rows:
+        row['cursor'] = (row['created_at'], row['invoiceId'])
+    return rows
 
-def delete_report(invoice_id: str) -> str:
-    """Deletes a report and returns its PDF filename."""
+def status_counts() -> Dict[str, int]:
+    """Number of reports per status, archived reports included."""
+    from . import archive_service
+    try:
+        rows = archive_service.query_all('reports', "SELECT status, COUNT(*) AS n FROM {table} GROUP BY status")
+    except sqlite3.Error as e:
+        print(f"Error counting reports in tracker DB: {e}")
+        return {}
+    counts: Dict[str, int] = {}
+    for row in rows:
+        counts[row['status']] = counts.get(row['status'], 0) + row['n']
+    return counts
+
+def get_report(invoice_id: str) -> Optional[Dict[str, Any]]:
+    """Retrieves one report by invoice ID."""
     conn = _get_db_connection()
     try:
         cursor = conn.cursor()
-        # Get the filename before deleting
-        cursor.execute("SELECT pdf_filename FROM reports WHERE invoiceId = ?", (invoice_id,))
+        cursor.execute("SELECT * FROM reports WHERE invoiceId = ?", (invoice_id,))
         row = cursor.fetchone()
-        filename = row['pdf_filename'] if row else None
-        
-        # Delete the report
-        cursor.execute("DELETE FROM reports WHERE invoiceId = ?", (invoice_id,))
+        return dict(row) if row else None
+    finally:
+        conn.close()
+
+def mark_reports_delivered(invoice_ids: List[str], vid: str) -> List[str]:
+    """Marks many reports 'Delivered' with one VID in a single transaction.
+
+    Unknown and already delivered invoices are skipped. Returns the IDs
+    that were updated.
+    """
+    ids = list(dict.fromkeys(invoice_ids))
+    updated = []
+    conn = _get_db_connection()
+    try:
+        cursor = conn.cursor()
+        # Chunks stay under SQLite's bound-parameter limit
+        for i in range(0, len(ids), DELIVERY_CHUNK_SIZE):
+            chunk = ids[i:i + DELIVERY_CHUNK_SIZE]
+            placeholders = ', '.join('?' * len(chunk))
+            cursor.execute(
+                f"SELECT invoiceId FROM reports WHERE status != 'Delivered' AND invoiceId IN ({placeholders})", chunk
+            )
+            pending = [row['invoiceId'] for row in cursor.fetchall()]
+            cursor.executemany(
+                "UPDATE reports SET status = 'Delivered', vid = ? WHERE invoiceId = ?",
+                [(vid, invoice_id) for invoice_id in pending]
+            )
+            updated += pending
         conn.commit()
-        return filename
+        return updated
+    except sqlite3.Error as e:
+        conn.rollback()
+        print(f"Error updating report status in tracker DB: {e}")
+        return []
     finally:
         conn.close()
+
+def mark_report_delivered(invoice_id: str, vid: str) -> None:
+    """Updates a report's status to 'Delivered' and logs the VID."""
+    mark_reports_delivered([invoice_id], vid)
+
+def delete_report(invoice_id: str) -> Optional[str]:
+    """Deletes a report, live or archived, and returns its PDF filename."""
+    from . import archive_service
+    row = archive_service.delete_row('reports', 'invoiceId', invoice_id)
+    return row['pdf_filename'] if row else None
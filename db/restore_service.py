@@ -0,0 +1,273 @@
+"""Verified restore of a backup zip, with staging and an atomic swap.
+
+A restore never writes over live data until the whole backup is checked:
+
+1. Every entry is stream-extracted into a staging folder next to the live
+   databases. Its SHA-256 and size are compared with manifest.json, if the
+   backup has one. Older backups without a manifest skip this check.
+2. Each database must pass `PRAGMA integrity_check`. Its schema version
+   (`user_version`) must not be newer than this build knows about.
+3. Quick search connections are closed and every live database is
+   checkpointed; one still held by a reader aborts the restore before
+   anything is moved. The live files, with any WAL sidecars, are then
+   moved aside into backups/pre_restore_<timestamp>/ and the staged
+   files are renamed into place. The archive folder is swapped as a
+   whole, so archives that are not in the backup are set aside too. If
+   any step fails, the files already swapped are put back.
+4. Migrations and every module's `init_db` run again in-process, so an
+   older backup is brought up to the current schema without a restart.
+   This runs whenever the swap completed, even if restoring the config
+   or logos failed afterwards.
+"""
+import os
+import json
+import shutil
+import sqlite3
+import hashlib
+import zipfile
+import datetime
+from typing import Any, Dict, List, Optional
+
+from . import backup_service, migrations, search_service
+from .archive_service import ARCHIVE_FOLDER
+from . import auth_db, catalogue_db, datasheet_db, patient_cms_db, polyclinic_db, report_tracker_db, special_tests_db
+from app.utils import get_asset_path, get_config_path, get_database_dir
+
+STAGING_FOLDER = 'restore_staging'
+STREAM_CHUNK_SIZE = backup_service.STREAM_CHUNK_SIZE
+
+# Database file name -> owning module (for re-initialisation after a swap)
+_DB_MODULES = {
+    os.path.basename(module.DB_NAME): module
+    for module in (auth_db, catalogue_db, datasheet_db, patient_cms_db, polyclinic_db, report_tracker_db, special_tests_db)
+}
+
+
+class RestoreError(Exception):
+    """Raised when a backup is rejected; live data has not been touched."""
+
+
+def _extract_verified(zf: zipfile.ZipFile, name: str, dest_path: str, expected: Optional[Dict[str, Any]]) -> None:
+    digest = hashlib.sha256()
+    size = 0
+    os.makedirs(os.path.dirname(dest_path), exist_ok=True)
+    with zf.open(name, 'r') as src, open(dest_path, 'wb') as dest:
+        while True:
+            chunk = src.read(STREAM_CHUNK_SIZE)
+            if not chunk:
+                break
+            digest.update(chunk)
+            dest.write(chunk)
+            size += len(chunk)
+    if expected is not None:
+        if size != expected.get('size') or digest.hexdigest() != expected.get('sha256'):
+            raise RestoreError(f"Checksum mismatch for '{name}'; the backup is damaged.")
+
+
+def _check_database(path: str, db_name: str) -> int:
+    """Runs integrity and schema checks on a staged database. Returns its user_version."""
+    conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+    try:
+        result = conn.execute("PRAGMA integrity_check").fetchone()[0]
+        if result != 'ok':
+            raise RestoreError(f"'{db_name}' failed the integrity check: {result}")
+        if conn.execute("SELECT COUNT(*) FROM sqlite_master WHERE type = 'table'").fetchone()[0] == 0:
+            raise RestoreError(f"'{db_name}' contains no tables.")
+        version = conn.execute("PRAGMA user_version").fetchone()[0]
+    except sqlite3.DatabaseError as e:
+        raise RestoreError(f"'{db_name}' is not a valid database: {e}")
+    finally:
+        conn.close()
+    if version > migrations.latest_version(db_name):
+        raise RestoreError(f"'{db_name}' was created by a newer version of the application (schema v{version}).")
+    return version
+
+
+def stage_backup(zip_path: str, staging_dir: str) -> Dict[str, Any]:
+    """Extracts and verifies a backup into staging_dir. Raises RestoreError if it is invalid.
+
+    Returns a plan with the staged 'databases', 'archives', 'config' and
+    'logos', and whether checksums were verified.
+    """
+    if not zipfile.is_zipfile(zip_path):
+        raise RestoreError("Selected file is not a valid ZIP archive.")
+
+    with zipfile.ZipFile(zip_path, 'r') as zf:
+        names = zf.namelist()
+        manifest = None
+        if backup_service.MANIFEST_NAME in names:
+            try:
+                manifest = json.loads(zf.read(backup_service.MANIFEST_NAME))
+            except ValueError:
+                raise RestoreError("The backup manifest is unreadable.")
+        expected = {f['name']: f for f in manifest['files']} if manifest else {}
+        if manifest:
+            missing = [n for n in expected if n not in names]
+            if missing:
+                raise RestoreError(f"The backup is incomplete; missing: {', '.join(missing)}")
+
+        plan = {'databases': [], 'archives': [], 'config': None, 'logos': [], 'verified': manifest is not None}
+        for name in names:
+            if name.endswith('.db') and '/' not in name:
+                if name not in _DB_MODULES:
+                    print(f"Restore: skipping unknown database '{name}'")
+                    continue
+                dest = os.path.join(staging_dir, name)
+                _extract_verified(zf, name, dest, expected.get(name) if manifest else None)
+                _check_database(dest, name)
+                plan['databases'].append(name)
+            elif name.startswith(f"{ARCHIVE_FOLDER}/") and name.endswith('.db'):
+                dest = os.path.join(staging_dir, ARCHIVE_FOLDER, os.path.basename(name))
+                _extract_verified(zf, name, dest, expected.get(name) if manifest else None)
+                _check_database(dest, name)
+                plan['archives'].append(name)
+            elif name == 'config.yaml':
+                dest = os.path.join(staging_dir, name)
+                _extract_verified(zf, name, dest, expected.get(name) if manifest else None)
+                plan['config'] = dest
+            elif name.startswith('logos/') and not name.endswith('/'):
+                dest = os.path.join(staging_dir, 'logos', os.path.basename(name))
+                _extract_verified(zf, name, dest, expected.get(name) if manifest else None)
+                plan['logos'].append(dest)
+
+    if not plan['databases']:
+        raise RestoreError("The backup does not contain any database files.")
+    return plan
+
+
+_SIDECAR_SUFFIXES = ('-wal', '-shm', '-journal')
+
+
+def _move_sidecars(src_path: str, dest_path: str) -> None:
+    """Moves a database's WAL, shared-memory and journal files along with it."""
+    for suffix in _SIDECAR_SUFFIXES:
+        if os.path.exists(src_path + suffix):
+            os.replace(src_path + suffix, dest_path + suffix)
+
+
+def _checkpoint(db_path: str) -> None:
+    """Folds any WAL content into the main file so it can be moved on its own.
+
+    Raises RestoreError if a reader kept some frames from being checkpointed.
+    """
+    try:
+        conn = sqlite3.connect(db_path)
+        try:
+            busy, _, _ = conn.execute("PRAGMA wal_checkpoint(TRUNCATE)").fetchone()
+        finally:
+            conn.close()
+    except sqlite3.Error as e:
+        raise RestoreError(f"Could not prepare '{os.path.basename(db_path)}' for restore ({e}); nothing was changed.")
+    if busy:
+        raise RestoreError(f"'{os.path.basename(db_path)}' is in use; close other windows and try again. Nothing was changed.")
+
+
+def _swap_databases(staging_dir: str, db_dir: str, names: List[str], aside_dir: str) -> None:
+    """Moves live databases (or folders) aside and renames staged ones into place, undoing on failure."""
+    # Checkpoint everything before moving anything, so a busy database aborts a clean restore
+    for name in names:
+        live_path = os.path.join(db_dir, name)
+        if os.path.isfile(live_path):
+            _checkpoint(live_path)
+
+    os.makedirs(aside_dir, exist_ok=True)
+    swapped = []
+    try:
+        for name in names:
+            live_path = os.path.join(db_dir, name)
+            aside_path = os.path.join(aside_dir, name)
+            if os.path.exists(live_path):
+                os.replace(live_path, aside_path)
+            # A stale WAL next to the new file would be replayed into it; keep it with the old one
+            _move_sidecars(live_path, aside_path)
+            swapped.append(name)
+            staged_path = os.path.join(staging_dir, name)
+            if os.path.exists(staged_path):
+                os.replace(staged_path, live_path)
+    except OSError as e:
+        for name in reversed(swapped):
+            live_path = os.path.join(db_dir, name)
+            aside_path = os.path.join(aside_dir, name)
+            if os.path.isdir(live_path):
+                shutil.rmtree(live_path)
+            elif os.path.exists(live_path):
+                os.remove(live_path)
+            if os.path.exists(aside_path):
+                os.replace(aside_path, live_path)
+            _move_sidecars(aside_path, live_path)
+        raise RestoreError(f"Could not replace the live databases ({e}); nothing was changed.")
+
+
+def _restore_config_and_logos(plan: Dict[str, Any], conf_path: str) -> None:
+    import yaml
+
+    if plan['config']:
+        shutil.move(plan['config'], conf_path)
+
+    if not plan['logos']:
+        return
+    # Logos go to assets/custom and config.yaml is pointed at them
+    target_logo_dir = os.path.join(os.path.dirname(get_asset_path("dummy")), "custom")
+    os.makedirs(target_logo_dir, exist_ok=True)
+    restored_logos_map = {}
+    for src in plan['logos']:
+        target_path = os.path.join(target_logo_dir, os.path.basename(src))
+        shutil.move(src, target_path)
+        restored_logos_map[os.path.basename(src)] = target_path
+
+    if os.path.exists(conf_path):
+        try:
+            with open(conf_path, 'r', encoding='utf-8') as f:
+                config = yaml.safe_load(f) or {}
+            updated = False
+            for key in ('BRANDING_LOGO', 'REPORT_LOGO'):
+                if config.get(key) and os.path.basename(config[key]) in restored_logos_map:
+                    config[key] = restored_logos_map[os.path.basename(config[key])]
+                    updated = True
+            if updated:
+                with open(conf_path, 'w', encoding='utf-8') as f:
+                    yaml.dump(config, f)
+        except Exception as e:
+            print(f"Error updating config paths: {e}")
+
+
+def reinitialize_databases() -> None:
+    """Brings restored files up to the current schema without restarting."""
+    migrations.run_migrations(backup=False)
+    new_databases = migrations.new_databases()
+    for module in _DB_MODULES.values():
+        module.init_db()
+    for db_name in new_databases:
+        migrations.stamp_new_database(db_name)
+
+
+def restore_backup(zip_path: str, db_dir: Optional[str] = None) -> Dict[str, Any]:
+    """Verifies a backup and swaps it in place of the live data.
+
+    Raises RestoreError (leaving live data untouched) if the backup is
+    invalid. Returns the restore plan with the folder holding the replaced
+    databases under 'previous_dir'.
+    """
+    db_dir = db_dir or get_database_dir()
+    staging_dir = os.path.join(db_dir, STAGING_FOLDER)
+    shutil.rmtree(staging_dir, ignore_errors=True)
+    os.makedirs(staging_dir)
+    swapped = False
+    try:
+        plan = stage_backup(zip_path, staging_dir)
+        timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+        aside_dir = os.path.join(backup_service.get_backup_dir(), f"pre_restore_{timestamp}")
+        # Quick search keeps the databases ATTACHed, which would block the swap on Windows
+        search_service.close_connections()
+        _swap_databases(staging_dir, db_dir, plan['databases'] + [ARCHIVE_FOLDER], aside_dir)
+        swapped = True
+        _restore_config_and_logos(plan, get_config_path())
+    finally:
+        shutil.rmtree(staging_dir, ignore_errors=True)
+        # Once the restored files are live they must be migrated and the caches reloaded,
+        # even if the config or logos could not be restored
+        if swapped:
+            reinitialize_databases()
+
+    plan['previous_dir'] = aside_dir
+    return plan
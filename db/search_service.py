@@ -0,0 +1,165 @@
+"""Unified quick search over the catalogue, special tests, patients and doctors.
+
+Each of these tables has an FTS5 index in its own database, kept in sync by
+triggers (see db/fts.py), so every write path updates it without extra
+code. `search()` ATTACHes the four databases to one connection and answers
+with a single UNION ALL query: the best RESULTS_PER_KIND hits of each kind,
+ranked with hits whose title starts with the query first, then by bm25.
+
+The connection is cached per thread and reopened when any of the database
+files is replaced. A restore calls `close_connections()` first, since a
+file ATTACHed to an open connection cannot be replaced on Windows.
+"""
+import os
+import sqlite3
+import threading
+from typing import Any, List, NamedTuple, Optional, Sequence, Set
+
+from . import fts, catalogue_db, patient_cms_db, polyclinic_db, special_tests_db
+
+QUICK_SEARCH_LIMIT = 25
+RESULTS_PER_KIND = 8
+# A single letter matches most patients, and ranking them all is slow
+MIN_QUERY_LENGTH = 2
+
+
+class SearchHit(NamedTuple):
+    kind: str       # one of KINDS
+    key: Any        # testCode, special test id, patientId or doctor_id
+    title: str
+    subtitle: str
+    rank: float     # lower is better
+
+
+class _Source(NamedTuple):
+    module: Any             # owning db module (DB_NAME)
+    alias: str              # schema name the database is ATTACHed as
+    table: str
+    fts_table: str
+    key: str                # SQL for the hit key
+    title: str              # SQL for the hit title
+    subtitle: str           # SQL for the hit subtitle
+    weights: str            # bm25 column weights, in index column order
+    condition: Optional[str]
+
+
+KIND_LABELS = {
+    'test': 'Test',
+    'special_test': 'Special Test',
+    'patient': 'Patient',
+    'doctor': 'Doctor',
+}
+
+_SOURCES = {
+    'test': _Source(catalogue_db, 'cat', 'catalogue', catalogue_db.FTS_TABLE,
+                    "t.testCode", "t.testName", "t.testCode || ' · ₹' || t.testFees",
+                    '5.0, 10.0', "t.isDeleted = 0"),
+    'special_test': _Source(special_tests_db, 'spc', 'special_tests', special_tests_db.FTS_TABLE,
+                            "t.id", "t.testName", "IFNULL(t.testDescription, '') || ' · ₹' || t.testFees",
+                            '10.0, 2.0', None),
+    'patient': _Source(patient_cms_db, 'pat', 'patients', patient_cms_db.FTS_TABLE,
+                       "t.patientId", "t.name", "t.patientId || ' · ' || t.phone",
+                       '10.0, 5.0, 5.0', None),
+    'doctor': _Source(polyclinic_db, 'doc', 'doctors', polyclinic_db.DOCTORS_FTS_TABLE,
+                      "t.doctor_id", "t.name", "t.speciality || ' · ' || t.degree",
+                      '10.0, 5.0, 2.0', "t.status = 'active'"),
+}
+KINDS = tuple(_SOURCES)
+
+_local = threading.local()
+# Every thread's open search connection, so close_connections() can reach them all
+_open_connections: Set[sqlite3.Connection] = set()
+_open_lock = threading.Lock()
+
+
+def _file_identity(path: str):
+    try:
+        st = os.stat(path)
+        return (path, st.st_ino, st.st_dev)
+    except OSError:
+        return (path, None, None)
+
+
+def _connection():
+    """The thread's search connection and the kinds it can search, reopened if a database file changed."""
+    identity = tuple(_file_identity(s.module.DB_NAME) for s in _SOURCES.values())
+    cached = getattr(_local, 'cached', None)
+    if cached is not None:
+        with _open_lock:
+            is_open = cached[1] in _open_connections
+            if is_open and cached[0] != identity:
+                _open_connections.discard(cached[1])
+                cached[1].close()
+                is_open = False
+        if is_open:
+            return cached[1], cached[2]
+
+    # Not bound to this thread, so close_connections() can close it from another one
+    conn = sqlite3.connect(':memory:', check_same_thread=False)
+    available = []
+    for kind, source in _SOURCES.items():
+        if not os.path.exists(source.module.DB_NAME):
+            continue
+        try:
+            conn.execute(f"ATTACH DATABASE ? AS {source.alias}", (source.module.DB_NAME,))
+        except sqlite3.Error as e:
+            print(f"Search: could not open {os.path.basename(source.module.DB_NAME)}: {e}")
+            continue
+        if fts.index_exists(conn, source.fts_table, source.alias):
+            available.append(kind)
+    with _open_lock:
+        _open_connections.add(conn)
+    _local.cached = (identity, conn, available)
+    return conn, available
+
+
+def close_connections() -> None:
+    """Closes the search connection of every thread, detaching the databases.
+
+    Each thread opens a new one on its next search.
+    """
+    with _open_lock:
+        for conn in _open_connections:
+            conn.close()
+        _open_connections.clear()
+
+
+def _kind_sql(kind: str) -> str:
+    s = _SOURCES[kind]
+    where = f"f.{s.fts_table} MATCH ?" + (f" AND {s.condition}" if s.condition else "")
+    return (f"SELECT * FROM (SELECT '{kind}' AS kind, {s.key} AS key, {s.title} AS title, "
+            f"{s.subtitle} AS subtitle, bm25(f.{s.fts_table}, {s.weights}) AS rank, "
+            f"lower({s.title}) LIKE ? AS title_match "
+            f"FROM {s.alias}.{s.fts_table} f JOIN {s.alias}.{s.table} t ON t.rowid = f.rowid "
+            f"WHERE {where} ORDER BY title_match DESC, rank LIMIT ?)")
+
+
+def search(query: str, kinds: Optional[Sequence[str]] = None, limit: int = QUICK_SEARCH_LIMIT,
+           per_kind: int = RESULTS_PER_KIND) -> List[SearchHit]:
+    """Ranked hits for `query` across `kinds` (default: all) in one query.
+
+    Every word of the query must be the start of a word in the entity's
+    indexed columns: test code and name, special test name and description,
+    patient name, ID and phone, or active doctor name, speciality and degree.
+    """
+    match = fts.prefix_query(query)
+    if match is None or len(query.strip()) < MIN_QUERY_LENGTH:
+        return []
+    title_prefix = query.strip().lower().replace('%', '').replace('_', '') + '%'
+
+    conn, available = _connection()
+    wanted = [k for k in (kinds or KINDS) if k in available]
+    if not wanted:
+        return []
+    sql = (" UNION ALL ".join(_kind_sql(k) for k in wanted)
+           + " ORDER BY title_match DESC, rank LIMIT ?")
+    params: List[Any] = []
+    for _ in wanted:
+        params += [title_prefix, match, per_kind]
+    params.append(limit)
+    try:
+        rows = conn.execute(sql, params).fetchall()
+    except sqlite3.Error as e:
+        print(f"Search error: {e}")
+        return []
+    return [SearchHit(kind, key, title or '', subtitle or '', rank) for kind, key, title, subtitle, rank, _ in rows]
@@ -2,14 +2,38 @@
 Special/Custom Tests Database
 Stores user-defined test data (Test Name, Description, Price)
 Separate from the fetched catalogue data
+
+Listing and searching go through an in-memory index (`get_index()`),
+loaded once and kept current by `add_special_test` and
+`delete_special_test`, so the catalogue search never queries this
+database per keystroke.
 """
+import re
+import bisect
 import sqlite3
 import os
+import threading
+from typing import Dict, List, Optional
+
+from . import fts
 
 # Get path to databases folder
 from app.utils import get_database_dir
 DB_DIR = get_database_dir()
 DB_NAME = os.path.join(DB_DIR, 'special_tests.db')
+FTS_TABLE = 'special_tests_fts'
+
+def _row_to_test(row) -> dict:
+    """Builds the test dict callers use from an (id, testName, testDescription, testFees) row"""
+    return {
+        'id': row[0],
+        'testCode': f'SPECIAL-{row[0]}',
+        'testName': row[1],
+        'testDescription': row[2],
+        'testFees': row[3],
+        'FastingRequired': 'No',
+        'isSpecial': True
+    }
 
 def init_db():
     """Initialize the special tests database"""
@@ -22,8 +46,12 @@ def init_db():
         testFees REAL NOT NULL,
         created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
     )''')
+    # Used by the unified search (search_service); the app's own lookups use the index below
+    fts.create_index(c, 'special_tests', FTS_TABLE, ['testName', 'testDescription'])
     conn.commit()
     conn.close()
+    # The file may have been replaced (e.g. by a restore); reload on next use
+    _reset_index()
 
 def add_special_test(test_data: dict) -> int:
     """Add a new special test"""
@@ -37,6 +65,10 @@ def add_special_test(test_data: dict) -> int:
     conn.commit()
     test_id = c.lastrowid
     conn.close()
+    with _index_lock:
+        if _index is not None:
+            _index.add(_row_to_test((test_id, test_data.get('testName', ''),
+                                     test_data.get('testDescription', ''), float(test_data.get('testFees', 0)))))
     return test_id
 
 def get_all_special_tests() -> list:
@@ -47,18 +79,7 @@ def get_all_special_tests() -> list:
     rows = c.fetchall()
     conn.close()
     
-    tests = []
-    for row in rows:
-        tests.append({
-            'id': row[0],
-            'testCode': f'SPECIAL-{row[0]}',  # Generate a special code
-            'testName': row[1],
-            'testDescription': row[2],
-            'testFees': row[3],
-            'FastingRequired': 'No',  # Special tests don't have fasting requirement
-            'isSpecial': True
-        })
-    return tests
+    return [_row_to_test(row) for row in rows]
 
 def delete_special_test(test_id: int) -> bool:
     """Delete a special test"""
@@ -68,6 +89,9 @@ def delete_special_test(test_id: int) -> bool:
     conn.commit()
     affected = c.rowcount
     conn.close()
+    with _index_lock:
+        if _index is not None:
+            _index.remove(test_id)
     return affected > 0
 
 def get_special_test(test_id: int) -> dict:
@@ -78,17 +102,8 @@ def get_special_test(test_id: int) -> dict:
     row = c.fetchone()
     conn.close()
     
-    if row:
-        return {
-            'id': row[0],
-            'testCode': f'SPECIAL-{row[0]}',
-            'testName': row[1],
-            'testDescription': row[2],
-            'testFees': row[3],
-            'FastingRequired': 'No',
-            'isSpecial': True
-        }
-    return {}
+    return _row_to_test(row) if row else {}
+
 def search_special_tests(query: str) -> list:
     """Search special tests by name or description"""
     conn = sqlite3.connect(DB_NAME)
@@ -101,15 +116,117 @@ def search_special_tests(query: str) -> list:
     rows = c.fetchall()
     conn.close()
     
-    tests = []
-    for row in rows:
-        tests.append({
-            'id': row[0],
-            'testCode': f'SPECIAL-{row[0]}',
-            'testName': row[1],
-            'testDescription': row[2],
-            'testFees': row[3],
-            'FastingRequired': 'No',
-            'isSpecial': True
-        })
-    return tests
\ No newline at end of file
+    return [_row_to_test(row) for row in rows]
+
+
+_TOKEN_RE = re.compile(r'\w+')
+
+
+def _tokens(text: str) -> set:
+    return set(_TOKEN_RE.findall((text or '').lower()))
+
+
+class SpecialTestsIndex:
+    """In-memory special tests with word-prefix search over name and description.
+
+    Every lowercase word of a test's name and description maps to the test
+    ids that contain it. A query matches a test when each of its words is
+    the start of one of the test's words ("lip pro" finds "Lipid Profile").
+    The sorted word list is rebuilt lazily after changes, so a lookup is a
+    binary search per query word.
+    """
+
+    def __init__(self, tests: List[dict]):
+        self._lock = threading.RLock()
+        self._tests: Dict[int, dict] = {}
+        self._postings: Dict[str, set] = {}
+        self._words: List[str] = []
+        self._words_stale = False
+        for test in tests:
+            self.add(test)
+
+    def add(self, test: dict) -> None:
+        with self._lock:
+            self.remove(test['id'])
+            self._tests[test['id']] = test
+            for word in _tokens(test.get('testName')) | _tokens(test.get('testDescription')):
+                self._postings.setdefault(word, set()).add(test['id'])
+            self._words_stale = True
+
+    def remove(self, test_id: int) -> None:
+        with self._lock:
+            test = self._tests.pop(test_id, None)
+            if test is None:
+                return
+            for word in _tokens(test.get('testName')) | _tokens(test.get('testDescription')):
+                ids = self._postings.get(word)
+                if ids is not None:
+                    ids.discard(test_id)
+                    if not ids:
+                        del self._postings[word]
+            self._words_stale = True
+
+    def get(self, test_id: int) -> Optional[dict]:
+        with self._lock:
+            return self._tests.get(test_id)
+
+    def __len__(self) -> int:
+        return len(self._tests)
+
+    def _sorted(self, ids) -> List[dict]:
+        return sorted((self._tests[i] for i in ids), key=lambda t: t['testName'] or '')
+
+    def all(self) -> List[dict]:
+        """Every special test, ordered by name."""
+        with self._lock:
+            return self._sorted(self._tests)
+
+    def _prefix_ids(self, prefix: str) -> set:
+        if self._words_stale:
+            self._words = sorted(self._postings)
+            self._words_stale = False
+        ids = set()
+        start = bisect.bisect_left(self._words, prefix)
+        for word in self._words[start:]:
+            if not word.startswith(prefix):
+                break
+            ids |= self._postings[word]
+        return ids
+
+    def search(self, query: str) -> List[dict]:
+        """Tests matching every word of the query by prefix, ordered by name (all tests for an empty query)."""
+        words = _TOKEN_RE.findall((query or '').lower())
+        with self._lock:
+            if not words:
+                return self._sorted(self._tests)
+            ids = None
+            # Longest words first: they usually narrow the set the most
+            for word in sorted(words, key=len, reverse=True):
+                ids = self._prefix_ids(word) if ids is None else ids & self._prefix_ids(word)
+                if not ids:
+                    return []
+            return self._sorted(ids)
+
+
+_index: Optional[SpecialTestsIndex] = None
+_index_lock = threading.Lock()
+
+
+def get_index() -> SpecialTestsIndex:
+    """Returns the shared special tests index, loading it from the database on first use."""
+    global _index
+    with _index_lock:
+        if _index is None:
+            conn = sqlite3.connect(DB_NAME)
+            try:
+                rows = conn.execute('SELECT id, testName, testDescription, testFees FROM special_tests').fetchall()
+            finally:
+                conn.close()
+            _index = SpecialTestsIndex([_row_to_test(row) for row in rows])
+        return _index
+
+
+def _reset_index() -> None:
+    global _index
+    with _index_lock:
+        _index = None
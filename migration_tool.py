@@ -3,9 +3,10 @@
 Database Migration Tool - PekoCMS
 
 This tool performs the following operations:
-1. Creates backups of all databases
+1. Creates backups of all databases (skipped when nothing needs migrating)
 2. Migrates database schema: nidaanId -> patientId, nidaan_id -> patient_id
-3. Recreates tables with renamed columns to ensure data integrity
+3. Renames columns in place (ALTER TABLE ... RENAME COLUMN), or recreates
+   the tables on SQLite versions older than 3.25
 4. Verifies migration success
 
 Specific migrations:
@@ -24,7 +25,6 @@ Usage:
 import os
 import sys
 import json
-import shutil
 import sqlite3
 import argparse
 from datetime import datetime
@@ -44,6 +44,9 @@ class DatabaseMigrator:
         'nidaan_cms.db': 'patient_cms.db',
     }
     
+    # ALTER TABLE ... RENAME COLUMN is available from SQLite 3.25.0
+    NATIVE_RENAME = sqlite3.sqlite_version_info >= (3, 25, 0)
+    
     # Define specific migrations for each database
     MIGRATIONS = {
         'patient_cms.db': [
@@ -84,6 +87,17 @@ class DatabaseMigrator:
             f.write('\n'.join(self.migration_log))
         self.log(f"Log saved to {self.log_file}")
     
+    @staticmethod
+    def copy_database(src: Path, dest: Path):
+        """Copy a database with the online backup API (consistent even while in use)"""
+        src_conn = sqlite3.connect(src)
+        dest_conn = sqlite3.connect(dest)
+        try:
+            src_conn.backup(dest_conn)
+        finally:
+            dest_conn.close()
+            src_conn.close()
+    
     def backup_databases(self) -> bool:
         """Create backups of all database files"""
         try:
@@ -109,7 +123,7 @@ class DatabaseMigrator:
             
             for db_file in db_files:
                 backup_file = self.backup_dir / db_file.name
-                shutil.copy2(db_file, backup_file)
+                self.copy_database(db_file, backup_file)
                 self.log(f"Backed up: {db_file.name} -> {backup_file}")
             
             self.log(f"Successfully backed up {len(db_files)} database(s)")
@@ -157,6 +171,37 @@ class DatabaseMigrator:
             self.log(f"Error getting schema for {table_name}: {e}", "ERROR")
             return None
     
+    def rename_column(self, db_path: Path, table_name: str, old_col: str, new_col: str) -> bool:
+        """Rename a column in place, falling back to a table rebuild on old SQLite versions"""
+        if not self.NATIVE_RENAME:
+            return self.rename_column_via_recreate(db_path, table_name, old_col, new_col)
+        
+        columns = self.get_table_columns(db_path, table_name)
+        if old_col not in columns:
+            self.log(f"Column '{old_col}' not found in {table_name}", "WARNING")
+            return False
+        if new_col in columns:
+            self.log(f"Column '{new_col}' already exists in {table_name}", "WARNING")
+            return False
+        
+        # Only the schema entry changes; rows, indexes and triggers are kept as they are
+        conn = sqlite3.connect(db_path, isolation_level=None)
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                conn.execute(f"ALTER TABLE {table_name} RENAME COLUMN {old_col} TO {new_col}")
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+            self.log(f"Renamed column: {table_name}.{old_col} -> {new_col}")
+            return True
+        except Exception as e:
+            self.log(f"Error renaming column {old_col} in {table_name}: {e}", "ERROR")
+            return False
+        finally:
+            conn.close()
+    
     def rename_column_via_recreate(self, db_path: Path, table_name: str, old_col: str, new_col: str) -> bool:
         """Rename a column by recreating the table (safest method for SQLite)"""
         try:
@@ -281,7 +326,7 @@ class DatabaseMigrator:
                     continue
                 
                 # Perform migration
-                if self.rename_column_via_recreate(db_path, table_name, old_col, new_col):
+                if self.rename_column(db_path, table_name, old_col, new_col):
                     migration_count += 1
             
             self.log(f"Completed {migration_count} column migration(s) in {db_name}")
@@ -382,7 +427,7 @@ class DatabaseMigrator:
             restored_count = 0
             for backup_file in latest_backup.glob("*.db"):
                 restore_file = self.db_dir / backup_file.name
-                shutil.copy2(backup_file, restore_file)
+                self.copy_database(backup_file, restore_file)
                 self.log(f"Restored: {backup_file.name}")
                 restored_count += 1
             
@@ -393,19 +438,31 @@ class DatabaseMigrator:
             return False
 
 
+    def pending_migrations(self) -> List[str]:
+        """List the file renames and column renames that still need to run"""
+        pending = []
+        for old_name, new_name in self.DB_FILE_RENAMES.items():
+            if (self.db_dir / old_name).exists() and not (self.db_dir / new_name).exists():
+                pending.append(f"{old_name} -> {new_name}")
+        
+        for db_name, migrations in self.MIGRATIONS.items():
+            db_path = self.db_dir / db_name
+            # A file still under its old name is migrated after the rename
+            for old_name, new_name in self.DB_FILE_RENAMES.items():
+                if new_name == db_name and not db_path.exists():
+                    db_path = self.db_dir / old_name
+            if not db_path.exists():
+                continue
+            for table_name, old_col, new_col in migrations:
+                columns = self.get_table_columns(db_path, table_name)
+                if old_col in columns and new_col not in columns:
+                    pending.append(f"{db_name}: {table_name}.{old_col} -> {new_col}")
+        return pending
+    
     def check_already_migrated(self) -> bool:
-        """Check if migration has already been performed"""
+        """Check if migration has already been performed (nothing left to do)"""
         try:
-            # Check patient_cms.db -> patients table
-            db_path = self.db_dir / "patient_cms.db"
-            if not db_path.exists():
-                return False
-                
-            columns = self.get_table_columns(db_path, "patients")
-            if "patientId" in columns and "nidaanId" not in columns:
-                return True
-                
-            return False
+            return not self.pending_migrations()
         except Exception as e:
             self.log(f"Error checking migration status: {e}", "ERROR")
             return False
@@ -455,8 +512,8 @@ def main():
         # Check if already migrated
         if not args.backup_only and not args.verify and not args.rollback and not args.force:
             if migrator.check_already_migrated():
-                print("[INFO] System appears to be already migrated (patientId found).")
-                print("       No changes were made.")
+                print("[INFO] System appears to be already migrated (no pending renames).")
+                print("       No changes were made and no backup was taken.")
                 print("       Use --force to run migration anyway.")
                 return 0
 
@@ -17,17 +17,32 @@ a = Analysis(
         'PySide6',
         'werkzeug.security',
         'db.auth_db',
+        'db.audit_log',
         'db.patient_cms_db',
         'db.datasheet_db',
         'db.report_tracker_db',
         'db.invoice_service',
         'db.data_fetcher',
         'db.catalogue_db',
+        'db.catalogue_sources',
         'db.special_tests_db',
         'db.polyclinic_db',
+        'db.polyclinic_export',
+        'db.migrations',
+        'db.backup_service',
+        'db.backup_store',
+        'db.restore_service',
+        'db.archive_service',
+        'db.fts',
+        'db.search_service',
+        'db.cache',
+        'db.availability_service',
         'app.pdf_generator',
         'app.branding',
+        'app.config_service',
         'app.theme',
+        'app.startup_metrics',
+        'app.models',
     ],
     hookspath=[],
     hooksconfig={},